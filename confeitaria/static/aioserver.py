@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+An ``asyncio`` HTTP server for ``confeitaria.static.page.StaticPage``.
+
+Each connection is served by a coroutine, not by a thread, so many slow
+clients can be served at once. The page finds the requested document in a
+pool of threads, and the content is then sent by the coroutine, which reads
+each chunk in the pool as well. So, threads are only held while reading
+from the store, never while waiting for clients.
+
+The page should be in streaming mode, so large documents are not loaded
+whole into memory::
+
+    page = StaticPage(directory='site', stream=True)
+    run(page, host='0.0.0.0', port=8000)
+
+This module requires Python 3.7 or later.
+"""
+
+import asyncio
+import traceback
+import urllib.parse
+
+from confeitaria.static.responses import InternalServerError
+from confeitaria.static.store.aio import AsyncBody, get_executor
+from confeitaria.static.store.body import FileBody, to_bytes
+from confeitaria.static.wsgi import get_message, get_response, is_string
+
+MAX_HEADER_LINES = 100
+MAX_DISCARDED_BODY_SIZE = 64 * 1024
+
+
+async def serve(page, host='localhost', port=8000, executor=None):
+    """
+    Starts serving the page, returning the ``asyncio`` server. Requests are
+    handled by ``executor``, by default the one from
+    ``confeitaria.static.store.aio.get_executor()``.
+    """
+    executor = executor if executor is not None else get_executor()
+
+    async def handle(reader, writer):
+        await handle_connection(page, reader, writer, executor)
+
+    return await asyncio.start_server(handle, host, port)
+
+
+def run(page, host='localhost', port=8000, executor=None):
+    """
+    Serves the page until interrupted.
+    """
+    async def serve_forever():
+        server = await serve(page, host, port, executor)
+
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+async def handle_connection(page, reader, writer, executor):
+    """
+    Serves the requests of a connection, until the client or the response
+    asks to close it. If the page fails unexpectedly, the client gets a
+    ``500 Internal Server Error`` response and the connection is closed.
+    """
+    loop = asyncio.get_event_loop()
+
+    try:
+        while True:
+            request = await read_request(reader)
+
+            if request is None:
+                break
+
+            method, target, version, headers = request
+            path, _, query = target.partition('?')
+
+            if not await discard_body(reader, headers):
+                headers['Connection'] = 'close'
+
+            try:
+                response = await loop.run_in_executor(
+                    executor, get_response, page, method,
+                    urllib.parse.unquote(path), query, headers)
+            except Exception:
+                traceback.print_exc()
+                response = InternalServerError()
+                headers['Connection'] = 'close'
+
+            keep_alive = await send_response(
+                writer, response, version, headers, executor)
+
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    except Exception:
+        traceback.print_exc()
+    finally:
+        writer.close()
+
+
+async def read_request(reader):
+    """
+    Reads the request line and the headers of a request. Returns a tuple with
+    the method, the request target, the HTTP version and a dict of headers,
+    or ``None`` if the connection was closed.
+    """
+    line = await reader.readline()
+
+    if not line.strip():
+        return None
+
+    method, target, version = line.decode('latin-1').split()
+    headers = {}
+
+    for i in range(MAX_HEADER_LINES):
+        line = (await reader.readline()).decode('latin-1')
+
+        if not line.strip():
+            break
+
+        name, _, value = line.partition(':')
+        headers[name.strip().title()] = value.strip()
+    else:
+        raise ValueError('Too many headers')
+
+    return method, target, version, headers
+
+
+async def discard_body(reader, headers):
+    """
+    Reads and discards the body of a request, since pages do not use it, so
+    the next request of the connection can be read. Returns ``False`` if the
+    body was not read, because its length is unknown or larger than
+    ``MAX_DISCARDED_BODY_SIZE``; the connection should then be closed.
+    """
+    if 'Transfer-Encoding' in headers:
+        return False
+
+    length = int(headers.get('Content-Length', 0))
+
+    if length < 0:
+        raise ValueError('Invalid Content-Length')
+    elif length > MAX_DISCARDED_BODY_SIZE:
+        return False
+
+    await reader.readexactly(length)
+
+    return True
+
+
+async def send_response(writer, response, version, headers, executor):
+    """
+    Sends a response. Files are sent with ``loop.sendfile()``, which uses
+    ``os.sendfile()`` where available, so their content does not pass through
+    Python. Other bodies are read in the executor and sent chunk by chunk,
+    waiting for the client to receive each chunk. Returns whether the
+    connection can be kept alive.
+    """
+    content = get_message(response)
+    content = content if content is not None else b''
+    response_headers = list(response.headers)
+    names = set(name.lower() for name, _ in response_headers)
+    keep_alive = is_keep_alive(version, headers)
+
+    if is_string(content):
+        content = to_bytes(content)
+
+        if 'content-length' not in names:
+            response_headers.append(('Content-Length', str(len(content))))
+    elif 'content-length' not in names:
+        keep_alive = False
+
+    if not keep_alive:
+        response_headers.append(('Connection', 'close'))
+
+    lines = ['HTTP/1.1 {0}'.format(response.status_code)]
+    lines.extend('{0}: {1}'.format(n, v) for n, v in response_headers)
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+
+    loop = asyncio.get_event_loop()
+
+    if is_string(content):
+        writer.write(content)
+        await writer.drain()
+    elif isinstance(content, FileBody):
+        try:
+            await loop.sendfile(
+                writer.transport, content.file, content.offset,
+                content.length)
+        finally:
+            content.close()
+    else:
+        body = AsyncBody(
+            content, run=lambda f: loop.run_in_executor(executor, f))
+
+        try:
+            async for chunk in body:
+                writer.write(
+                    chunk if isinstance(chunk, memoryview) else
+                    to_bytes(chunk))
+                await writer.drain()
+        finally:
+            body.close()
+
+    return keep_alive
+
+
+def is_keep_alive(version, headers):
+    """
+    Checks whether the connection should be kept alive after the response.
+    """
+    connection = headers.get('Connection', '').lower()
+
+    if version == 'HTTP/1.0':
+        return connection == 'keep-alive'
+
+    return connection != 'close'
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compiles a directory into a bundle to be served by
+``confeitaria.static.store.bundle.BundleStore``::
+
+    python -m confeitaria.static.bundle DIRECTORY BUNDLE [--jobs N]
+
+The bundle is a zip file with the documents of the directory, uncompressed
+so they can be served straight from the mapped file. It also has gzipped
+siblings of compressible documents, and an index with the entity tag and the
+media type of every document, so none of this is computed while serving.
+"""
+
+import os
+import sys
+import time
+import zipfile
+import hashlib
+import argparse
+import contextlib
+import multiprocessing
+
+from confeitaria.static.compress import gzip_content, is_compressible
+from confeitaria.static.content_type import ContentTypeMap
+from confeitaria.static.store.bundle import BUNDLE_INDEX, dumps_index
+from confeitaria.static.store.manifest import FILE, get_kind, join_path
+
+CONTENT_TYPES = ContentTypeMap(charset=None, default=None)
+
+
+def build_bundle(
+        directory, output, jobs=None, compress_level=9,
+        compress_min_size=1024):
+    """
+    Builds a bundle with the documents of ``directory`` into the ``output``
+    zip file. The documents are hashed and compressed by a pool of ``jobs``
+    processes (by default, one per CPU). Returns a dict with the number of
+    documents, of gzipped siblings and of bytes in the bundle::
+
+    >>> from inelegant.fs import temp_dir, temp_file
+    >>> with temp_dir() as d, \\
+    ...         temp_file(where=d, name='a.css', content='a {}' * 1000), \\
+    ...         temp_file(where=d, name='b.png', content='PNG' * 1000):
+    ...     report = build_bundle(d, os.path.join(d, 'site.zip'), jobs=1)
+    >>> report['documents'], report['compressed']
+    (2, 1)
+
+    Gzipped siblings are only added for compressible documents with at least
+    ``compress_min_size`` bytes, and only if they are smaller than the
+    original document. Documents already in the directory are never replaced
+    by gzipped siblings, so a precompressed ``a.css.gz`` is bundled as it is.
+
+    The index of the bundle is stored as ``.bundle-index``, so a document
+    with this name cannot be bundled::
+
+    >>> with temp_dir() as d, \\
+    ...         temp_file(where=d, name='.bundle-index', content='a'):
+    ...     build_bundle(d, os.path.join(d, 'site.zip'), jobs=1)
+    Traceback (most recent call last):
+      ...
+    ValueError: .bundle-index is reserved for the index of the bundle
+    """
+    output_path = os.path.realpath(output)
+    paths = [
+        path for path in walk_documents(directory)
+        if os.path.realpath(os.path.join(directory, path)) != output_path
+    ]
+    documents = set(paths)
+
+    if BUNDLE_INDEX in documents:
+        raise ValueError(
+            '{0} is reserved for the index of the bundle'.format(
+                BUNDLE_INDEX))
+    tasks = [
+        (directory, path, compress_level, compress_min_size)
+        for path in paths
+    ]
+
+    if jobs == 1:
+        results = [process_document(task) for task in tasks]
+        pool = None
+    else:
+        pool = multiprocessing.Pool(processes=jobs)
+        results = pool.imap(process_document, tasks, chunksize=16)
+
+    index = {}
+    report = {'documents': 0, 'compressed': 0, 'bytes': 0}
+    temp_output = '{0}.{1}.tmp'.format(output, os.getpid())
+
+    try:
+        with contextlib.closing(
+                zipfile.ZipFile(temp_output, 'w', allowZip64=True)) as z:
+            for path, digest, content_type, compressed in results:
+                file_path = os.path.join(directory, *path.split('/'))
+                mtime = os.stat(file_path).st_mtime
+
+                z.write(file_path, path, zipfile.ZIP_STORED)
+                index[path] = (digest, content_type)
+                report['documents'] += 1
+                report['bytes'] += os.path.getsize(file_path)
+
+                if compressed is not None and path + '.gz' not in documents:
+                    info = zipfile.ZipInfo(
+                        path + '.gz', date_time=get_date_time(mtime))
+                    z.writestr(info, compressed)
+                    index[path + '.gz'] = (
+                        hashlib.sha1(compressed).hexdigest(),
+                        'application/gzip')
+                    report['compressed'] += 1
+                    report['bytes'] += len(compressed)
+
+            z.writestr(BUNDLE_INDEX, dumps_index(index))
+    except Exception:
+        if os.path.exists(temp_output):
+            os.remove(temp_output)
+
+        raise
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    os.rename(temp_output, output)
+
+    return report
+
+
+def process_document(task):
+    """
+    Computes the SHA-1 digest, the media type and the gzipped content (if
+    worth it) of a document. Receives a tuple with the directory, the path of
+    the document inside it, the compression level and the minimum size of
+    documents to compress.
+    """
+    directory, path, compress_level, compress_min_size = task
+
+    with open(os.path.join(directory, *path.split('/')), 'rb') as f:
+        content = f.read()
+
+    content_type = CONTENT_TYPES.get(path)
+    compressed = None
+
+    if len(content) >= compress_min_size and is_compressible(content_type):
+        compressed = gzip_content(content, compress_level)
+
+        if len(compressed) >= len(content):
+            compressed = None
+
+    return path, hashlib.sha1(content).hexdigest(), content_type, compressed
+
+
+def walk_documents(directory):
+    """
+    Yields the paths, relative to ``directory``, of the documents to be
+    bundled, in order. Symbolic links to files outside the directory are
+    skipped.
+    """
+    root = os.path.realpath(directory)
+
+    for current, directory_names, file_names in os.walk(directory):
+        directory_names.sort()
+        path = os.path.relpath(current, directory).replace(os.sep, '/')
+        path = '' if path == '.' else path
+
+        for name in sorted(file_names):
+            if get_kind(root, os.path.join(current, name)) == FILE:
+                yield join_path(path, name)
+
+
+def get_date_time(mtime):
+    """
+    Converts a timestamp to the date and time tuple of zip entries, which
+    cannot be earlier than 1980::
+
+    >>> get_date_time(0)
+    (1980, 1, 1, 0, 0, 0)
+    """
+    return max(time.localtime(mtime)[:6], (1980, 1, 1, 0, 0, 0))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m confeitaria.static.bundle',
+        description='Compiles a directory into a static bundle.')
+    parser.add_argument('directory', help='directory with the documents')
+    parser.add_argument('output', help='bundle file to be created')
+    parser.add_argument(
+        '--jobs', '-j', type=int, default=None,
+        help='number of processes (default: number of CPUs)')
+    parser.add_argument(
+        '--compress-level', type=int, default=9,
+        help='gzip compression level (default: 9)')
+    parser.add_argument(
+        '--compress-min-size', type=int, default=1024,
+        help='minimum size of documents to compress (default: 1024)')
+    args = parser.parse_args(args)
+
+    start = time.time()
+    report = build_bundle(
+        args.directory, args.output, jobs=args.jobs,
+        compress_level=args.compress_level,
+        compress_min_size=args.compress_min_size)
+
+    print(
+        '{0} documents ({1} gzipped) and {2} bytes bundled in {3} in '
+        '{4:.2f}s'.format(
+            report['documents'], report['compressed'], report['bytes'],
+            args.output, time.time() - start))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+import time
+
+from confeitaria.static.http import format_http_date
+from confeitaria.static.store.cache import LRUCache
+
+MAX_GROUPS = 90
+
+
+class CachePolicy(object):
+    """
+    ``CachePolicy`` gives the caching headers of a document: the value of
+    ``Cache-Control`` and, optionally, an ``Expires`` date, as the number of
+    seconds after the response::
+
+    >>> policy = CachePolicy('public, max-age=3600', expires=3600)
+    >>> policy.get_headers(now=1420070400)
+    [('Cache-Control', 'public, max-age=3600'), \
+('Expires', 'Thu, 01 Jan 2015 01:00:00 GMT')]
+
+    A negative ``expires`` gives a date in the past, so the document is
+    already expired::
+
+    >>> CachePolicy('no-cache', expires=-1).get_headers(now=1420070400)
+    [('Cache-Control', 'no-cache'), \
+('Expires', 'Thu, 01 Jan 1970 00:00:00 GMT')]
+    """
+
+    def __init__(self, cache_control=None, expires=None):
+        self.cache_control = cache_control
+        self.expires = expires
+
+    def get_headers(self, now=None):
+        headers = []
+
+        if self.cache_control is not None:
+            headers.append(('Cache-Control', self.cache_control))
+
+        if self.expires is not None:
+            if self.expires < 0:
+                expires = 0
+            else:
+                now = now if now is not None else time.time()
+                expires = now + self.expires
+
+            headers.append(('Expires', format_http_date(expires)))
+
+        return headers
+
+    def __repr__(self):
+        return 'CachePolicy({0!r}, expires={1!r})'.format(
+            self.cache_control, self.expires)
+
+
+class CachePolicyMap(object):
+    """
+    ``CachePolicyMap`` finds the ``CachePolicy`` of a document given its
+    path. It receives a list of pairs of patterns and policies (or
+    ``Cache-Control`` values), and the first pattern matching the path gives
+    its policy::
+
+    >>> policies = CachePolicyMap([
+    ...     ('/static/', 'public, max-age=31536000'),
+    ...     ('*.html', CachePolicy('no-cache', expires=-1)),
+    ...     ('/img/**/*.png', 'public, max-age=86400'),
+    ... ])
+    >>> policies.get('/static/css/site.css')
+    CachePolicy('public, max-age=31536000', expires=None)
+    >>> policies.get('docs/index.html')
+    CachePolicy('no-cache', expires=-1)
+    >>> policies.get('/img/a/b/logo.png')
+    CachePolicy('public, max-age=86400', expires=None)
+    >>> policies.get('/img/logo.gif') is None
+    True
+
+    Patterns ending with ``/`` are prefixes, matching everything inside the
+    directory. Patterns without ``/`` match file names in any directory.
+    Other patterns match the whole path, where ``*`` matches any part of a
+    name, ``?`` any single character and ``**`` any number of directories
+    (see ``translate_pattern()``).
+
+    The patterns are compiled into a single regular expression, so finding
+    the policy of a path takes one match, however many patterns there are,
+    and the policies of the last ``cache_size`` paths are kept.
+    """
+
+    def __init__(self, policies=(), cache_size=4096):
+        self.policies = [
+            (pattern, get_policy(policy)) for pattern, policy in policies]
+        self.expressions = [
+            compile_patterns(
+                [p for p, _ in self.policies[i:i + MAX_GROUPS]], i)
+            for i in range(0, len(self.policies), MAX_GROUPS)
+        ]
+        self.cache = LRUCache(max_entries=cache_size)
+
+    def get(self, path):
+        if not self.expressions:
+            return None
+
+        path = '/' + path.lstrip('/')
+
+        try:
+            return self.cache[path]
+        except KeyError:
+            pass
+
+        policy = None
+
+        for expression in self.expressions:
+            match = expression.match(path)
+
+            if match is not None:
+                policy = self.policies[int(match.lastgroup[1:])][1]
+                break
+
+        self.cache[path] = policy
+
+        return policy
+
+
+def compile_patterns(patterns, start=0):
+    """
+    Compiles the patterns into a regular expression where each pattern is a
+    group named after its index, plus ``start``::
+
+    >>> expression = compile_patterns(['*.css', '*.js'], start=10)
+    >>> expression.match('/a/b.js').lastgroup
+    'p11'
+    """
+    return re.compile('|'.join(
+        '(?P<p{0}>{1})'.format(start + i, translate_pattern(p))
+        for i, p in enumerate(patterns)))
+
+
+def translate_pattern(pattern):
+    """
+    Translates a pattern into a regular expression matching whole paths::
+
+    >>> expression = re.compile(translate_pattern('/static/**/*.js'))
+    >>> bool(expression.match('/static/app.js'))
+    True
+    >>> bool(expression.match('/static/lib/x/app.js'))
+    True
+    >>> bool(expression.match('/static/app.css'))
+    False
+    >>> bool(re.match(translate_pattern('/a/*.js'), '/a/b/c.js'))
+    False
+    """
+    if pattern.endswith('/'):
+        pattern += '**'
+
+    if '/' not in pattern:
+        pattern = '**/' + pattern
+    elif not pattern.startswith('/'):
+        pattern = '/' + pattern
+
+    parts = []
+
+    for token in re.split(r'(\*\*/|\*\*|\*|\?)', pattern):
+        if token == '**/':
+            parts.append('(?:.*/)?')
+        elif token == '**':
+            parts.append('.*')
+        elif token == '*':
+            parts.append('[^/]*')
+        elif token == '?':
+            parts.append('[^/]')
+        else:
+            parts.append(re.escape(token))
+
+    if pattern.startswith('**/'):
+        parts.insert(0, '/')
+
+    return ''.join(parts) + r'\Z'
+
+
+def get_policy(policy):
+    """
+    Returns the policy itself or, if it is a string, a policy with it as the
+    ``Cache-Control`` value::
+
+    >>> get_policy('no-store')
+    CachePolicy('no-store', expires=None)
+    """
+    if policy is None or isinstance(policy, CachePolicy):
+        return policy
+
+    return CachePolicy(policy)
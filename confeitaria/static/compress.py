@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Helpers to compress documents while serving them.
+"""
+
+import zlib
+
+COMPRESSIBLE_TYPES = set([
+    'application/javascript', 'application/json', 'application/xml',
+    'application/xhtml+xml', 'application/wasm', 'application/manifest+json',
+    'application/x-javascript', 'image/svg+xml', 'image/x-icon'
+])
+
+
+def is_compressible(content_type):
+    """
+    Checks whether documents of the given content type are worth compressing.
+    Text documents are::
+
+    >>> is_compressible('text/css')
+    True
+    >>> is_compressible('text/html; charset=utf-8')
+    True
+
+    ...as well as some other types, such as JavaScript, JSON and XML::
+
+    >>> is_compressible('application/javascript')
+    True
+    >>> is_compressible('application/atom+xml')
+    True
+
+    Already compressed formats, however, are not::
+
+    >>> is_compressible('image/png')
+    False
+    >>> is_compressible(None)
+    False
+    """
+    if content_type is None:
+        return False
+
+    content_type = content_type.split(';')[0].strip().lower()
+
+    return (
+        content_type.startswith('text/') or
+        content_type in COMPRESSIBLE_TYPES or
+        content_type.endswith('+xml') or
+        content_type.endswith('+json')
+    )
+
+
+def gzip_content(content, level=6):
+    """
+    Compresses the content in the gzip format::
+
+    >>> import gzip, io
+    >>> compressed = gzip_content('example' * 100)
+    >>> len(compressed) < 700
+    True
+    >>> gzip.GzipFile(fileobj=io.BytesIO(compressed)).read() == 'example' * 100
+    True
+    """
+    compressor = get_gzip_compressor(level)
+
+    return compressor.compress(content) + compressor.flush()
+
+
+class GzipBody(object):
+    """
+    ``GzipBody`` is an iterable that compresses, in the gzip format, the
+    chunks from another iterable body, so large documents can be compressed
+    without being fully loaded in memory::
+
+    >>> import gzip, io
+    >>> from confeitaria.static.store.body import ContentBody
+    >>> body = GzipBody(ContentBody('example' * 100, chunk_size=10))
+    >>> compressed = ''.join(body)
+    >>> gzip.GzipFile(fileobj=io.BytesIO(compressed)).read() == 'example' * 100
+    True
+
+    The length of the compressed content is not known before it is
+    compressed::
+
+    >>> body.length is None
+    True
+
+    Closing it closes the original body.
+    """
+
+    def __init__(self, body, level=6):
+        self.body = body
+        self.level = level
+        self.length = None
+
+    def __iter__(self):
+        compressor = get_gzip_compressor(self.level)
+
+        for chunk in self.body:
+            compressed = compressor.compress(chunk)
+
+            if compressed:
+                yield compressed
+
+        yield compressor.flush()
+
+    def close(self):
+        self.body.close()
+
+
+def get_gzip_compressor(level=6):
+    """
+    Returns a ``zlib`` compressor that generates content in the gzip format.
+    """
+    return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def variant_etag(etag, encoding):
+    """
+    Returns the entity tag of an encoded variant of a document, given the
+    entity tag of the document::
+
+    >>> variant_etag('"abc"', 'gzip')
+    '"abc-gzip"'
+    >>> variant_etag('W/"abc"', 'gzip')
+    'W/"abc-gzip"'
+    >>> variant_etag(None, 'gzip') is None
+    True
+    """
+    if etag is None:
+        return None
+
+    return '{0}-{1}"'.format(etag[:-1], encoding)
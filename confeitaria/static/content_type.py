@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import mimetypes
+import posixpath
+
+from confeitaria.static.store.cache import LRUCache
+
+CONTENT_TYPES = {
+    '.js': 'text/javascript',
+    '.mjs': 'text/javascript',
+    '.json': 'application/json',
+    '.map': 'application/json',
+    '.webmanifest': 'application/manifest+json',
+    '.wasm': 'application/wasm',
+    '.svg': 'image/svg+xml',
+    '.webp': 'image/webp',
+    '.avif': 'image/avif',
+    '.woff': 'font/woff',
+    '.woff2': 'font/woff2',
+}
+
+CHARSET_TYPES = set([
+    'application/javascript', 'application/json', 'application/xml',
+    'application/xhtml+xml', 'application/manifest+json', 'image/svg+xml'
+])
+
+DEFAULT_CONTENT_TYPE = 'application/octet-stream'
+
+
+class ContentTypeMap(object):
+    """
+    ``ContentTypeMap`` finds the value of the ``Content-Type`` header of a
+    document given its path::
+
+    >>> types = ContentTypeMap()
+    >>> types.get('index.html')
+    'text/html; charset=utf-8'
+    >>> types.get('img/logo.PNG')
+    'image/png'
+
+    Some types commonly served by web sites, but unknown to
+    ``mimetypes.guess_type()`` in some platforms, are known by default::
+
+    >>> types.get('app.wasm')
+    'application/wasm'
+    >>> types.get('app.mjs')
+    'text/javascript; charset=utf-8'
+    >>> types.get('site.webmanifest')
+    'application/manifest+json; charset=utf-8'
+
+    Others can be given by extension, and override the default ones::
+
+    >>> types = ContentTypeMap({'.md': 'text/markdown', 'js': 'text/plain'})
+    >>> types.get('README.md')
+    'text/markdown; charset=utf-8'
+    >>> types.get('app.js')
+    'text/plain; charset=utf-8'
+
+    If the store already knows the type of the document (as those with a
+    ``confeitaria.static.store.manifest.Manifest`` do), it can be given as
+    well, and is used if the extension is not in the map::
+
+    >>> types.get('data', 'text/csv')
+    'text/csv; charset=utf-8'
+
+    Documents of unknown types are served as ``application/octet-stream``, or
+    the given ``default``::
+
+    >>> types.get('unknown.qqq')
+    'application/octet-stream'
+
+    The type of each extension is computed only once.
+    """
+
+    def __init__(
+            self, types=None, charset='utf-8', default=DEFAULT_CONTENT_TYPE,
+            cache_size=1024):
+        self.types = dict(CONTENT_TYPES)
+        self.charset = charset
+        self.default = default
+        self.cache = LRUCache(max_entries=cache_size)
+
+        if types is not None:
+            self.types.update(
+                ('.' + e.lstrip('.').lower(), t) for e, t in types.items())
+
+    def get(self, path, content_type=None):
+        extension = get_extension(path)
+        key = (extension, content_type)
+        value = self.cache.get(key)
+
+        if value is None:
+            value = (
+                self.types.get(extension) or content_type or
+                mimetypes.guess_type('file' + extension)[0] or self.default
+            )
+            value = add_charset(value, self.charset)
+            self.cache[key] = value
+
+        return value
+
+
+def get_extension(path):
+    """
+    Returns the extension of the path, in lowercase and with a leading dot::
+
+    >>> get_extension('a/b.tar.GZ')
+    '.gz'
+    >>> get_extension('a/b')
+    ''
+    """
+    return posixpath.splitext(path)[1].lower()
+
+
+def add_charset(content_type, charset):
+    """
+    Adds the charset parameter to text types::
+
+    >>> add_charset('text/css', 'utf-8')
+    'text/css; charset=utf-8'
+    >>> add_charset('application/json', 'utf-8')
+    'application/json; charset=utf-8'
+    >>> add_charset('image/png', 'utf-8')
+    'image/png'
+    >>> add_charset('text/css; charset=latin-1', 'utf-8')
+    'text/css; charset=latin-1'
+    >>> add_charset('text/css', None)
+    'text/css'
+    """
+    if not charset or 'charset=' in content_type:
+        return content_type
+
+    if content_type.startswith('text/') or content_type in CHARSET_TYPES:
+        return '{0}; charset={1}'.format(content_type, charset)
+
+    return content_type
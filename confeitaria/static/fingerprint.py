@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+import hashlib
+import posixpath
+
+from confeitaria.static.store.body import to_bytes
+from confeitaria.static.store.cache import LRUCache
+from confeitaria.static.store.stat import get_stat
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+DEFAULT_LENGTH = 8
+
+
+class FingerprintMap(object):
+    """
+    ``FingerprintMap`` gives the documents of a store URLs with a fingerprint
+    of their content, such as ``app.3f9a1c2b.js``, so the URL changes
+    whenever the content does::
+
+    >>> from confeitaria.static.store.fake import FakeStore
+    >>> store = FakeStore({'js/app.js': 'example', 'js/app.min.js': 'ex'})
+    >>> fingerprints = FingerprintMap(store)
+    >>> fingerprints.get_url('/js/app.js')
+    '/js/app.c3499c27.js'
+    >>> fingerprints.get_url('js/app.min.js')
+    'js/app.min.e066133f.js'
+
+    The fingerprinted paths can be mapped back to the paths of the
+    documents, as long as the fingerprint matches the current content::
+
+    >>> fingerprints.resolve('/js/app.c3499c27.js')
+    '/js/app.js'
+    >>> fingerprints.resolve('/js/app.0123abcd.js') is None
+    True
+    >>> fingerprints.resolve('/js/app.js') is None
+    True
+
+    The fingerprint is the beginning of the SHA-1 digest of the content, with
+    ``length`` hexadecimal digits. It is computed only once for each version
+    of the document (as identified by the entity tag of its stat), and at
+    most ``cache_size`` fingerprints are kept.
+    """
+
+    def __init__(self, store, length=DEFAULT_LENGTH, cache_size=4096):
+        self.store = store
+        self.length = length
+        self.pattern = re.compile(
+            r'^(.*)\.([0-9a-f]{{{0}}})((?:\.[^./]*)?)$'.format(length))
+        self.cache = LRUCache(max_entries=cache_size)
+
+    def get(self, path):
+        """
+        Returns the fingerprint of the document at ``path``. Raises
+        ``ValueError`` if the document is not found.
+        """
+        stat = get_stat(self.store, path)
+        key = (path.lstrip('/'), stat.etag)
+        fingerprint = self.cache.get(key)
+
+        if fingerprint is None or stat.etag is None:
+            content = self.store.read(path)
+            digest = hashlib.sha1(to_bytes(content)).hexdigest()
+            fingerprint = digest[:self.length]
+            self.cache[key] = fingerprint
+
+        return fingerprint
+
+    def get_url(self, path):
+        """
+        Returns the fingerprinted path of the document at ``path``.
+        """
+        return add_fingerprint(path, self.get(path))
+
+    def resolve(self, path):
+        """
+        Returns the path of the document whose fingerprinted path is ``path``,
+        or ``None`` if ``path`` is not a fingerprinted path of the current
+        version of any document.
+        """
+        directory, name = posixpath.split(path)
+        match = self.pattern.match(name)
+
+        if match is None:
+            return None
+
+        document_path = posixpath.join(
+            directory, match.group(1) + match.group(3))
+
+        try:
+            fingerprint = self.get(document_path)
+        except ValueError:
+            return None
+
+        return document_path if fingerprint == match.group(2) else None
+
+    def clear(self):
+        self.cache.clear()
+
+
+def add_fingerprint(path, fingerprint):
+    """
+    Adds the fingerprint to the path, before the extension of the file::
+
+    >>> add_fingerprint('/js/app.min.js', 'abc123')
+    '/js/app.min.abc123.js'
+    >>> add_fingerprint('LICENSE', 'abc123')
+    'LICENSE.abc123'
+    """
+    directory, name = posixpath.split(path)
+    base, extension = posixpath.splitext(name)
+
+    return posixpath.join(
+        directory, '{0}.{1}{2}'.format(base, fingerprint, extension))
@@ -0,0 +1,453 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Helpers to handle the HTTP headers relevant to serving static content.
+"""
+
+import email.utils
+
+
+def get_header(headers, name, default=None):
+    """
+    Returns the value of a header from a dict of headers, regardless of the
+    capitalization of its name::
+
+    >>> get_header({'If-None-Match': '"abc"'}, 'if-none-match')
+    '"abc"'
+
+    If the header is not present, returns the default value::
+
+    >>> get_header({}, 'If-None-Match') is None
+    True
+    >>> get_header(None, 'If-None-Match', default='*')
+    '*'
+    """
+    if not headers:
+        return default
+
+    try:
+        return headers[name]
+    except KeyError:
+        pass
+
+    name = name.lower()
+
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+
+    return default
+
+
+def get_environ_headers(environ):
+    """
+    Returns a dict with the HTTP headers from a WSGI environment dict::
+
+    >>> environ = {
+    ...     'PATH_INFO': '/', 'HTTP_IF_NONE_MATCH': '"abc"',
+    ...     'CONTENT_TYPE': 'text/plain'}
+    >>> sorted(get_environ_headers(environ).items())
+    [('Content-Type', 'text/plain'), ('If-None-Match', '"abc"')]
+    """
+    headers = {}
+
+    for key, value in environ.items():
+        if key.startswith('HTTP_'):
+            name = key[5:]
+        elif key in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = key
+        else:
+            continue
+
+        headers['-'.join(p.capitalize() for p in name.split('_'))] = value
+
+    return headers
+
+
+def parse_etags(value):
+    """
+    Parses the value of headers such as ``If-None-Match``, returning the list
+    of entity tags in it::
+
+    >>> parse_etags('"abc", W/"def",  "g,h"')
+    ['"abc"', 'W/"def"', '"g,h"']
+
+    The wildcard is returned as well::
+
+    >>> parse_etags('*')
+    ['*']
+    """
+    etags = []
+    value = value.strip()
+
+    while value:
+        if value.startswith('*'):
+            etags.append('*')
+            value = value[1:]
+        else:
+            prefix = 'W/' if value.startswith('W/') else ''
+            start = len(prefix)
+
+            if value[start:start + 1] != '"':
+                break
+
+            end = value.find('"', start + 1)
+
+            if end < 0:
+                break
+
+            etags.append(value[:end + 1])
+            value = value[end + 1:]
+
+        value = value.lstrip(' \t,')
+
+    return etags
+
+
+def etag_matches(etag, header_value, weak=True):
+    """
+    Checks whether an entity tag matches any of the entity tags listed in the
+    value of a header::
+
+    >>> etag_matches('"abc"', '"def", "abc"')
+    True
+    >>> etag_matches('"abc"', '"def"')
+    False
+
+    The wildcard matches any entity tag::
+
+    >>> etag_matches('"abc"', '*')
+    True
+
+    By default, the comparison is weak, as required by ``If-None-Match``, so
+    weak entity tags match their strong counterparts::
+
+    >>> etag_matches('"abc"', 'W/"abc"')
+    True
+
+    A strong comparison, however, never matches weak entity tags::
+
+    >>> etag_matches('"abc"', 'W/"abc"', weak=False)
+    False
+    """
+    if etag is None or header_value is None:
+        return False
+
+    for candidate in parse_etags(header_value):
+        if candidate == '*':
+            return True
+        elif weak and strip_weak(candidate) == strip_weak(etag):
+            return True
+        elif not weak and not is_weak(etag) and candidate == etag:
+            return True
+
+    return False
+
+
+def is_weak(etag):
+    """
+    Checks whether an entity tag is weak::
+
+    >>> is_weak('W/"abc"')
+    True
+    >>> is_weak('"abc"')
+    False
+    """
+    return etag.startswith('W/')
+
+
+def strip_weak(etag):
+    """
+    Removes the weakness indicator from an entity tag::
+
+    >>> strip_weak('W/"abc"')
+    '"abc"'
+    >>> strip_weak('"abc"')
+    '"abc"'
+    """
+    return etag[2:] if is_weak(etag) else etag
+
+
+def format_http_date(timestamp):
+    """
+    Formats a timestamp as an HTTP date, as used by headers such as
+    ``Last-Modified``::
+
+    >>> format_http_date(1420070400.5)
+    'Thu, 01 Jan 2015 00:00:00 GMT'
+    """
+    return email.utils.formatdate(timestamp, usegmt=True)
+
+
+def parse_http_date(value):
+    """
+    Parses an HTTP date, as given in headers such as ``If-Modified-Since``,
+    returning a timestamp::
+
+    >>> parse_http_date('Thu, 01 Jan 2015 00:00:00 GMT')
+    1420070400
+
+    If the date is not valid, returns ``None``::
+
+    >>> parse_http_date('yesterday') is None
+    True
+    """
+    if value is None:
+        return None
+
+    date = email.utils.parsedate_tz(value)
+
+    if date is None:
+        return None
+
+    try:
+        return email.utils.mktime_tz(date)
+    except (ValueError, OverflowError):
+        return None
+
+
+def is_modified_since(mtime, header_value):
+    """
+    Checks whether a document modified at the given timestamp was modified
+    after the date from an ``If-Modified-Since`` header::
+
+    >>> is_modified_since(1420070400.5, 'Thu, 01 Jan 2015 00:00:00 GMT')
+    False
+    >>> is_modified_since(1420070401.0, 'Thu, 01 Jan 2015 00:00:00 GMT')
+    True
+
+    If the modification time is unknown or the date is not valid, the document
+    is considered modified::
+
+    >>> is_modified_since(None, 'Thu, 01 Jan 2015 00:00:00 GMT')
+    True
+    >>> is_modified_since(1420070400.5, 'yesterday')
+    True
+    """
+    since = parse_http_date(header_value)
+
+    if mtime is None or since is None:
+        return True
+
+    return int(mtime) > since
+
+
+MAX_RANGES = 16
+
+
+def parse_range(value, size):
+    """
+    Parses the value of a ``Range`` header, returning a list of tuples with
+    the first and last positions of each requested byte range of a document of
+    the given size::
+
+    >>> parse_range('bytes=0-3', 10)
+    [(0, 3)]
+    >>> parse_range('bytes=0-3, 5-', 10)
+    [(0, 3), (5, 9)]
+
+    Suffix ranges are supported, and ranges beyond the document are
+    truncated::
+
+    >>> parse_range('bytes=-3', 10)
+    [(7, 9)]
+    >>> parse_range('bytes=5-20', 10)
+    [(5, 9)]
+
+    Ranges which cannot be satisfied are dropped, so an empty list means the
+    request cannot be satisfied::
+
+    >>> parse_range('bytes=20-30', 10)
+    []
+
+    If the header is invalid, or has more than ``MAX_RANGES`` ranges, it
+    should be ignored, so ``None`` is returned::
+
+    >>> parse_range('bytes=5-3', 10) is None
+    True
+    >>> parse_range('lines=1-2', 10) is None
+    True
+    >>> parse_range('bytes=' + ','.join(['0-1'] * 20), 10) is None
+    True
+    """
+    if value is None:
+        return None
+
+    unit, _, specs = value.partition('=')
+
+    if unit.strip().lower() != 'bytes':
+        return None
+
+    specs = [spec.strip() for spec in specs.split(',') if spec.strip()]
+
+    if not specs or len(specs) > MAX_RANGES:
+        return None
+
+    ranges = []
+
+    for spec in specs:
+        first, dash, last = spec.partition('-')
+
+        if not dash:
+            return None
+
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else size - 1
+            else:
+                suffix = int(last)
+                start = max(size - suffix, 0)
+                end = size - 1 if suffix else -1
+        except ValueError:
+            return None
+
+        if first and end < start:
+            return None
+
+        if start < size and end >= start:
+            ranges.append((start, min(end, size - 1)))
+
+    return ranges
+
+
+def range_matches(stat, header_value):
+    """
+    Checks whether the value of an ``If-Range`` header matches the document
+    described by the stat. It can be an entity tag, which should match
+    strongly...
+
+    ::
+
+    >>> from confeitaria.static.store.stat import Stat
+    >>> stat = Stat('a.html', size=1, mtime=1420070400.0, etag='"a"')
+    >>> range_matches(stat, '"a"')
+    True
+    >>> range_matches(stat, 'W/"a"')
+    False
+
+    ...or a date, which should be the exact modification time::
+
+    >>> range_matches(stat, 'Thu, 01 Jan 2015 00:00:00 GMT')
+    True
+    >>> range_matches(stat, 'Thu, 01 Jan 2015 00:00:01 GMT')
+    False
+
+    If there is no ``If-Range`` header, it matches::
+
+    >>> range_matches(stat, None)
+    True
+    """
+    if header_value is None:
+        return True
+
+    header_value = header_value.strip()
+
+    if header_value.startswith('"') or header_value.startswith('W/'):
+        return etag_matches(stat.etag, header_value, weak=False)
+
+    since = parse_http_date(header_value)
+
+    return (
+        since is not None and stat.mtime is not None and
+        int(stat.mtime) == since
+    )
+
+
+def format_content_range(start, end, size):
+    """
+    Formats the value of a ``Content-Range`` header::
+
+    >>> format_content_range(0, 3, 10)
+    'bytes 0-3/10'
+
+    If ``start`` and ``end`` are ``None``, the value reports the requested
+    range cannot be satisfied::
+
+    >>> format_content_range(None, None, 10)
+    'bytes */10'
+    """
+    if start is None:
+        return 'bytes */{0}'.format(size)
+
+    return 'bytes {0}-{1}/{2}'.format(start, end, size)
+
+
+def parse_accept_encoding(value):
+    """
+    Parses the value of an ``Accept-Encoding`` header, returning a dict mapping
+    each content coding to its quality value::
+
+    >>> sorted(parse_accept_encoding('gzip, br;q=0.8, *;q=0').items())
+    [('*', 0.0), ('br', 0.8), ('gzip', 1.0)]
+    """
+    codings = {}
+
+    for item in (value or '').split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+
+        if not coding:
+            continue
+
+        quality = 1.0
+
+        for param in params.split(';'):
+            name, _, param_value = param.partition('=')
+
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(param_value)
+                except ValueError:
+                    quality = 0.0
+
+        codings[coding] = quality
+
+    return codings
+
+
+def accepts_encoding(header_value, coding):
+    """
+    Checks whether a content coding is acceptable, given the value of the
+    ``Accept-Encoding`` header::
+
+    >>> accepts_encoding('gzip, deflate', 'gzip')
+    True
+    >>> accepts_encoding('gzip, deflate', 'br')
+    False
+
+    Codings with quality zero are not acceptable, and the wildcard matches
+    codings not listed::
+
+    >>> accepts_encoding('gzip;q=0, *', 'gzip')
+    False
+    >>> accepts_encoding('gzip;q=0, *', 'br')
+    True
+
+    If there is no header, no coding is assumed to be acceptable::
+
+    >>> accepts_encoding(None, 'gzip')
+    False
+    """
+    codings = parse_accept_encoding(header_value)
+
+    if coding in codings:
+        return codings[coding] > 0
+
+    return codings.get('*', 0) > 0
@@ -18,13 +18,38 @@
 # along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import time
+import uuid
+import threading
+import functools
 
 import confeitaria.interfaces
-from confeitaria.responses import NotFound
+from confeitaria.responses import NotFound, OK, Response
 
+from confeitaria.static.compress import (
+    GzipBody, gzip_content, is_compressible, variant_etag)
+from confeitaria.static.cache_control import CachePolicyMap, get_policy
+from confeitaria.static.content_type import ContentTypeMap
+from confeitaria.static.fingerprint import (
+    FingerprintMap, IMMUTABLE_CACHE_CONTROL)
+from confeitaria.static.http import (
+    get_header, etag_matches, format_http_date, is_modified_since,
+    parse_range, range_matches, format_content_range, accepts_encoding)
+from confeitaria.static.responses import (
+    NotModified, PartialContent, RangeNotSatisfiable)
 from confeitaria.static.store.aggregate import AggregateStore
+from confeitaria.static.store.body import (
+    ContentBody, MultipartBody, get_body, to_bytes, DEFAULT_CHUNK_SIZE)
+from confeitaria.static.store.cache import CacheStore, LRUCache
 from confeitaria.static.store.file import FileStore
+from confeitaria.static.store.metrics import (
+    HIT, MISS, ERROR, PROMETHEUS_CONTENT_TYPE, MeteredStore, Metrics)
 from confeitaria.static.store.resource import ResourceStore
+from confeitaria.static.store.stat import Stat, get_stat
+from confeitaria.static.store.trace import (
+    call, is_tracing, traced, tracing)
+from confeitaria.static.store.watch import Watcher, is_affected
+from confeitaria.static.warmup import DEFAULT_JOBS, read_log_file, warm_up
 
 
 class StaticPage(confeitaria.interfaces.Page):
@@ -47,25 +72,725 @@ class StaticPage(confeitaria.interfaces.Page):
     ...         requests.get('http://localhost:8000/').text
     u'example'
     u'example'
+
+    If the ``cache`` argument is true, the content read from the directory (or
+    from the given store) is kept in memory by a
+    ``confeitaria.static.store.cache.CacheStore``. If ``cache`` is a dict, it
+    is given as keyword arguments to the cache store::
+
+    >>> page = StaticPage(directory='.', cache={'max_size': 1024 * 1024})
+    >>> page.store.primary.cache.max_size
+    1048576
+
+    Every document is served with an ``ETag`` header. If the request has an
+    ``If-None-Match`` header matching it, the page responds with ``304 Not
+    Modified`` without even reading the document from the store. Confeitaria
+    requests do not carry HTTP headers, though, so this only happens when the
+    page is served by ``confeitaria.static.wsgi.StaticApplication`` or any
+    other server that sets a ``headers`` dict in the request.
+
+    Documents whose modification time is known are also served with a
+    ``Last-Modified`` header, and requests with an ``If-Modified-Since`` header
+    (but no ``If-None-Match``) are answered with ``304 Not Modified`` if the
+    document was not modified since then.
+
+    By default, documents are read whole before being sent. If ``stream`` is
+    true, the page returns instead an iterable which reads the document in
+    chunks of ``chunk_size`` bytes, so serving large files does not require
+    large amounts of memory. The Confeitaria server can only send strings,
+    though, so streams should be served with
+    ``confeitaria.static.wsgi.StaticApplication`` or any other server that can
+    send iterables. Either way, the ``Content-Length`` header is sent.
+
+    The page also serves byte ranges of documents, as requested by the
+    ``Range`` header. If only one range is requested, only this range is read
+    from the store; many ranges are sent as a ``multipart/byteranges``
+    content. The ``If-Range`` header is respected, and ranges that cannot be
+    satisfied result in ``416 Range Not Satisfiable``.
+
+    If a document has precompressed siblings in the store (e.g. ``app.js.br``
+    or ``app.js.gz`` next to ``app.js``) and the ``Accept-Encoding`` request
+    header accepts their content coding, the sibling is served instead, with
+    the proper ``Content-Encoding`` and ``Vary`` headers. Which siblings exist
+    is looked up only once per version of the document. This can be disabled
+    by setting ``precompressed`` to false.
+
+    Documents without precompressed siblings are compressed on the fly with
+    gzip if the client accepts it, their content type is compressible (such as
+    HTML, CSS or JavaScript) and they have at least ``compress_min_size``
+    bytes. The compressed content of each version of a document is cached (up
+    to ``compress_cache_size`` bytes), so it is compressed only once. In
+    streaming mode, documents too large to be cached are compressed while
+    being sent. On the fly compression, done with ``compress_level``, can be
+    disabled by setting ``compress`` to false.
+
+    Every document is served with its ``Content-Type``, found from its
+    extension by a ``confeitaria.static.content_type.ContentTypeMap`` (or
+    from the store, if it already knows it). Text types carry a ``charset``
+    parameter, ``utf-8`` by default. Types can be added or overridden with a
+    dict mapping extensions to types::
+
+    >>> page = StaticPage(content_types={'.md': 'text/markdown'})
+    >>> page.content_types.get('README.md')
+    'text/markdown; charset=utf-8'
+
+    If ``watch`` is true, the directory is watched (with
+    ``confeitaria.static.store.watch.Watcher``, so only in Linux) and the
+    caches of the page and its store are invalidated as soon as files change.
+    In this case, cached documents are not checked against the file system at
+    every request. The watcher is available as the ``watcher`` attribute, and
+    can be stopped with its ``stop()`` method.
+
+    For directories with many files, ``manifest`` can be the name of a file
+    where the page keeps a manifest of the directory between runs (see
+    ``confeitaria.static.store.manifest``). The manifest is loaded and
+    incrementally updated when the page is created, and then documents are
+    found without probing the file system.
+
+    The current request is kept per thread, so the same page can serve many
+    requests concurrently, as ``confeitaria.static.aioserver`` does in Python
+    3: it handles the connections in ``asyncio`` coroutines and calls the page
+    in a bounded thread pool.
+
+    Right after starting, the caches can be filled with the most requested
+    documents by the ``warm_up()`` method.
+
+    If ``metrics`` is true (or a
+    ``confeitaria.static.store.metrics.Metrics`` object, to share between
+    pages), the page and each of its stores count their hits, misses, errors
+    and bytes, and keep histograms of their latencies. If ``metrics_path`` is
+    given, the page serves the metrics at this path in the Prometheus text
+    format, and as JSON with an added ``.json`` extension::
+
+    >>> from confeitaria.static.store.fake import FakeStore
+    >>> from confeitaria.static.wsgi import get_response
+    >>> page = StaticPage(
+    ...     store=FakeStore({'a.html': 'a'}), metrics=True,
+    ...     metrics_path='/_metrics')
+    >>> r = get_response(page, 'GET', '/a.html')
+    >>> r = get_response(page, 'GET', '/b.html')
+    >>> page_counters = page.metrics.get_counters('StaticPage', 'index')
+    >>> page_counters.hits, page_counters.misses
+    (1, 1)
+    >>> store_counters = page.metrics.get_counters('FakeStore', 'read')
+    >>> store_counters.hits, store_counters.bytes
+    (1, 1)
+    >>> r = get_response(page, 'GET', '/_metrics')
+    >>> print(r.message) # doctest: +ELLIPSIS
+    # TYPE confeitaria_static_operations_total counter
+    ...
+
+    The phases of serving a request (resolving and reading the document from
+    each store, negotiating its encoding, compressing it and so on) can be
+    traced by hooks, given as ``trace_hooks`` or added by
+    ``add_trace_hook()``. They receive a
+    ``confeitaria.static.store.trace.Span`` at the end of each phase of the
+    requests to the page::
+
+    >>> spans = []
+    >>> page = StaticPage(store=FakeStore({'a.html': 'a'}))
+    >>> page.add_trace_hook(spans.append)
+    >>> r = get_response(page, 'GET', '/a.html')
+    >>> [(s.phase, s.name) for s in spans] # doctest: +ELLIPSIS
+    [('stat', 'FakeStore'), ('delegate', 'FakeStore'), \
+('stat', 'AggregateStore'), ...('request', 'StaticPage')]
+
+    Hooks added by ``confeitaria.static.store.trace.add_hook()`` receive the
+    spans of all pages and stores. Without hooks, tracing costs nearly
+    nothing.
+
+    If ``fingerprint`` is true, documents are also served at URLs with a
+    fingerprint of their content, as given by the ``get_url()`` method (see
+    ``confeitaria.static.fingerprint.FingerprintMap``)::
+
+    >>> page = StaticPage(store=FakeStore({'app.js': 'a'}), fingerprint=True)
+    >>> page.get_url('/app.js')
+    '/app.86f7e437.js'
+
+    As the content at these URLs never changes, they are served with a
+    ``Cache-Control`` header letting clients and caches keep them for a
+    year, without ever revalidating them::
+
+    >>> r = get_response(page, 'GET', '/app.86f7e437.js')
+    >>> r.message, dict(r.headers)['Cache-Control']
+    ('a', 'public, max-age=31536000, immutable')
+
+    URLs with fingerprints of former versions of the document are not found.
+
+    Other documents are served without caching headers, unless policies are
+    given as ``cache_control``: a list of pairs of patterns and
+    ``Cache-Control`` values (or ``CachePolicy`` objects, which can also give
+    ``Expires`` headers). The first pattern matching the path of the document
+    gives its policy (see ``confeitaria.static.cache_control``). The documents
+    of the page itself, from ``resource_dir``, can have a separate policy,
+    given as ``resource_cache_control``::
+
+    >>> page = StaticPage(
+    ...     store=FakeStore({'static/app.js': 'a', 'a.html': 'b'}),
+    ...     cache_control=[
+    ...         ('/static/', 'public, max-age=86400'),
+    ...         ('*.html', 'no-cache')],
+    ...     resource_cache_control='public, max-age=3600')
+    >>> for path in ['/static/app.js', '/a.html', '/index.html']:
+    ...     dict(get_response(page, 'GET', path).headers)['Cache-Control']
+    'public, max-age=86400'
+    'no-cache'
+    'public, max-age=3600'
     """
 
-    def __init__(self, directory=None, store=None, resource_dir='content'):
+    def __init__(
+            self, directory=None, store=None, resource_dir='content',
+            cache=False, stream=False, chunk_size=DEFAULT_CHUNK_SIZE,
+            precompressed=True, compress=True, compress_min_size=1024,
+            compress_level=6, compress_cache_size=16 * 1024 * 1024,
+            watch=False, content_types=None, charset='utf-8', metrics=False,
+            metrics_path=None, trace_hooks=None, fingerprint=False,
+            cache_control=None, resource_cache_control=None, manifest=None):
+        if isinstance(metrics, Metrics):
+            self.metrics = metrics
+        elif metrics or metrics_path is not None:
+            self.metrics = Metrics()
+        else:
+            self.metrics = None
+
         if store is None and directory is not None:
-            primary = FileStore(directory=directory)
+            primary = self.meter(
+                FileStore(directory=directory, manifest=manifest))
         else:
-            primary = store
+            primary = self.meter(store)
 
-        secondary = ResourceStore(self.__module__, resource_dir)
+        if cache and primary is not None:
+            options = dict(cache) if isinstance(cache, dict) else {}
 
-        self.store = AggregateStore(primary, secondary)
+            if watch:
+                options.setdefault('validate', False)
+
+            primary = self.meter(CacheStore(primary, **options))
+
+        self.resources = self.meter(
+            ResourceStore(self.__module__, resource_dir, index=True))
+        self.store = self.meter(AggregateStore(primary, self.resources))
+        self.trace_hooks = tuple(trace_hooks or ())
+        self.fingerprints = FingerprintMap(self.store) if fingerprint else None
+        self.cache_policies = CachePolicyMap(cache_control or ())
+        self.resource_cache_policy = get_policy(resource_cache_control)
+        self.metrics_path = \
+            metrics_path.strip('/') if metrics_path is not None else None
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.precompressed = precompressed
+        self.precompressed_siblings = LRUCache(max_entries=16384)
+        self.compress = compress
+        self.compress_min_size = compress_min_size
+        self.compress_level = compress_level
+        self.compressed_cache = LRUCache(
+            max_size=compress_cache_size, sizeof=len)
+        self.content_types = ContentTypeMap(content_types, charset=charset)
+        self.local = threading.local()
+
+        if watch and directory is not None:
+            self.watcher = Watcher(directory, listeners=[self.invalidate])
+            self.watcher.start()
+        else:
+            self.watcher = None
 
     def index(self, *args):
+        if not self.trace_hooks and not is_tracing():
+            return self.respond()
+
+        with tracing(self.trace_hooks):
+            return call(
+                'request', self, self.get_request().args_path, self.respond)
+
+    def respond(self):
+        """
+        Serves the request, counting it in the metrics of the page, if any.
+        """
+        if self.metrics is None:
+            return self.serve()
+
+        if self.metrics_path is not None:
+            self.serve_metrics()
+
+        counters = self.metrics.get_counters('StaticPage', 'index')
+        start = time.time()
+
+        try:
+            return self.serve()
+        except Response as r:
+            counters.record(
+                get_response_outcome(r), time.time() - start,
+                get_content_length(r))
+            raise
+        except Exception:
+            counters.record(ERROR, time.time() - start)
+            raise
+
+    def serve(self):
         request = self.get_request()
         path = request.args_path
+        request_headers = getattr(request, 'headers', None)
+        headers = [('Accept-Ranges', 'bytes')]
+        cache_headers = None
+
+        if self.fingerprints is not None:
+            document_path = self.fingerprints.resolve(path)
+
+            if document_path is not None:
+                path = document_path
+                cache_headers = [('Cache-Control', IMMUTABLE_CACHE_CONTROL)]
 
         try:
-            content = self.store.read(path)
+            stat = get_stat(self.store, path)
         except ValueError:
             raise NotFound(message='"{0}" not found.'.format(path))
 
+        content_type = self.content_types.get(stat.path, stat.content_type)
+
+        if cache_headers is None:
+            cache_headers = self.get_cache_headers(path, stat)
+
+        headers.extend(cache_headers)
+        path, stat, compress = self.negotiate_encoding(
+            path, stat, request_headers, headers)
+
+        if stat.etag is not None:
+            headers.append(('ETag', stat.etag))
+
+        if stat.mtime is not None:
+            headers.append(('Last-Modified', format_http_date(stat.mtime)))
+
+        if not is_modified(stat, request_headers):
+            raise NotModified(headers=headers)
+
+        ranges = None if compress else get_ranges(stat, request_headers)
+        head = compress and getattr(request, 'method', None) == 'HEAD'
+        response = PartialContent
+
+        if ranges == []:
+            headers.append(
+                ('Content-Range', format_content_range(None, None, stat.size)))
+            raise RangeNotSatisfiable(headers=headers)
+
+        try:
+            if head:
+                content, length = '', self.get_compressed_length(stat)
+                response = OK
+            elif compress:
+                content = self.get_compressed_content(path, stat)
+                response = OK
+            elif ranges is None:
+                content = self.get_content(path)
+                response = OK
+            elif len(ranges) == 1:
+                start, end = ranges[0]
+                content = self.get_content(path, start, end - start + 1)
+                headers.append(
+                    ('Content-Range',
+                        format_content_range(start, end, stat.size)))
+            else:
+                boundary = uuid.uuid4().hex
+                content = self.get_multipart_content(
+                    path, ranges, stat.size, content_type, boundary)
+                content_type = 'multipart/byteranges; boundary={0}'.format(
+                    boundary)
+        except ValueError:
+            raise NotFound(message='"{0}" not found.'.format(path))
+
+        if not head:
+            length = content.length if self.stream else len(content)
+
+        headers.insert(0, ('Content-type', content_type))
+
+        if length is not None:
+            headers.append(('Content-Length', str(length)))
+
+        raise response(message=content, headers=headers)
+
+    def serve_metrics(self):
+        """
+        Responds with the metrics of the page, if the requested path is the
+        metrics path.
+        """
+        path = self.get_request().args_path.strip('/')
+
+        if path == self.metrics_path:
+            raise OK(
+                message=self.metrics.to_prometheus(),
+                headers=[('Content-type', PROMETHEUS_CONTENT_TYPE)])
+        elif path == self.metrics_path + '.json':
+            raise OK(
+                message=self.metrics.to_json(),
+                headers=[('Content-type', 'application/json')])
+
+    def meter(self, store):
+        """
+        Wraps the store in a ``MeteredStore``, if the page has metrics.
+        """
+        if self.metrics is None or store is None:
+            return store
+
+        return MeteredStore(store, self.metrics)
+
+    def get_cache_headers(self, path, stat):
+        """
+        Returns the caching headers of the document, as given by its policy.
+        """
+        policy = None
+
+        if self.resource_cache_policy is not None:
+            try:
+                if self.store.get_owner(path) is self.resources:
+                    policy = self.resource_cache_policy
+            except ValueError:
+                pass
+
+        if policy is None:
+            policy = self.cache_policies.get(stat.path)
+
+        return policy.get_headers() if policy is not None else []
+
+    def get_url(self, path):
+        """
+        Returns the fingerprinted path of the document at ``path``, if the
+        page serves fingerprinted paths, or the path itself otherwise. Raises
+        ``ValueError`` if the document is not found.
+        """
+        if self.fingerprints is None:
+            return path
+
+        return self.fingerprints.get_url(path)
+
+    def add_trace_hook(self, hook):
+        self.trace_hooks += (hook,)
+
+    def set_request(self, request):
+        self.local.request = request
+
+    def get_request(self):
+        return getattr(self.local, 'request', None)
+
+    def invalidate(self, path):
+        """
+        Forgets what the page and its store know about the file at ``path``,
+        relative to the directory of the page.
+        """
+        self.store.invalidate(path)
+
+        for encoding, extension in PRECOMPRESSED_EXTENSIONS:
+            if path.endswith(extension):
+                path = path[:-len(extension)]
+
+        for key in self.precompressed_siblings.keys():
+            if is_affected(key[0], path):
+                self.precompressed_siblings.pop(key)
+
+    def warm_up(
+            self, paths=None, log=None, prefix='/', limit=None,
+            max_size=None, jobs=DEFAULT_JOBS):
+        """
+        Reads the most requested documents through the store of the page, so
+        they are cached before being requested. The documents are given as a
+        list of ``paths`` and/or found in the ``log`` file, in the common log
+        format (see ``confeitaria.static.warmup.warm_up()`` for the other
+        arguments and the returned report)::
+
+        >>> from inelegant.fs import temp_dir, temp_file
+        >>> with temp_dir() as d, \\
+        ...         temp_file(where=d, name='index.html', content='example'):
+        ...     page = StaticPage(directory=d, cache=True)
+        ...     report = page.warm_up(paths=['/', '/', '/nofile'])
+        ...     page.store.primary.cache.size
+        7
+        >>> report['documents'], report['bytes'], report['failed']
+        (1, 7, 1)
+        """
+        paths = list(paths or [])
+
+        if log is not None:
+            paths.extend(read_log_file(log, prefix))
+
+        return warm_up(
+            self.store, paths, limit=limit, max_size=max_size, jobs=jobs)
+
+    @traced('negotiate')
+    def negotiate_encoding(self, path, stat, request_headers, headers):
+        """
+        Chooses which representation of the document to serve, given the
+        ``Accept-Encoding`` request header. Returns the path and stat of the
+        chosen representation, and whether it should be compressed on the
+        fly. The ``Vary`` and ``Content-Encoding`` headers are added to
+        ``headers`` as needed.
+        """
+        siblings = self.get_precompressed_siblings(stat)
+        compressible = self.is_compressible(stat)
+
+        if not siblings and not compressible:
+            return path, stat, False
+
+        headers.append(('Vary', 'Accept-Encoding'))
+        accept_encoding = get_header(request_headers, 'Accept-Encoding')
+
+        for encoding, sibling_path in siblings:
+            if accepts_encoding(accept_encoding, encoding):
+                try:
+                    sibling_stat = get_stat(self.store, sibling_path)
+                except ValueError:
+                    self.precompressed_siblings.pop((stat.path, stat.etag))
+                    break
+
+                headers.append(('Content-Encoding', encoding))
+
+                return sibling_path, sibling_stat, False
+
+        if compressible and accepts_encoding(accept_encoding, 'gzip'):
+            headers.append(('Content-Encoding', 'gzip'))
+            stat = Stat(
+                stat.path, size=stat.size, mtime=stat.mtime, inode=stat.inode,
+                etag=variant_etag(stat.etag, 'gzip'))
+
+            return path, stat, True
+
+        return path, stat, False
+
+    def is_compressible(self, stat):
+        """
+        Checks whether the document should be compressed on the fly for
+        clients that accept it.
+        """
+        return (
+            self.compress and stat.size >= self.compress_min_size and
+            is_compressible(
+                self.content_types.get(stat.path, stat.content_type))
+        )
+
+    @traced('compress')
+    def get_compressed_content(self, path, stat):
+        """
+        Returns the content of the document compressed in the gzip format: a
+        string or, in streaming mode, an iterable body. Compressed documents
+        are cached, so each version of a document is compressed only once.
+        Large documents in streaming mode, however, are compressed while
+        being sent, and not cached.
+        """
+        key = (stat.path, stat.etag)
+        content = self.compressed_cache.get(key)
+
+        if content is None:
+            if self.stream and stat.size > MAX_BUFFERED_COMPRESSION_SIZE:
+                body = get_body(self.store, path, chunk_size=self.chunk_size)
+
+                return GzipBody(body, level=self.compress_level)
+
+            content = gzip_content(
+                self.get_content(path, stream=False), self.compress_level)
+            self.compressed_cache[key] = content
+
+        if self.stream:
+            return ContentBody(content, chunk_size=self.chunk_size)
+
         return content
+
+    def get_compressed_length(self, stat):
+        """
+        Returns the length of the document compressed in the gzip format, if
+        it was already compressed, or ``None`` otherwise. It is used to answer
+        ``HEAD`` requests without compressing documents.
+        """
+        content = self.compressed_cache.get((stat.path, stat.etag))
+
+        return len(content) if content is not None else None
+
+    def get_precompressed_siblings(self, stat):
+        """
+        Returns a list of tuples with the content coding and the path of each
+        precompressed sibling of the document, such as ``app.js.gz`` for
+        ``app.js``. The siblings of each version of a document are only looked
+        for once.
+        """
+        if not self.precompressed:
+            return []
+
+        key = (stat.path, stat.etag)
+        siblings = self.precompressed_siblings.get(key)
+
+        if siblings is None:
+            siblings = []
+
+            for encoding, extension in PRECOMPRESSED_EXTENSIONS:
+                sibling_path = stat.path + extension
+
+                try:
+                    get_stat(self.store, sibling_path)
+                except ValueError:
+                    continue
+
+                siblings.append((encoding, sibling_path))
+
+            self.precompressed_siblings[key] = siblings
+
+        return siblings
+
+    @traced('content')
+    def get_content(self, path, offset=0, length=None, stream=None):
+        """
+        Returns the content of the document, or of a part of it: a string or,
+        in streaming mode, an iterable body.
+        """
+        stream = self.stream if stream is None else stream
+
+        if not stream and offset == 0 and length is None:
+            return self.store.read(path)
+
+        body = get_body(
+            self.store, path, chunk_size=self.chunk_size, offset=offset,
+            length=length)
+
+        return body if stream else join_body(body)
+
+    @traced('content')
+    def get_multipart_content(
+            self, path, ranges, size, content_type, boundary):
+        """
+        Returns a ``multipart/byteranges`` content with the given ranges of
+        the document: a string or, in streaming mode, an iterable body.
+        """
+        parts = [
+            (
+                {
+                    'Content-Type': content_type,
+                    'Content-Range': format_content_range(start, end, size)
+                },
+                end - start + 1,
+                functools.partial(
+                    get_body, self.store, path, chunk_size=self.chunk_size,
+                    offset=start, length=end - start + 1)
+            )
+            for start, end in ranges
+        ]
+        body = MultipartBody(parts, boundary=boundary)
+
+        return body if self.stream else join_body(body)
+
+
+def get_ranges(stat, headers):
+    """
+    Returns the byte ranges of the document to be sent, as requested by the
+    ``Range`` header::
+
+    >>> from confeitaria.static.store.stat import Stat
+    >>> stat = Stat('a.html', size=10, etag='"a"')
+    >>> get_ranges(stat, {'Range': 'bytes=0-4'})
+    [(0, 4)]
+
+    If the whole document should be sent, returns ``None``. This happens if
+    there is no valid ``Range`` header, or if the ``If-Range`` header does not
+    match the document::
+
+    >>> get_ranges(stat, {}) is None
+    True
+    >>> get_ranges(stat, {'Range': 'bytes=0-4', 'If-Range': '"b"'}) is None
+    True
+    """
+    ranges = parse_range(get_header(headers, 'Range'), stat.size)
+    if_range = get_header(headers, 'If-Range')
+
+    if ranges is None or not range_matches(stat, if_range):
+        return None
+
+    return ranges
+
+
+def join_body(body):
+    """
+    Reads all the chunks of an iterable body as bytes, closing it
+    afterwards::
+
+    >>> from confeitaria.static.store.body import ContentBody
+    >>> join_body(ContentBody(u'example', chunk_size=2)) == b'example'
+    True
+    """
+    try:
+        return b''.join(to_bytes(chunk) for chunk in body)
+    finally:
+        body.close()
+
+
+def is_modified(stat, headers):
+    """
+    Checks whether the document described by the stat should be sent, given the
+    conditional headers of the request. If there is an ``If-None-Match``
+    header, it is the only one considered::
+
+    >>> from confeitaria.static.store.stat import Stat
+    >>> stat = Stat('a.html', size=1, mtime=1420070400.0, etag='"a"')
+    >>> is_modified(stat, {'If-None-Match': '"a"'})
+    False
+    >>> is_modified(stat, {
+    ...     'If-None-Match': '"b"',
+    ...     'If-Modified-Since': 'Thu, 01 Jan 2015 00:00:00 GMT'})
+    True
+
+    Otherwise, the ``If-Modified-Since`` header is checked::
+
+    >>> is_modified(stat, {
+    ...     'If-Modified-Since': 'Thu, 01 Jan 2015 00:00:00 GMT'})
+    False
+    >>> is_modified(stat, {
+    ...     'If-Modified-Since': 'Wed, 31 Dec 2014 23:59:59 GMT'})
+    True
+    >>> is_modified(stat, {})
+    True
+    """
+    if_none_match = get_header(headers, 'If-None-Match')
+
+    if if_none_match is not None:
+        return not etag_matches(stat.etag, if_none_match)
+
+    if_modified_since = get_header(headers, 'If-Modified-Since')
+
+    if if_modified_since is not None:
+        return is_modified_since(stat.mtime, if_modified_since)
+
+    return True
+
+
+def get_response_outcome(response):
+    """
+    Returns whether a response means a hit, a miss or an error, for the
+    metrics of the page::
+
+    >>> get_response_outcome(NotModified())
+    'hit'
+    >>> get_response_outcome(NotFound())
+    'miss'
+    >>> get_response_outcome(RangeNotSatisfiable())
+    'error'
+    """
+    status = int(response.status_code.split()[0])
+
+    if status < 400:
+        return HIT
+    elif status == 404:
+        return MISS
+    else:
+        return ERROR
+
+
+def get_content_length(response):
+    """
+    Returns the ``Content-Length`` of a response, or zero if it has none::
+
+    >>> get_content_length(OK(headers=[('Content-Length', '7')]))
+    7
+    >>> get_content_length(NotModified())
+    0
+    """
+    length = get_header(dict(response.headers or []), 'Content-Length')
+
+    return int(length) if length is not None else 0
+
+
+PRECOMPRESSED_EXTENSIONS = [('br', '.br'), ('gzip', '.gz')]
+
+MAX_BUFFERED_COMPRESSION_SIZE = 1024 * 1024
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Responses, in the sense of ``confeitaria.responses``, that Confeitaria itself
+does not provide but are needed to serve static content.
+"""
+
+from confeitaria.responses import Response
+
+
+class NotModified(Response):
+    """
+    This response indicates the client already has the current version of the
+    requested document, so it is sent without content::
+
+        >>> r = NotModified(headers=[('ETag', '"abc"')])
+        >>> r.status_code
+        '304 Not Modified'
+        >>> r.headers
+        [('ETag', '"abc"')]
+    """
+
+    status_code = '304 Not Modified'
+
+    def __init__(self, headers=None, message='', *args):
+        Response.__init__(
+            self, NotModified.status_code, headers, message, *args)
+
+
+class PartialContent(Response):
+    """
+    This response sends only the requested ranges of a document::
+
+        >>> r = PartialContent(
+        ...     message='exa', headers=[('Content-Range', 'bytes 0-2/7')])
+        >>> r.status_code
+        '206 Partial Content'
+        >>> r.message
+        'exa'
+    """
+
+    status_code = '206 Partial Content'
+
+    def __init__(self, message='', headers=None, *args):
+        Response.__init__(
+            self, PartialContent.status_code, headers, message, *args)
+
+
+class RangeNotSatisfiable(Response):
+    """
+    This response indicates none of the requested ranges of a document could
+    be served::
+
+        >>> r = RangeNotSatisfiable(headers=[('Content-Range', 'bytes */7')])
+        >>> r.status_code
+        '416 Range Not Satisfiable'
+    """
+
+    status_code = '416 Range Not Satisfiable'
+
+    def __init__(self, headers=None, message='', *args):
+        Response.__init__(
+            self, RangeNotSatisfiable.status_code, headers, message, *args)
+
+
+class InternalServerError(Response):
+    """
+    This response indicates the server failed to serve the request because of
+    an unexpected error::
+
+        >>> r = InternalServerError()
+        >>> r.status_code
+        '500 Internal Server Error'
+    """
+
+    status_code = '500 Internal Server Error'
+
+    def __init__(self, headers=None, message='', *args):
+        Response.__init__(
+            self, InternalServerError.status_code, headers, message, *args)
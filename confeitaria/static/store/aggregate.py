@@ -17,13 +17,24 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
 
-import os
+import time
+import collections
+
+from confeitaria.static.store.aio import run_async, stream_async
+from confeitaria.static.store.batch import (
+    DEFAULT_JOBS, get_unique, read_many)
+from confeitaria.static.store.body import get_body, DEFAULT_CHUNK_SIZE
+from confeitaria.static.store.cache import LRUCache
+from confeitaria.static.store.error import NotFoundError
+from confeitaria.static.store.stat import get_stat
+from confeitaria.static.store.trace import call, traced
+from confeitaria.static.store.watch import is_affected
 
 
 class AggregateStore(object):
     """
-    ``AggregateStore`` just delegates the task of reading documents to two
-    other stores, a primary one and a secondary one. First, it requests the
+    ``AggregateStore`` just delegates the task of reading documents to other
+    stores, such as a primary one and a secondary one. First, it requests the
     content from the primary store; if this one cannot provide the content,
     aggregate store asks the secondary store for the document.
 
@@ -52,22 +63,234 @@ class AggregateStore(object):
     'SECOND TOO'
 
     Requesting a document that is not available in any of the two stores will
-    result in a ``ValueError`` exception::
+    result in a ``NotFoundError`` exception, which is a ``ValueError``::
 
     >>> store.read('nofile.html')
     Traceback (most recent call last):
       ...
-    ValueError: Failed to read nofile.html. Reason: 'nofile.html'
+    NotFoundError: Failed to read nofile.html. Reason: 'nofile.html'
+
+    An aggregate store can also have more than two stores. In this case, they
+    are tried in the given order::
+
+    >>> store3 = FakeStore({'test3.html': 'THIRD'})
+    >>> store = AggregateStore(store1, store2, store3)
+    >>> store.read('test3.html')
+    'THIRD'
+
+    Only ``NotFoundError`` makes the aggregate store try the next store. Any
+    other error, such as a permission failure, is raised right away.
+
+    The aggregate store also keeps a short-lived cache of owners: it
+    remembers, for ``index_ttl`` seconds, which store provided each document,
+    so the next requests for it go straight to that store, instead of failing
+    in the previous ones again. It is not an index of the documents each store
+    has: the owners are only learned by asking the stores, so the first
+    request for a document, and the first one after its owner expires, still
+    try the stores in order. If a previous store starts providing a document,
+    it is found once the aggregate store forgets the owner, or after
+    ``clear()``::
+
+    >>> store = AggregateStore(store1, store2, index_ttl=60)
+    >>> store.read('test2.html')
+    'SECOND TOO'
+    >>> store1.documents['test2.html'] = 'FIRST TOO'
+    >>> store.read('test2.html')
+    'SECOND TOO'
+    >>> store.clear()
+    >>> store.read('test2.html')
+    'FIRST TOO'
+
+    At most ``index_size`` documents are remembered; an ``index_size`` or an
+    ``index_ttl`` of zero disables it.
+
+    Many documents can be read at once by ``read_many()``. The whole batch is
+    given to the first store, and only the documents it does not have are
+    given to the next one, and so on::
+
+    >>> store = AggregateStore(store1, store2, store3)
+    >>> results = store.read_many(['test.html', 'test3.html', 'nofile.html'])
+    >>> results['test.html'], results['test3.html']
+    ('FIRST', 'THIRD')
+    >>> results['nofile.html']
+    NotFoundError("Failed to read nofile.html. Reason: 'nofile.html'",)
     """
 
-    def __init__(self, primary, secondary):
-        self.primary = primary
-        self.secondary = secondary
+    def __init__(self, *stores, **kwargs):
+        primary = kwargs.pop('primary', None)
+        secondary = kwargs.pop('secondary', None)
+        index_size = kwargs.pop('index_size', 16384)
+        index_ttl = kwargs.pop('index_ttl', 1.0)
+
+        if kwargs:
+            raise TypeError(
+                'Unexpected arguments: {0}'.format(', '.join(sorted(kwargs))))
+
+        stores = (primary, secondary) + stores
+
+        self.stores = [s for s in stores if s is not None]
+        self.owners = LRUCache(max_entries=index_size)
+        self.index_ttl = index_ttl
 
+    @traced('read')
     def read(self, path):
-        try:
-            content = self.primary.read(path)
-        except Exception as e:
-            content = self.secondary.read(path)
+        return self.delegate(path, lambda store: store.read(path))
+
+    @traced('stat')
+    def stat(self, path):
+        return self.delegate(path, lambda store: get_stat(store, path))
+
+    @traced('stream')
+    def stream(
+            self, path, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None):
+        return self.delegate(
+            path, lambda store: get_body(
+                store, path, chunk_size=chunk_size, offset=offset,
+                length=length))
+
+    def read_many(self, paths, jobs=DEFAULT_JOBS):
+        paths = get_unique(paths)
+        batches = [[] for store in self.stores]
+        results = {}
+        lost = []
+
+        if not self.stores:
+            return collections.OrderedDict(
+                (p, NotFoundError('{0} not found.'.format(p))) for p in paths)
+
+        owners = dict((path, self.get_owner_index(path)) for path in paths)
+
+        for path in paths:
+            batches[owners[path] or 0].append(path)
+
+        for i, store in enumerate(self.stores):
+            if not batches[i]:
+                continue
+
+            for path, result in read_many(store, batches[i], jobs).items():
+                if not isinstance(result, NotFoundError):
+                    self.set_owner_index(path, i)
+                    results[path] = result
+                elif owners[path] == i:
+                    self.owners.pop(path)
+                    lost.append(path)
+                elif i + 1 < len(self.stores):
+                    batches[i + 1].append(path)
+                else:
+                    results[path] = result
+
+        if lost:
+            results.update(self.read_many(lost, jobs))
+
+        return collections.OrderedDict((p, results[p]) for p in paths)
+
+    def read_async(self, path):
+        return run_async(self.read, path)
+
+    def stream_async(
+            self, path, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None):
+        return stream_async(
+            self, path, chunk_size=chunk_size, offset=offset, length=length)
+
+    def delegate(self, path, action):
+        """
+        Calls ``action`` with the store which provides ``path``, returning its
+        result. The store which owns the path, if known, is tried first;
+        otherwise, all stores are tried in order.
+        """
+        owner = self.get_owner_index(path)
+
+        if owner is not None:
+            try:
+                return call(
+                    'delegate', self.stores[owner], path, action,
+                    self.stores[owner])
+            except NotFoundError:
+                self.owners.pop(path)
+
+        error = NotFoundError('{0} not found.'.format(path))
+
+        for i, store in enumerate(self.stores):
+            if i == owner:
+                continue
+
+            try:
+                result = call('delegate', store, path, action, store)
+            except NotFoundError as e:
+                error = e
+                continue
+
+            self.set_owner_index(path, i)
+
+            return result
+
+        raise error
+
+    def get_owner_index(self, path):
+        """
+        Returns the index of the store known to provide ``path``, or ``None``
+        if it is unknown or was remembered more than ``index_ttl`` seconds
+        ago.
+        """
+        entry = self.owners.get(path)
+
+        if entry is None:
+            return None
+
+        index, expiration = entry
+
+        if expiration <= time.time():
+            self.owners.pop(path)
+            return None
+
+        return index
+
+    def set_owner_index(self, path, index):
+        if self.index_ttl > 0:
+            self.owners[path] = (index, time.time() + self.index_ttl)
+
+    def get_owner(self, path):
+        """
+        Returns the store which provides the document at ``path``::
+
+        >>> from confeitaria.static.store.fake import FakeStore
+        >>> store1 = FakeStore({'a.html': 'a'})
+        >>> store2 = FakeStore({'b.html': 'b'})
+        >>> AggregateStore(store1, store2).get_owner('b.html') is store2
+        True
+
+        Raises ``NotFoundError`` if no store provides it. If the owner of the
+        document is remembered, as right after reading or stating it, the
+        stores are not asked again.
+        """
+        index = self.get_owner_index(path)
+
+        if index is not None:
+            return self.stores[index]
+
+        return self.delegate(
+            path, lambda store: (get_stat(store, path), store))[1]
+
+    def invalidate(self, path):
+        """
+        Forgets the owners of the documents affected by a change at ``path``,
+        and lets the stores which can invalidate their own caches do so.
+        """
+        for key in self.owners.keys():
+            if is_affected(key, path):
+                self.owners.pop(key)
+
+        for store in self.stores:
+            if hasattr(store, 'invalidate'):
+                store.invalidate(path)
+
+    def clear(self):
+        self.owners.clear()
+
+    @property
+    def primary(self):
+        return self.stores[0] if self.stores else None
 
-        return content
+    @property
+    def secondary(self):
+        return self.stores[1] if len(self.stores) > 1 else None
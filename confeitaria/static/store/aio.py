@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Support for reading documents from stores in ``asyncio`` coroutines.
+
+Stores offer ``read_async()`` and ``stream_async()`` methods, which return
+awaitables instead of blocking, so the coroutine can do other things while
+the document is read::
+
+    content = await store.read_async('index.html')
+
+    body = await store.stream_async('video.mp4', chunk_size=64 * 1024)
+
+    try:
+        async for chunk in body:
+            ...
+    finally:
+        body.close()
+
+Blocking I/O is done by a bounded pool of threads, shared by all stores (see
+``get_executor()``). These methods are only available where ``asyncio`` is,
+i.e. in Python 3.
+"""
+
+import sys
+import threading
+import functools
+
+try:
+    import asyncio
+    import concurrent.futures
+except ImportError:
+    asyncio = None
+
+from confeitaria.static.store.body import get_body, DEFAULT_CHUNK_SIZE
+
+DEFAULT_MAX_WORKERS = 16
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Returns the pool of threads where stores do blocking I/O for coroutines.
+    It has at most ``DEFAULT_MAX_WORKERS`` threads, unless replaced by
+    ``set_executor()``.
+    """
+    global _executor
+
+    check_asyncio()
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=DEFAULT_MAX_WORKERS)
+
+        return _executor
+
+
+def set_executor(executor):
+    """
+    Replaces the pool of threads where stores do blocking I/O for coroutines.
+    """
+    global _executor
+
+    with _executor_lock:
+        _executor = executor
+
+
+def run_async(function, *args, **kwargs):
+    """
+    Calls ``function`` in the executor of the stores, returning an awaitable
+    for its result.
+    """
+    check_asyncio()
+
+    return asyncio.get_event_loop().run_in_executor(
+        get_executor(), functools.partial(function, *args, **kwargs))
+
+
+def done_async(function, *args, **kwargs):
+    """
+    Calls ``function`` right away, returning an awaitable for its result. It
+    is used by stores that do not block, such as those keeping documents in
+    memory.
+    """
+    check_asyncio()
+
+    future = asyncio.get_event_loop().create_future()
+
+    try:
+        future.set_result(function(*args, **kwargs))
+    except Exception as e:
+        future.set_exception(e)
+
+    return future
+
+
+def read_async(store, path):
+    """
+    Returns an awaitable for the content of a document from a store. If the
+    store has no ``read_async()`` method, its ``read()`` method is called in
+    the executor.
+    """
+    try:
+        method = store.read_async
+    except AttributeError:
+        return run_async(store.read, path)
+
+    return method(path)
+
+
+def stream_async(
+        store, path, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None,
+        run=None):
+    """
+    Returns an awaitable for an ``AsyncBody`` with the content of a document
+    from a store. The body is opened by calling ``run``, by default
+    ``run_async()``.
+    """
+    run = run if run is not None else run_async
+
+    return run(
+        lambda: AsyncBody(
+            get_body(
+                store, path, chunk_size=chunk_size, offset=offset,
+                length=length),
+            run=run))
+
+
+class AsyncBody(object):
+    """
+    ``AsyncBody`` wraps a body, as returned by the ``stream()`` methods of
+    stores, so it can be iterated with ``async for``. Each chunk is read by
+    calling ``run`` (by default, ``run_async()``), so reading a file does not
+    block the event loop.
+    """
+
+    def __init__(self, body, run=None):
+        self.body = body
+        self.length = getattr(body, 'length', None)
+        self.run = run if run is not None else run_async
+        self.iterator = None
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        if self.iterator is None:
+            self.iterator = iter(self.body)
+
+        return self.run(self.next_chunk)
+
+    def next_chunk(self):
+        try:
+            return next(self.iterator)
+        except StopIteration:
+            raise StopAsyncIteration()
+
+    def close(self):
+        self.body.close()
+
+
+def check_asyncio():
+    if asyncio is None:
+        raise RuntimeError(
+            'asyncio is not available in Python {0}.{1}'.format(
+                *sys.version_info[:2]))
@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import mmap
+import time
+import zlib
+import struct
+import zipfile
+import collections
+
+from confeitaria.static.store.aio import run_async, stream_async
+from confeitaria.static.store.body import ContentBody, DEFAULT_CHUNK_SIZE
+from confeitaria.static.store.error import NotFoundError
+from confeitaria.static.store.manifest import join_path, normalize_path
+from confeitaria.static.store.stat import Stat, file_etag
+from confeitaria.static.store.trace import traced
+
+LOCAL_HEADER = struct.Struct('<4sHHHHHIIIHH')
+LOCAL_HEADER_SIGNATURE = b'PK\003\004'
+
+SUPPORTED_COMPRESSIONS = (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+
+ArchiveEntry = collections.namedtuple(
+    'ArchiveEntry',
+    ['offset', 'size', 'compressed_size', 'compression', 'crc', 'mtime'])
+
+
+class ArchiveStore(object):
+    """
+    ``ArchiveStore`` serves the members of a zip file, so a site with many
+    files can be deployed as a single one. It receives the path of the zip
+    file and, optionally, the directory inside the zip file where the
+    documents are::
+
+    >>> import os, zipfile, contextlib
+    >>> from inelegant.fs import temp_dir
+    >>> with temp_dir() as d:
+    ...     archive = os.path.join(d, 'site.zip')
+    ...     with contextlib.closing(zipfile.ZipFile(archive, 'w')) as z:
+    ...         z.writestr('site/index.html', 'example')
+    ...         z.writestr('site/sub/index.html', 'sub example')
+    ...     store = ArchiveStore(archive, directory='site')
+    ...     store.read('index.html')
+    ...     store.read('/sub/')
+    ...     store.close()
+    'example'
+    'sub example'
+
+    The zip file is mapped in memory, and its central directory is read only
+    once, when the store is created, so requests do not open any file. Many
+    processes serving the same zip file share its pages in the page cache.
+
+    Members stored without compression can also be retrieved without copying
+    them, as read-only views of the mapped file, through the ``view()``
+    method. Compressed members are decompressed by both ``read()`` and
+    ``view()``. Streams of uncompressed members, as returned by ``stream()``,
+    are views of the mapped file as well, so their chunks are only copied if
+    the server needs them as bytes.
+
+    Documents missing from the zip file result in ``NotFoundError``. The
+    ``close()`` method unmaps the zip file; no views of it should be in use by
+    then.
+    """
+
+    def __init__(
+            self, archive, directory='', default_file_name='index.html'):
+        self.archive = archive
+        self.directory = normalize_path(directory)
+        self.default_file_name = default_file_name
+
+        with open(archive, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.directories, self.entries = read_index(self.map, self.directory)
+
+    @traced('read')
+    def read(self, path):
+        _, entry = self.get_entry(path)
+
+        if entry.compression == zipfile.ZIP_STORED:
+            return self.map[entry.offset:entry.offset + entry.size]
+
+        return self.decompress(entry)
+
+    @traced('view')
+    def view(self, path):
+        _, entry = self.get_entry(path)
+
+        if entry.compression == zipfile.ZIP_STORED:
+            return get_view(self.map, entry.offset, entry.size)
+
+        return memoryview(self.decompress(entry))
+
+    @traced('stream')
+    def stream(
+            self, path, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None):
+        _, entry = self.get_entry(path)
+
+        if entry.compression != zipfile.ZIP_STORED:
+            return ContentBody(
+                self.decompress(entry), chunk_size=chunk_size, offset=offset,
+                length=length)
+
+        return ContentBody(
+            get_view(self.map, entry.offset, entry.size),
+            chunk_size=chunk_size, offset=offset, length=length)
+
+    def read_async(self, path):
+        return run_async(self.read, path)
+
+    def stream_async(
+            self, path, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None):
+        return stream_async(
+            self, path, chunk_size=chunk_size, offset=offset, length=length)
+
+    @traced('stat')
+    def stat(self, path):
+        path, entry = self.get_entry(path)
+
+        return Stat(
+            path, size=entry.size, mtime=entry.mtime,
+            etag=file_etag(entry.crc, entry.size, entry.mtime))
+
+    def get_entry(self, path):
+        resolved_path = normalize_path(path)
+
+        if resolved_path in self.directories:
+            resolved_path = join_path(resolved_path, self.default_file_name)
+
+        entry = self.entries.get(resolved_path)
+
+        if entry is None:
+            raise NotFoundError(
+                '{0} not found in {1}'.format(path, self.archive))
+
+        return resolved_path, entry
+
+    def decompress(self, entry):
+        data = self.map[entry.offset:entry.offset + entry.compressed_size]
+
+        return zlib.decompressobj(-zlib.MAX_WBITS).decompress(data)
+
+    def close(self):
+        self.map.close()
+
+
+def read_index(data, directory=''):
+    """
+    Reads the central directory of the zip file in ``data`` (a string or a
+    mapped file), returning a set with the paths of the directories and a
+    dict mapping the paths of the members to ``ArchiveEntry`` tuples, with
+    the position of their content in the data. Only members inside
+    ``directory`` are returned, with paths relative to it::
+
+    >>> import io, zipfile
+    >>> f = io.BytesIO()
+    >>> with zipfile.ZipFile(f, 'w') as z:
+    ...     z.writestr('site/sub/a.html', 'example')
+    >>> directories, entries = read_index(f.getvalue(), 'site')
+    >>> sorted(directories)
+    ['', 'sub']
+    >>> entry = entries['sub/a.html']
+    >>> f.getvalue()[entry.offset:entry.offset + entry.size]
+    'example'
+
+    Members compressed by methods other than deflate are ignored.
+    """
+    prefix = directory + '/' if directory else ''
+    directories = set()
+    entries = {}
+
+    with zipfile.ZipFile(BufferFile(data)) as z:
+        infos = z.infolist()
+
+    for info in infos:
+        if not info.filename.startswith(prefix):
+            continue
+
+        path = info.filename[len(prefix):]
+        names = path.split('/')
+
+        for i in range(len(names)):
+            directories.add('/'.join(names[:i]))
+
+        if path.endswith('/') or info.compress_type not in \
+                SUPPORTED_COMPRESSIONS:
+            continue
+
+        header = LOCAL_HEADER.unpack_from(data, info.header_offset)
+
+        if header[0] != LOCAL_HEADER_SIGNATURE:
+            raise ValueError(
+                'Bad local header for {0}'.format(info.filename))
+
+        offset = info.header_offset + LOCAL_HEADER.size + header[9] + \
+            header[10]
+        entries[path] = ArchiveEntry(
+            offset, info.file_size, info.compress_size, info.compress_type,
+            info.CRC, time.mktime(info.date_time + (0, 0, -1)))
+
+    return directories, entries
+
+
+def get_view(data, offset, length):
+    """
+    Returns a read-only view of ``length`` bytes of ``data``, starting at
+    ``offset``, without copying them::
+
+    >>> get_view(b'example', 2, 3) == b'amp'
+    True
+
+    The view is a ``memoryview`` or, for objects which do not support it
+    (such as mapped files in Python 2), a ``buffer``.
+    """
+    try:
+        return memoryview(data)[offset:offset + length]
+    except TypeError:
+        return buffer(data, offset, length)
+
+
+class BufferFile(object):
+    """
+    ``BufferFile`` is a read-only file object over a string or a mapped
+    file, so ``zipfile`` can read the central directory of a mapped zip file
+    without copying it whole::
+
+    >>> f = BufferFile(b'example')
+    >>> f.seek(-3, 2)
+    >>> f.read(2), f.tell()
+    ('pl', 6)
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+
+    def read(self, size=-1):
+        end = len(self.data) if size is None or size < 0 else \
+            self.position + size
+        chunk = self.data[self.position:end]
+        self.position += len(chunk)
+
+        return chunk
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.position
+        elif whence == 2:
+            offset += len(self.data)
+
+        self.position = offset
+
+    def tell(self):
+        return self.position
+
+    def close(self):
+        pass
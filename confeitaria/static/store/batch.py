@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Support for reading many documents from stores at once.
+
+Stores offer a ``read_many()`` method, which receives a list of paths and
+returns an ordered dict mapping each path to its content or, if it could not
+be read, to the ``ValueError`` explaining why::
+
+    for path, content in store.read_many(['a.css', 'b.css']).items():
+        if is_error(content):
+            ...
+
+Stores backed by files read the documents in parallel, by a bounded number
+of threads (``jobs``).
+"""
+
+import collections
+import multiprocessing.pool
+
+DEFAULT_JOBS = 8
+
+
+def read_many(store, paths, jobs=DEFAULT_JOBS):
+    """
+    Reads many documents from a store. If the store has no ``read_many()``
+    method, the documents are read in parallel by its ``read()`` method::
+
+    >>> class ReadOnlyStore(object):
+    ...     def read(self, path):
+    ...         if path == 'nofile.html':
+    ...             raise ValueError(path)
+    ...         return path.upper()
+    >>> results = read_many(ReadOnlyStore(), ['a.html', 'nofile.html'])
+    >>> results['a.html']
+    'A.HTML'
+    >>> results['nofile.html']
+    ValueError('nofile.html',)
+    """
+    try:
+        method = store.read_many
+    except AttributeError:
+        return read_parallel(store.read, paths, jobs)
+
+    return method(paths, jobs=jobs)
+
+
+def read_parallel(read, paths, jobs=DEFAULT_JOBS):
+    """
+    Calls the ``read`` function with each of the paths, by at most ``jobs``
+    threads, and returns an ordered dict mapping the paths to the results.
+    Repeated paths are read only once, and ``ValueError`` exceptions are
+    returned instead of raised::
+
+    >>> read_parallel(len, ['a', 'bb', 'a', 'ccc'], jobs=2)
+    OrderedDict([('a', 1), ('bb', 2), ('ccc', 3)])
+
+    Other exceptions are raised right away.
+    """
+    paths = get_unique(paths)
+    jobs = min(jobs, len(paths))
+
+    if jobs <= 1:
+        results = [read_or_error(read, path) for path in paths]
+    else:
+        pool = multiprocessing.pool.ThreadPool(processes=jobs)
+
+        try:
+            results = pool.map(lambda path: read_or_error(read, path), paths)
+        finally:
+            pool.close()
+            pool.join()
+
+    return collections.OrderedDict(zip(paths, results))
+
+
+def read_or_error(read, path):
+    """
+    Returns the result of ``read(path)`` or, if it fails with ``ValueError``,
+    the exception::
+
+    >>> read_or_error(int, '1')
+    1
+    >>> read_or_error(int, 'a')
+    ValueError("invalid literal for int() with base 10: 'a'",)
+    """
+    try:
+        return read(path)
+    except ValueError as e:
+        return e
+
+
+def is_error(result):
+    """
+    Checks whether a result from ``read_many()`` is an error::
+
+    >>> is_error(b'content'), is_error(ValueError('nofile.html'))
+    (False, True)
+    """
+    return isinstance(result, Exception)
+
+
+def get_unique(paths):
+    """
+    Returns the paths without repetitions, in the order they first appear::
+
+    >>> get_unique(['b', 'a', 'b', 'c', 'a'])
+    ['b', 'a', 'c']
+    """
+    seen = set()
+
+    return [p for p in paths if not (p in seen or seen.add(p))]
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class FileBody(object):
+    """
+    ``FileBody`` is an iterable that yields the content of an open file in
+    chunks, so the file does not need to be fully loaded in memory to be
+    served::
+
+    >>> import io
+    >>> body = FileBody(io.BytesIO(b'example'), length=7, chunk_size=3)
+    >>> list(body)
+    ['exa', 'mpl', 'e']
+
+    It will not yield more than ``length`` bytes, even if the file grows::
+
+    >>> body = FileBody(io.BytesIO(b'example'), length=4, chunk_size=3)
+    >>> list(body)
+    ['exa', 'm']
+
+    Once served, the body should be closed, what closes the file::
+
+    >>> body.close()
+    >>> body.file.closed
+    True
+
+    Servers need not iterate over the body, though: it tells which part of
+    the file it holds, so the content can go from the file to the client
+    without passing through Python. The WSGI application gives whole files to
+    the ``wsgi.file_wrapper`` of the server, and the ``asyncio`` server sends
+    bodies with ``loop.sendfile()``. In both cases, ``offset`` should be the
+    position of the file where the body starts::
+
+    >>> body = FileBody(io.BytesIO(b'example'), length=5, offset=2, size=7)
+    >>> body.offset, body.length, body.is_whole_file()
+    (2, 5, True)
+    """
+
+    def __init__(
+            self, file, length, chunk_size=DEFAULT_CHUNK_SIZE, offset=0,
+            size=None):
+        self.file = file
+        self.length = length
+        self.chunk_size = chunk_size
+        self.offset = offset
+        self.size = size
+
+    def __iter__(self):
+        remaining = self.length
+
+        while remaining > 0:
+            chunk = self.file.read(min(self.chunk_size, remaining))
+
+            if not chunk:
+                break
+
+            remaining -= len(chunk)
+
+            yield chunk
+
+    def is_whole_file(self):
+        """
+        Checks whether the body goes up to the end of the file, so it can be
+        sent by reading the file until its end.
+        """
+        return (
+            self.size is not None and self.offset + self.length == self.size)
+
+    def close(self):
+        self.file.close()
+
+
+class ContentBody(object):
+    """
+    ``ContentBody`` is an iterable that yields, in chunks, content already
+    loaded in memory. It is how stores that cannot read documents partially
+    provide streams::
+
+    >>> body = ContentBody('example', chunk_size=3)
+    >>> body.length
+    7
+    >>> list(body)
+    ['exa', 'mpl', 'e']
+
+    It can also yield only a part of the content, starting at ``offset``::
+
+    >>> body = ContentBody('example', chunk_size=3, offset=2, length=4)
+    >>> body.length
+    4
+    >>> list(body)
+    ['amp', 'l']
+    """
+
+    def __init__(
+            self, content, chunk_size=DEFAULT_CHUNK_SIZE, offset=0,
+            length=None):
+        self.content = content
+        self.offset = offset
+        self.length = get_length(len(content), offset, length)
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        end = self.offset + self.length
+
+        for i in range(self.offset, end, self.chunk_size):
+            yield self.content[i:min(i + self.chunk_size, end)]
+
+    def close(self):
+        pass
+
+
+class MultipartBody(object):
+    """
+    ``MultipartBody`` is an iterable that yields many bodies as the parts of a
+    multipart content, as used to send many byte ranges in one response. It
+    receives a list of parts, each one a tuple with the headers of the part,
+    the length of the part and a function that returns the body of the part,
+    so that the bodies are only opened when needed::
+
+    >>> body = MultipartBody([
+    ...     ({'Content-Range': 'bytes 0-1/7'}, 2, lambda: ContentBody('ex')),
+    ...     ({'Content-Range': 'bytes 5-6/7'}, 2, lambda: ContentBody('le'))
+    ... ], boundary='BOUNDARY')
+    >>> print(b''.join(body).decode('ascii').replace('\\r\\n', '\\n'))
+    --BOUNDARY
+    Content-Range: bytes 0-1/7
+    <BLANKLINE>
+    ex
+    --BOUNDARY
+    Content-Range: bytes 5-6/7
+    <BLANKLINE>
+    le
+    --BOUNDARY--
+    <BLANKLINE>
+
+    The parts are yielded as bytes, even if the bodies yield text. The length
+    is computed from the parts, so it can be sent as the ``Content-Length``
+    header::
+
+    >>> body.length
+    106
+    """
+
+    def __init__(self, parts, boundary):
+        self.boundary = boundary
+        self.parts = [
+            (self.get_part_head(headers), length, get_part_body)
+            for headers, length, get_part_body in parts
+        ]
+        self.tail = to_bytes('--{0}--\r\n'.format(boundary))
+        self.length = len(self.tail) + sum(
+            len(head) + length + 2 for head, length, _ in self.parts)
+
+    def __iter__(self):
+        for head, _, get_part_body in self.parts:
+            yield head
+
+            body = get_part_body()
+
+            try:
+                for chunk in body:
+                    yield to_bytes(chunk)
+            finally:
+                body.close()
+
+            yield b'\r\n'
+
+        yield self.tail
+
+    def close(self):
+        pass
+
+    def get_part_head(self, headers):
+        lines = ['--' + self.boundary] + [
+            '{0}: {1}'.format(name, value)
+            for name, value in sorted(headers.items())
+        ]
+
+        return to_bytes('\r\n'.join(lines) + '\r\n\r\n')
+
+
+def get_body(
+        store, path, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None):
+    """
+    Returns an iterable body with the content of a document from a store. If
+    the store has no ``stream()`` method, the document is read whole and
+    wrapped in a ``ContentBody``::
+
+    >>> class ReadOnlyStore(object):
+    ...     def read(self, path):
+    ...         return 'example'
+    >>> list(get_body(ReadOnlyStore(), 'test.html', chunk_size=4))
+    ['exam', 'ple']
+    >>> list(get_body(ReadOnlyStore(), 'test.html', offset=2, length=3))
+    ['amp']
+    """
+    try:
+        stream = store.stream
+    except AttributeError:
+        return ContentBody(
+            store.read(path), chunk_size=chunk_size, offset=offset,
+            length=length)
+
+    return stream(path, chunk_size=chunk_size, offset=offset, length=length)
+
+
+def get_length(size, offset, length):
+    """
+    Returns how many bytes can be read from a content of the given size,
+    starting at the given offset. If ``length`` is given, it is the maximum
+    value::
+
+    >>> get_length(10, 0, None), get_length(10, 3, None), get_length(10, 3, 4)
+    (10, 7, 4)
+    >>> get_length(10, 8, 4), get_length(10, 12, None)
+    (2, 0)
+    """
+    available = max(size - offset, 0)
+
+    return available if length is None else min(length, available)
+
+
+def to_bytes(content):
+    """
+    Returns the content as bytes, encoding it as UTF-8 if it is text::
+
+    >>> to_bytes(u'example') == b'example'
+    True
+    >>> to_bytes(b'\\xff') == b'\\xff'
+    True
+    >>> to_bytes(memoryview(b'example')) == b'example'
+    True
+    """
+    if isinstance(content, type(u'')):
+        return content.encode('utf-8')
+    elif isinstance(content, memoryview):
+        return content.tobytes()
+
+    return bytes(content)
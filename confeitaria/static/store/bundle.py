@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import zlib
+
+from confeitaria.static.store.archive import ArchiveStore
+from confeitaria.static.store.stat import Stat, file_etag
+from confeitaria.static.store.trace import traced
+
+BUNDLE_INDEX = '.bundle-index'
+BUNDLE_INDEX_VERSION = 2
+
+
+class BundleStore(ArchiveStore):
+    """
+    ``BundleStore`` serves a bundle built by ``confeitaria.static.bundle``: a
+    zip file whose documents come with precomputed entity tags and media
+    types, and with gzipped siblings (such as ``app.js.gz``) of compressible
+    documents::
+
+    >>> import os
+    >>> from inelegant.fs import temp_dir, temp_file
+    >>> from confeitaria.static.bundle import build_bundle
+    >>> with temp_dir() as d, \\
+    ...         temp_file(where=d, name='index.html', content='example'):
+    ...     archive = os.path.join(d, 'site.zip')
+    ...     _ = build_bundle(d, archive)
+    ...     store = BundleStore(archive)
+    ...     store.read('')
+    ...     stat = store.stat('')
+    ...     store.close()
+    'example'
+    >>> stat.etag, stat.content_type
+    ('"c3499c2729730a7f807efb8676a92dcb6f8a3f8f"', 'text/html')
+
+    The index of the bundle is loaded once, so getting the stat of a document
+    is a dict lookup. Zip files without an index are not accepted::
+
+    >>> import zipfile, contextlib
+    >>> with temp_dir() as d:
+    ...     archive = os.path.join(d, 'site.zip')
+    ...     with contextlib.closing(zipfile.ZipFile(archive, 'w')) as z:
+    ...         z.writestr('index.html', 'example')
+    ...     BundleStore(archive)   # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+      ...
+    ValueError: ... is not a bundle
+    """
+
+    def __init__(self, archive, default_file_name='index.html'):
+        ArchiveStore.__init__(
+            self, archive, default_file_name=default_file_name)
+
+        if BUNDLE_INDEX not in self.entries:
+            self.close()
+            raise ValueError('{0} is not a bundle'.format(archive))
+
+        self.index = loads_index(self.read(BUNDLE_INDEX))
+        del self.entries[BUNDLE_INDEX]
+
+    @traced('stat')
+    def stat(self, path):
+        path, entry = self.get_entry(path)
+        digest, content_type = self.index.get(path, (None, None))
+
+        if digest is not None:
+            etag = '"{0}"'.format(digest)
+        else:
+            etag = file_etag(entry.crc, entry.size, entry.mtime)
+
+        return Stat(
+            path, size=entry.size, mtime=entry.mtime, etag=etag,
+            content_type=content_type)
+
+
+def dumps_index(index):
+    """
+    Serializes the index of a bundle, a dict mapping the paths of the
+    documents to tuples with their SHA-1 digests and media types::
+
+    >>> index = {'a.html': ('c3499c27', 'text/html')}
+    >>> loads_index(dumps_index(index)) == index
+    True
+
+    The index is serialized as compressed JSON, so bundles can be read by any
+    Python version, whichever built them.
+    """
+    data = json.dumps(
+        {'version': BUNDLE_INDEX_VERSION, 'index': index}, sort_keys=True)
+
+    return zlib.compress(data.encode('utf-8'))
+
+
+def loads_index(data):
+    """
+    Deserializes the index of a bundle, as serialized by ``dumps_index()``.
+    Indexes of other versions are not accepted::
+
+    >>> loads_index(zlib.compress(b'{"version": 1, "index": {}}'))
+    Traceback (most recent call last):
+      ...
+    ValueError: Unsupported bundle index version: 1
+    """
+    try:
+        data = json.loads(zlib.decompress(data).decode('utf-8'))
+        version, index = data['version'], data['index']
+    except (zlib.error, ValueError, KeyError, TypeError):
+        raise ValueError('Invalid bundle index')
+
+    if version != BUNDLE_INDEX_VERSION:
+        raise ValueError(
+            'Unsupported bundle index version: {0}'.format(version))
+
+    return dict(
+        (to_str(path), (to_str(digest), to_str(content_type)))
+        for path, (digest, content_type) in index.items())
+
+
+def to_str(value):
+    """
+    Converts text read from JSON to the native string type, encoding it as
+    UTF-8 in Python 2, as zip member names are there::
+
+    >>> to_str(u'a.html')
+    'a.html'
+    >>> to_str(None) is None
+    True
+    """
+    if value is None or isinstance(value, str):
+        return value
+
+    return value.encode('utf-8')
@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import threading
+
+from confeitaria.static.store.body import (
+    ContentBody, get_body, DEFAULT_CHUNK_SIZE)
+from confeitaria.static.store.stat import get_stat
+from confeitaria.static.store.trace import traced
+from confeitaria.static.store.watch import is_affected
+
+
+class CacheStore(object):
+    """
+    ``CacheStore`` keeps in memory the content read from another store, so
+    documents requested often are not read again and again::
+
+    >>> class ReadOnlyStore(object):
+    ...     def __init__(self, documents):
+    ...         self.documents = documents
+    ...     def read(self, path):
+    ...         return self.documents[path]
+    >>> documents = {'test.html': 'example'}
+    >>> store = CacheStore(ReadOnlyStore(documents))
+    >>> store.read('test.html')
+    'example'
+
+    Once read, the document will come from the cache, even if the underlying
+    store cannot tell it has changed::
+
+    >>> documents['test.html'] = 'changed'
+    >>> store.read('test.html')
+    'example'
+
+    If the underlying store has a ``stat()`` method, however, the cache checks
+    the size, modification time and entity tag of the document before serving
+    it, so edited documents are read again. This is the case of
+    ``FileStore``::
+
+    >>> import os
+    >>> from inelegant.fs import temp_dir, temp_file
+    >>> from confeitaria.static.store.file import FileStore
+    >>> with temp_dir() as d, \\
+    ...         temp_file(where=d, name='test.html', content='example') as f:
+    ...     store = CacheStore(FileStore(d))
+    ...     store.read('test.html')
+    ...     with open(f, 'w') as fd:
+    ...         fd.write('changed content')
+    ...     store.read('test.html')
+    'example'
+    'changed content'
+
+    The cache is bounded both by the total size of its documents (``max_size``,
+    in bytes) and by the number of documents it holds (``max_entries``). When
+    any of these limits is exceeded, the least recently used documents are
+    evicted::
+
+    >>> from confeitaria.static.store.fake import FakeStore
+    >>> documents = {'a.html': 'aaaa', 'b.html': 'bbbb', 'c.html': 'cccc'}
+    >>> store = CacheStore(FakeStore(documents), max_size=8)
+    >>> store.read('a.html'), store.read('b.html'), store.read('a.html')
+    ('aaaa', 'bbbb', 'aaaa')
+    >>> store.read('c.html')
+    'cccc'
+    >>> sorted(store.cache.keys())
+    ['a.html', 'c.html']
+
+    Documents larger than ``max_size`` are served but never cached.
+
+    Streams (as returned by ``stream()``) of cached documents come from the
+    cache as well. Streams of documents not in the cache come from the
+    underlying store and are not cached, since they are expected to be large.
+
+    A ``CacheStore`` can be shared by many threads.
+
+    If something else tells the cache when documents change, such as a
+    ``confeitaria.static.store.watch.Watcher`` calling ``invalidate()``, the
+    check can be avoided by setting ``validate`` to false. Then, the stats of
+    the documents are cached as well, and served documents are not checked
+    at all::
+
+    >>> with temp_dir() as d, \\
+    ...         temp_file(where=d, name='test.html', content='example') as f:
+    ...     store = CacheStore(FileStore(d), validate=False)
+    ...     store.read('test.html')
+    ...     with open(f, 'w') as fd:
+    ...         fd.write('changed content')
+    ...     store.read('test.html')
+    ...     store.invalidate('test.html')
+    ...     store.read('test.html')
+    'example'
+    'example'
+    'changed content'
+    """
+
+    def __init__(
+            self, store, max_size=64 * 1024 * 1024, max_entries=4096,
+            validate=True):
+        self.store = store
+        self.validate = validate
+        self.cache = LRUCache(
+            max_size=max_size, max_entries=max_entries, sizeof=len_content)
+        self.stats = LRUCache(max_entries=max_entries)
+
+    @traced('read')
+    def read(self, path):
+        validator = self.get_validator(path)
+        content = self.get_cached(path, validator)
+
+        if content is None:
+            content = self.store.read(path)
+            self.cache[path] = (validator, content)
+
+        return content
+
+    @traced('stream')
+    def stream(
+            self, path, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None):
+        content = self.get_cached(path, self.get_validator(path))
+
+        if content is None:
+            return get_body(
+                self.store, path, chunk_size=chunk_size, offset=offset,
+                length=length)
+
+        return ContentBody(
+            content, chunk_size=chunk_size, offset=offset, length=length)
+
+    def get_validator(self, path):
+        stat = self.stat(path) if hasattr(self.store, 'stat') else None
+
+        return stat.validator if stat is not None else None
+
+    def get_cached(self, path, validator):
+        try:
+            cached_validator, content = self.cache[path]
+        except KeyError:
+            return None
+
+        return content if cached_validator == validator else None
+
+    @traced('stat')
+    def stat(self, path):
+        if self.validate:
+            return get_stat(self.store, path)
+
+        stat = self.stats.get(path)
+
+        if stat is None:
+            stat = get_stat(self.store, path)
+            self.stats[path] = stat
+
+        return stat
+
+    def invalidate(self, path):
+        """
+        Drops the cached documents affected by a change at ``path``, and lets
+        the underlying store invalidate its own caches.
+        """
+        for cache in (self.cache, self.stats):
+            for key in cache.keys():
+                if is_affected(key, path):
+                    cache.pop(key)
+
+        if hasattr(self.store, 'invalidate'):
+            self.store.invalidate(path)
+
+    def clear(self):
+        self.cache.clear()
+        self.stats.clear()
+
+
+class LRUCache(object):
+    """
+    ``LRUCache`` is a thread-safe mapping which forgets its least recently used
+    items when it grows too much. It can be bounded by the number of items...
+
+    ::
+
+    >>> cache = LRUCache(max_entries=2)
+    >>> cache['a'] = 1
+    >>> cache['b'] = 2
+    >>> cache['a']
+    1
+    >>> cache['c'] = 3
+    >>> sorted(cache.keys())
+    ['a', 'c']
+
+    ...and by the total size of its values, as computed by the ``sizeof``
+    function::
+
+    >>> cache = LRUCache(max_size=5, sizeof=len)
+    >>> cache['a'] = 'abc'
+    >>> cache['b'] = 'de'
+    >>> cache['c'] = 'f'
+    >>> sorted(cache.keys())
+    ['b', 'c']
+    >>> cache.size
+    3
+
+    Values bigger than the maximum size are not stored at all::
+
+    >>> cache['d'] = 'too long'
+    >>> 'd' in cache
+    False
+    """
+
+    def __init__(self, max_size=None, max_entries=None, sizeof=None):
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.sizeof = sizeof if sizeof is not None else (lambda value: 0)
+        self.size = 0
+
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            value, size = self._items.pop(key)
+            self._items[key] = (value, size)
+
+        return value
+
+    def __setitem__(self, key, value):
+        size = self.sizeof(value)
+
+        with self._lock:
+            self._remove(key)
+
+            if self.max_size is not None and size > self.max_size:
+                return
+
+            self._items[key] = (value, size)
+            self.size += size
+
+            while self._is_full():
+                self._remove(next(iter(self._items)))
+
+    def __delitem__(self, key):
+        with self._lock:
+            if key not in self._items:
+                raise KeyError(key)
+
+            self._remove(key)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+
+            value, _ = self._items[key]
+            self._remove(key)
+
+        return value
+
+    def keys(self):
+        with self._lock:
+            return list(self._items.keys())
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        try:
+            _, size = self._items.pop(key)
+            self.size -= size
+        except KeyError:
+            pass
+
+    def _is_full(self):
+        return (
+            (self.max_size is not None and self.size > self.max_size) or
+            (self.max_entries is not None and
+                len(self._items) > self.max_entries)
+        )
+
+
+def len_content(entry):
+    """
+    Returns the size of the content of a ``CacheStore`` entry, which is a tuple
+    with a validator and the content::
+
+    >>> len_content((None, 'example'))
+    7
+    """
+    _, content = entry
+
+    return len(content)
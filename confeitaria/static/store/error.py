@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+
+class NotFoundError(ValueError):
+    """
+    ``NotFoundError`` is raised by stores when the requested document does not
+    exist. It is a ``ValueError``, so code that expects stores to raise
+    ``ValueError`` on failures still works::
+
+    >>> from confeitaria.static.store.fake import FakeStore
+    >>> store = FakeStore({})
+    >>> try:
+    ...     store.read('nofile.html')
+    ... except ValueError as e:
+    ...     isinstance(e, NotFoundError)
+    True
+
+    Other failures, such as lacking permission to read a file, are still
+    reported as plain ``ValueError``. This way, stores that try other stores
+    when a document is not found, such as
+    ``confeitaria.static.store.aggregate.AggregateStore``, do not hide real
+    errors.
+    """
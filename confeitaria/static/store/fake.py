@@ -19,6 +19,13 @@
 
 import os
 
+from confeitaria.static.store.aio import done_async, stream_async
+from confeitaria.static.store.batch import read_parallel
+from confeitaria.static.store.body import ContentBody, DEFAULT_CHUNK_SIZE
+from confeitaria.static.store.error import NotFoundError
+from confeitaria.static.store.stat import Stat, content_etag
+from confeitaria.static.store.trace import traced
+
 
 class FakeStore(object):
     """
@@ -37,19 +44,58 @@ class FakeStore(object):
     'my content'
 
     If we request a content that does not exist, ``read()`` raises
-    ``ValueError``::
+    ``NotFoundError``, a ``ValueError``::
 
     >>> store.read('nofile.html')
     Traceback (most recent call last):
       ...
-    ValueError: Failed to read nofile.html. Reason: 'nofile.html'
+    NotFoundError: Failed to read nofile.html. Reason: 'nofile.html'
+
+    The ``stat()`` method returns the size of the document and an entity tag
+    computed from its content::
+
+    >>> s = store.stat('test.html')
+    >>> s.size
+    10
+    >>> s.etag
+    '"c6953b28c09e7b6ec0ed48295ac9737506b8b92d"'
     """
 
     def __init__(self, documents, default_file_name='index.html'):
         self.documents = documents
         self.default_file_name = default_file_name
 
+    @traced('read')
     def read(self, path):
+        return self.documents[self.get_path(path)]
+
+    @traced('stream')
+    def stream(
+            self, path, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None):
+        return ContentBody(
+            self.read(path), chunk_size=chunk_size, offset=offset,
+            length=length)
+
+    def read_many(self, paths, jobs=None):
+        return read_parallel(self.read, paths, jobs=1)
+
+    def read_async(self, path):
+        return done_async(self.read, path)
+
+    def stream_async(
+            self, path, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None):
+        return stream_async(
+            self, path, chunk_size=chunk_size, offset=offset, length=length,
+            run=done_async)
+
+    @traced('stat')
+    def stat(self, path):
+        path = self.get_path(path)
+        content = self.documents[path]
+
+        return Stat(path, size=len(content), etag=content_etag(content))
+
+    def get_path(self, path):
         default_path = os.path.join(path, self.default_file_name)
 
         if path not in self.documents and default_path in self.documents:
@@ -57,10 +103,8 @@ class FakeStore(object):
 
         path = path.lstrip('/')
 
-        try:
-            content = self.documents[path]
-        except Exception as e:
-            raise ValueError(
-                'Failed to read {0}. Reason: {1}'.format(path, e))
+        if path not in self.documents:
+            raise NotFoundError(
+                'Failed to read {0}. Reason: {1!r}'.format(path, path))
 
-        return content
+        return path
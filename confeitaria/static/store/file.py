@@ -17,7 +17,21 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
 
+import errno
 import os
+import time
+
+from confeitaria.static.store.aio import run_async, stream_async
+from confeitaria.static.store.batch import DEFAULT_JOBS, read_parallel
+from confeitaria.static.store.body import (
+    FileBody, get_length, DEFAULT_CHUNK_SIZE)
+from confeitaria.static.store.cache import LRUCache
+from confeitaria.static.store.error import NotFoundError
+from confeitaria.static.store.stat import Stat, file_etag
+from confeitaria.static.store.trace import traced
+from confeitaria.static.store.watch import is_affected
+
+MISSING_ERRNOS = (errno.ENOENT, errno.ENOTDIR, errno.EISDIR)
 
 
 class FileStore(object):
@@ -47,37 +61,369 @@ class FileStore(object):
     ...     store.read('')
     'default'
 
-    If no file exists, the ``read()`` method raises ``ValueError``::
+    If no file exists, the ``read()`` method raises ``NotFoundError``, a
+    ``ValueError``::
 
     >>> with temp_dir() as d:
     ...     store = FileStore(directory=d)
     ...     store.read('nofile.html')   # doctest: +ELLIPSIS
     Traceback (most recent call last):
       ...
-    ValueError: ...
+    NotFoundError: ...
+
+    One can also retrieve metadata about a file, such as its size and
+    modification time, without reading it, through the ``stat()`` method::
+
+    >>> with temp_dir() as d, \\
+    ...         temp_file(where=d, name='test.html', content='example'):
+    ...     store = FileStore(directory=d)
+    ...     store.stat('test.html').size
+    7
+
+    Large files can be read in chunks, through the ``stream()`` method. It
+    returns an iterable that yields the content of the file, only reading the
+    next chunk when needed::
+
+    >>> with temp_dir() as d, \\
+    ...         temp_file(where=d, name='test.html', content='example'):
+    ...     store = FileStore(directory=d)
+    ...     body = store.stream('test.html', chunk_size=4)
+    ...     list(body)
+    ...     body.close()
+    ['exam', 'ple']
+
+    Streams can also start at an offset and have a maximum length. In this
+    case, only the requested bytes are read from the file::
+
+    >>> with temp_dir() as d, \\
+    ...         temp_file(where=d, name='test.html', content='example'):
+    ...     store = FileStore(directory=d)
+    ...     body = store.stream('test.html', offset=2, length=3)
+    ...     list(body)
+    ...     body.close()
+    ['amp']
+
+    Resolving a request path to a file path touches the file system a few
+    times, so the store remembers, for ``resolve_ttl`` seconds, the real paths
+    of the last files it found inside its directory. Until then, requests for
+    these paths open the remembered real files, without resolving anything;
+    so, a symbolic link replaced by one pointing outside the directory is not
+    followed, and the change is seen once the path expires or is invalidated
+    (see ``invalidate()``). The store also remembers, for ``negative_ttl``
+    seconds, the paths that were not found, so repeated requests for missing
+    documents fail without touching the disk at all::
+
+    >>> with temp_dir() as d:
+    ...     store = FileStore(directory=d, negative_ttl=60)
+    ...     try:
+    ...         store.read('later.html')
+    ...     except ValueError:
+    ...         pass
+    ...     with temp_file(where=d, name='later.html', content='late'):
+    ...         store.read('later.html')   # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+      ...
+    NotFoundError: ...
+
+    Once the time has passed, or after the caches are cleared, the file is
+    found::
+
+    >>> with temp_dir() as d:
+    ...     store = FileStore(directory=d, negative_ttl=60)
+    ...     try:
+    ...         store.read('later.html')
+    ...     except ValueError:
+    ...         pass
+    ...     with temp_file(where=d, name='later.html', content='late'):
+    ...         store.clear()
+    ...         store.read('later.html')
+    'late'
+
+    A ``negative_ttl`` of zero disables the cache of missing paths, and a
+    ``resolve_ttl`` or a ``resolve_cache_size`` of zero disables the cache of
+    resolved paths.
+
+    For large directories, the store can be given a
+    ``confeitaria.static.store.manifest.Manifest`` of the directory. Then,
+    paths are resolved by the manifest alone, and the entity tag and media
+    type of unchanged files come from it::
+
+    >>> from confeitaria.static.store.manifest import Manifest
+    >>> with temp_dir() as d, \\
+    ...         temp_file(where=d, name='test.html', content='example'):
+    ...     store = FileStore(directory=d, manifest=Manifest(d).update())
+    ...     store.read('test.html')
+    ...     store.stat('test.html').etag
+    'example'
+    '"c3499c2729730a7f807efb8676a92dcb6f8a3f8f"'
+
+    Files missing from the manifest are not found, even if they exist, until
+    the manifest is updated.
+
+    The manifest can also be given as the name of a file, where it is kept
+    between runs. The store then loads the manifest when created, updates it
+    incrementally (see ``confeitaria.static.store.manifest.get_manifest()``)
+    and saves it back, so only the directories changed since the last run are
+    listed again::
+
+    >>> with temp_dir() as d, temp_dir() as m, \\
+    ...         temp_file(where=d, name='test.html', content='example'):
+    ...     filename = os.path.join(m, 'manifest')
+    ...     store = FileStore(directory=d, manifest=filename)
+    ...     store.read('test.html')
+    ...     sorted(FileStore(directory=d, manifest=filename).manifest.files)
+    'example'
+    ['test.html']
+
+    In ``asyncio`` coroutines, files can be read with ``read_async()`` and
+    ``stream_async()`` (see ``confeitaria.static.store.aio``), which read them
+    in a pool of threads.
+
+    Many files can be read at once, by at most ``jobs`` threads, with
+    ``read_many()`` (see ``confeitaria.static.store.batch``)::
+
+    >>> with temp_dir() as d, \\
+    ...         temp_file(where=d, name='a.css', content='a {}'):
+    ...     results = FileStore(d).read_many(['a.css', 'b.css'], jobs=2)
+    >>> results['a.css']
+    'a {}'
+    >>> results['b.css'] # doctest: +ELLIPSIS
+    NotFoundError(...)
     """
 
-    def __init__(self, directory, default_file_name='index.html'):
+    def __init__(
+            self, directory, default_file_name='index.html',
+            resolve_cache_size=4096, resolve_ttl=1.0, negative_ttl=1.0,
+            negative_cache_size=4096, manifest=None):
         self.directory = directory
         self.default_file_name = default_file_name
+        self.root = os.path.realpath(directory)
+        self.resolve_ttl = resolve_ttl
+        self.negative_ttl = negative_ttl
+        self.manifest = load_manifest(directory, manifest)
+
+        self.resolved = LRUCache(max_entries=resolve_cache_size)
+        self.missing = LRUCache(max_entries=negative_cache_size)
 
+    @traced('read')
     def read(self, path):
-        path = get_file_path(
-            self.directory, path, default_file_name=self.default_file_name)
+        file_path = self.get_path(path)
 
         try:
-            if not is_parent(self.directory, path):
-                raise ValueError(
-                    '{0} is not in {1}'.format(path, self.directory))
-
-            with open(path) as f:
+            with open(file_path, 'rb') as f:
                 content = f.read()
         except IOError as e:
-            raise ValueError(
-                'Failed to read {0}. Reason: {1}'.format(path, e))
+            self.forget(path, e)
+            raise get_error(e)(
+                'Failed to read {0}. Reason: {1}'.format(file_path, e))
 
         return content
 
+    @traced('stream')
+    def stream(
+            self, path, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None):
+        file_path = self.get_path(path)
+
+        try:
+            f = open(file_path, 'rb')
+        except IOError as e:
+            self.forget(path, e)
+            raise get_error(e)(
+                'Failed to read {0}. Reason: {1}'.format(file_path, e))
+
+        size = os.fstat(f.fileno()).st_size
+        length = get_length(size, offset, length)
+
+        if offset:
+            f.seek(offset)
+
+        return FileBody(
+            f, length, chunk_size=chunk_size, offset=offset, size=size)
+
+    def read_many(self, paths, jobs=DEFAULT_JOBS):
+        return read_parallel(self.read, paths, jobs)
+
+    def read_async(self, path):
+        return run_async(self.read, path)
+
+    def stream_async(
+            self, path, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None):
+        return stream_async(
+            self, path, chunk_size=chunk_size, offset=offset, length=length)
+
+    @traced('stat')
+    def stat(self, path):
+        file_path, real_path = self.resolve(path)
+
+        try:
+            s = os.stat(real_path)
+        except OSError as e:
+            self.forget(path, e)
+            raise get_error(e)(
+                'Failed to stat {0}. Reason: {1}'.format(file_path, e))
+
+        relative_path = os.path.relpath(file_path, self.directory)
+        etag = file_etag(s.st_ino, s.st_size, s.st_mtime)
+        content_type = None
+
+        if self.manifest is not None:
+            entry = self.manifest.get(relative_path.replace(os.sep, '/'))
+
+            if entry is not None and \
+                    entry[:3] == (s.st_size, s.st_mtime, s.st_ino):
+                etag = '"{0}"'.format(entry.digest)
+                content_type = entry.content_type
+
+        return Stat(
+            relative_path, size=s.st_size, mtime=s.st_mtime, inode=s.st_ino,
+            etag=etag, content_type=content_type)
+
+    @traced('resolve')
+    def resolve(self, path):
+        """
+        Returns the path of the file of the document at ``path``, and the real
+        path of this file, checked to be inside the store directory. Both are
+        remembered for ``resolve_ttl`` seconds.
+        """
+        entry = self.resolved.get(path)
+
+        if entry is not None:
+            file_path, real_path, expiration = entry
+
+            if expiration > time.time():
+                return file_path, real_path
+
+            self.resolved.pop(path)
+
+        if self.is_missing(path):
+            raise NotFoundError(
+                '{0} was not found in {1}'.format(path, self.directory))
+
+        if self.manifest is not None:
+            file_path = self.get_manifest_path(path)
+        else:
+            file_path = get_file_path(
+                self.directory, path,
+                default_file_name=self.default_file_name)
+
+        real_path = os.path.realpath(file_path)
+
+        if not is_inside(self.root, real_path):
+            self.set_missing(path)
+            raise NotFoundError(
+                '{0} is not in {1}'.format(file_path, self.directory))
+
+        if self.resolve_ttl > 0:
+            self.resolved[path] = (
+                file_path, real_path, time.time() + self.resolve_ttl)
+
+        return file_path, real_path
+
+    def get_path(self, path):
+        """
+        Returns the real path of the file to be opened for the document at
+        ``path``.
+        """
+        return self.resolve(path)[1]
+
+    def get_manifest_path(self, path):
+        relative_path = self.manifest.resolve(
+            path, default_file_name=self.default_file_name)
+
+        if relative_path is None:
+            raise NotFoundError(
+                '{0} was not found in {1}'.format(path, self.directory))
+
+        return os.path.join(self.directory, *relative_path.split('/'))
+
+    def is_missing(self, path):
+        expiration = self.missing.get(path)
+
+        if expiration is None:
+            return False
+
+        if expiration <= time.time():
+            self.missing.pop(path)
+            return False
+
+        return True
+
+    def set_missing(self, path):
+        if self.negative_ttl > 0:
+            self.missing[path] = time.time() + self.negative_ttl
+
+    def forget(self, path, error=None):
+        """
+        Drops the resolved file path of ``path``. If the ``error`` that made
+        the store forget it means the file does not exist, the path is also
+        remembered as missing.
+        """
+        self.resolved.pop(path)
+
+        if is_missing_error(error):
+            self.set_missing(path)
+
+    def invalidate(self, path):
+        """
+        Forgets what the store knows about the file or directory at ``path``
+        (relative to the store directory), so changes to it are seen at the
+        next request. It can be used as a listener of
+        ``confeitaria.static.store.watch.Watcher``.
+        """
+        for cache in (self.resolved, self.missing):
+            for key in cache.keys():
+                if is_affected(key, path):
+                    cache.pop(key)
+
+        if self.manifest is not None:
+            self.manifest.refresh(path)
+
+    def clear(self):
+        self.resolved.clear()
+        self.missing.clear()
+
+
+def load_manifest(directory, manifest):
+    """
+    Returns the manifest to be used by a store of ``directory``. If
+    ``manifest`` is the name of a file, the manifest saved there is loaded and
+    updated; otherwise, ``manifest`` is returned as it is.
+    """
+    if not isinstance(manifest, (bytes, type(u''))):
+        return manifest
+
+    from confeitaria.static.store.manifest import get_manifest
+
+    return get_manifest(directory, manifest)
+
+
+def is_missing_error(error):
+    """
+    Checks whether an ``IOError`` or ``OSError`` means the file does not
+    exist::
+
+    >>> is_missing_error(IOError(errno.ENOENT, 'No such file or directory'))
+    True
+    >>> is_missing_error(IOError(errno.EACCES, 'Permission denied'))
+    False
+    """
+    return getattr(error, 'errno', None) in MISSING_ERRNOS
+
+
+def get_error(error):
+    """
+    Returns the exception class a store should raise given an ``IOError`` or
+    ``OSError``: ``NotFoundError`` if the file does not exist, ``ValueError``
+    otherwise::
+
+    >>> error = IOError(errno.ENOENT, 'No such file or directory')
+    >>> get_error(error) is NotFoundError
+    True
+    >>> get_error(IOError(errno.EACCES, 'Permission denied')) is ValueError
+    True
+    """
+    return NotFoundError if is_missing_error(error) else ValueError
+
 
 def get_file_path(root_dir, relative_path, default_file_name='index.html'):
     """
@@ -128,18 +474,31 @@ def is_parent(parent_path, path):
     False
     >>> is_parent('/a/b', '/a/b/../c')
     False
+    >>> is_parent('/a/b', '/a/bc')
+    False
+
+    Both paths are resolved (with ``os.path.realpath()``) only once, so the
+    cost of the check does not grow with the depth of ``path``.
     """
-    parent_path = os.path.realpath(parent_path)
-    path = os.path.realpath(path)
+    return is_inside(os.path.realpath(parent_path), os.path.realpath(path))
 
-    if parent_path == path:
-        value = True
-    elif is_root(path):
-        value = False
-    else:
-        value = is_parent(parent_path, os.path.dirname(path))
 
-    return value
+def is_inside(root, path):
+    """
+    ``is_inside()`` checks if ``path`` is inside ``root``, as ``is_parent()``
+    does, but expects both paths to be already resolved, so it does not touch
+    the file system at all::
+
+    >>> is_inside('/a/b', '/a/b/c')
+    True
+    >>> is_inside('/a/b', '/a/b')
+    True
+    >>> is_inside('/a/b', '/a/bc')
+    False
+    >>> is_inside('/', '/a')
+    True
+    """
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
 
 
 def is_root(path):
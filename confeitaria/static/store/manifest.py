@@ -0,0 +1,413 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import zlib
+import errno
+import marshal
+import hashlib
+import mimetypes
+import collections
+
+from confeitaria.static.store.file import is_inside
+
+MANIFEST_MAGIC = b'CSMANIF'
+MANIFEST_VERSION = 1
+
+FILE = 'file'
+DIRECTORY = 'directory'
+
+ManifestEntry = collections.namedtuple(
+    'ManifestEntry', ['size', 'mtime', 'inode', 'content_type', 'digest'])
+
+
+class Manifest(object):
+    """
+    ``Manifest`` knows all files inside a directory, so one can find a file
+    without probing the file system. It is created from the directory it
+    describes, and its ``update()`` method walks the directory::
+
+    >>> from inelegant.fs import temp_dir, temp_file
+    >>> with temp_dir() as d, \\
+    ...         temp_file(where=d, name='test.html', content='example'):
+    ...     manifest = Manifest(d).update()
+    >>> sorted(manifest.files)
+    ['test.html']
+
+    Each file has its size, modification time, inode, media type and the
+    SHA-1 digest of its content::
+
+    >>> entry = manifest.get('test.html')
+    >>> entry.size, entry.content_type
+    (7, 'text/html')
+    >>> entry.digest
+    'c3499c2729730a7f807efb8676a92dcb6f8a3f8f'
+
+    The ``resolve()`` method returns the path of the file that should be served
+    for a requested path, or ``None`` if there is no such file. Directories are
+    resolved to their default files::
+
+    >>> with temp_dir() as d, \\
+    ...         temp_dir(where=d, name='sub') as sub, \\
+    ...         temp_file(where=sub, name='index.html', content='example'):
+    ...     manifest = Manifest(d).update()
+    >>> manifest.resolve('/sub/')
+    'sub/index.html'
+    >>> manifest.resolve('/sub/../nofile.html') is None
+    True
+    >>> manifest.resolve('/../sub/index.html') is None
+    True
+
+    Calling ``update()`` again only lists directories whose modification time
+    changed, reusing what the manifest knows about the other ones, and their
+    files, without even stating them. Files changed in place do not change the
+    modification time of their directories, so they are only checked by
+    ``update(check_files=True)``. Even so, files are only read again if their
+    size, modification time or inode changed.
+    """
+
+    def __init__(self, root, directories=None, files=None):
+        self.root = os.path.realpath(root)
+        self.directories = directories if directories is not None else {}
+        self.files = files if files is not None else {}
+
+    def get(self, path):
+        return self.files.get(path)
+
+    def resolve(self, path, default_file_name='index.html'):
+        path = normalize_path(path)
+
+        if path is None:
+            return None
+
+        if path in self.directories:
+            path = join_path(path, default_file_name)
+
+        return path if path in self.files else None
+
+    def update(self, check_files=False):
+        """
+        Walks the directory again, listing only the directories that changed.
+        If ``check_files`` is true, the files of the other directories are
+        checked as well. Returns the manifest itself.
+        """
+        directories = {}
+        files = {}
+        self.walk('', directories, files, check_files)
+
+        self.directories = directories
+        self.files = files
+
+        return self
+
+    def refresh(self, path):
+        """
+        Updates only the entries of the file or directory at ``path``, as
+        reported by ``confeitaria.static.store.watch.Watcher``. An empty path
+        updates the whole manifest. Returns the manifest itself::
+
+        >>> from inelegant.fs import temp_dir, temp_file
+        >>> with temp_dir() as d:
+        ...     manifest = Manifest(d).update()
+        ...     with temp_file(where=d, name='test.html'):
+        ...         manifest.refresh('test.html').resolve('test.html')
+        ...     manifest.refresh('test.html').resolve('test.html') is None
+        'test.html'
+        True
+        """
+        path = normalize_path(path)
+
+        if not path:
+            return self.update()
+
+        if path in self.directories:
+            prefix = path + '/'
+
+            for p in [p for p in self.directories
+                      if p == path or p.startswith(prefix)]:
+                del self.directories[p]
+
+            for p in [p for p in self.files if p.startswith(prefix)]:
+                del self.files[p]
+
+        full_path = os.path.join(self.root, *path.split('/'))
+        kind = get_kind(self.root, full_path)
+        entry = None
+
+        if kind == FILE:
+            entry = get_entry(full_path, self.files.get(path))
+        elif kind == DIRECTORY:
+            self.walk(path, self.directories, self.files)
+
+        if entry is not None:
+            self.files[path] = entry
+        else:
+            self.files.pop(path, None)
+
+        return self
+
+    def walk(self, path, directories, files, check_files=True):
+        """
+        Adds the entries of the directory at ``path`` and its subdirectories
+        to ``directories`` and ``files``. The known files of unchanged
+        directories are only checked if ``check_files`` is true.
+        """
+        pending = [path]
+
+        while pending:
+            path = pending.pop()
+            directory = os.path.join(self.root, *path.split('/'))
+
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError:
+                continue
+
+            previous = self.directories.get(path)
+            unchanged = previous is not None and previous[0] == mtime
+
+            if unchanged:
+                _, file_names, subdirectory_names = previous
+            else:
+                file_names, subdirectory_names = list_directory(
+                    self.root, directory)
+
+            directories[path] = (mtime, file_names, subdirectory_names)
+
+            for name in file_names:
+                file_path = join_path(path, name)
+                entry = self.files.get(file_path)
+
+                if not unchanged or check_files or entry is None:
+                    entry = get_entry(os.path.join(directory, name), entry)
+
+                if entry is not None:
+                    files[file_path] = entry
+
+            pending.extend(join_path(path, n) for n in subdirectory_names)
+
+    def save(self, filename):
+        """
+        Saves the manifest in a compact binary file, to be loaded with
+        ``load_manifest()``. The file is replaced atomically.
+        """
+        data = marshal.dumps((
+            MANIFEST_VERSION, self.root, self.directories,
+            dict((p, tuple(e)) for p, e in self.files.items())
+        ))
+        temp_filename = '{0}.{1}.tmp'.format(filename, os.getpid())
+
+        with open(temp_filename, 'wb') as f:
+            f.write(MANIFEST_MAGIC)
+            f.write(zlib.compress(data))
+
+        os.rename(temp_filename, filename)
+
+
+def load_manifest(filename):
+    """
+    Loads a manifest saved with ``Manifest.save()``::
+
+    >>> from inelegant.fs import temp_dir, temp_file
+    >>> with temp_dir() as d, \\
+    ...         temp_file(where=d, name='test.html', content='example'):
+    ...     filename = os.path.join(d, 'manifest')
+    ...     Manifest(d).update().save(filename)
+    ...     manifest = load_manifest(filename)
+    >>> manifest.get('test.html').size
+    7
+
+    If the file does not exist or is not a valid manifest, ``None`` is
+    returned::
+
+    >>> load_manifest('/nonexistent/manifest') is None
+    True
+    """
+    try:
+        with open(filename, 'rb') as f:
+            magic = f.read(len(MANIFEST_MAGIC))
+            data = f.read()
+    except IOError:
+        return None
+
+    if magic != MANIFEST_MAGIC:
+        return None
+
+    try:
+        version, root, directories, files = marshal.loads(
+            zlib.decompress(data))
+    except (zlib.error, ValueError, EOFError, TypeError):
+        return None
+
+    if version != MANIFEST_VERSION:
+        return None
+
+    files = dict((p, ManifestEntry._make(e)) for p, e in files.items())
+
+    return Manifest(root, directories=directories, files=files)
+
+
+def get_manifest(root, filename):
+    """
+    Returns an up-to-date manifest of the ``root`` directory, stored in
+    ``filename``. If the file has a manifest of the directory, it is updated
+    incrementally; otherwise, a new manifest is built. Either way, the result
+    is saved back in the file::
+
+    >>> from inelegant.fs import temp_dir, temp_file
+    >>> with temp_dir() as d, \\
+    ...         temp_file(where=d, name='test.html', content='example'):
+    ...     filename = os.path.join(d, 'manifest')
+    ...     sorted(get_manifest(d, filename).files)
+    ...     sorted(load_manifest(filename).files)
+    ['test.html']
+    ['test.html']
+    """
+    manifest = load_manifest(filename)
+
+    if manifest is None or manifest.root != os.path.realpath(root):
+        manifest = Manifest(root)
+
+    manifest.update()
+    manifest.save(filename)
+
+    return manifest
+
+
+def list_directory(root, directory):
+    """
+    Returns the names of the files and the names of the subdirectories of
+    ``directory``, as classified by ``get_kind()``.
+    """
+    file_names = []
+    subdirectory_names = []
+
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return (), ()
+
+    for name in names:
+        kind = get_kind(root, os.path.join(directory, name))
+
+        if kind == FILE:
+            file_names.append(name)
+        elif kind == DIRECTORY:
+            subdirectory_names.append(name)
+
+    return tuple(sorted(file_names)), tuple(sorted(subdirectory_names))
+
+
+def get_kind(root, path):
+    """
+    Tells whether ``path`` should be in the manifest of ``root`` as a ``FILE``
+    or as a ``DIRECTORY``. Symbolic links to directories are not followed, and
+    symbolic links to files outside of ``root`` are ignored, as they could not
+    be served anyway. Returns ``None`` for paths to be ignored.
+    """
+    if os.path.islink(path):
+        real_path = os.path.realpath(path)
+
+        if os.path.isfile(real_path) and is_inside(root, real_path):
+            return FILE
+    elif os.path.isdir(path):
+        return DIRECTORY
+    elif os.path.isfile(path):
+        return FILE
+
+    return None
+
+
+def get_entry(path, previous=None):
+    """
+    Returns the manifest entry of a file. If the ``previous`` entry has the
+    same size, modification time and inode of the file, it is returned
+    instead of reading the file again. If the file does not exist, returns
+    ``None``.
+    """
+    try:
+        s = os.stat(path)
+
+        if previous is not None and \
+                previous[:3] == (s.st_size, s.st_mtime, s.st_ino):
+            return previous
+
+        digest = get_digest(path)
+    except (IOError, OSError) as e:
+        if e.errno in (errno.ENOENT, errno.ENOTDIR):
+            return None
+
+        raise
+
+    content_type, _ = mimetypes.guess_type(path)
+
+    return ManifestEntry(
+        s.st_size, s.st_mtime, s.st_ino, content_type, digest)
+
+
+def get_digest(path, chunk_size=64 * 1024):
+    """
+    Returns the SHA-1 hex digest of the content of a file, reading it in
+    chunks.
+    """
+    digest = hashlib.sha1()
+
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def normalize_path(path):
+    """
+    Normalizes a requested path to the form used as key in manifests. Paths
+    leading to outside the directory result in ``None``::
+
+    >>> normalize_path('/a//b/./c/../d.html')
+    'a/b/d.html'
+    >>> normalize_path('/')
+    ''
+    >>> normalize_path('/a/../../b.html') is None
+    True
+    """
+    names = []
+
+    for name in path.split('/'):
+        if name == '..':
+            if not names:
+                return None
+
+            names.pop()
+        elif name and name != '.':
+            names.append(name)
+
+    return '/'.join(names)
+
+
+def join_path(directory, name):
+    """
+    Joins the path of a directory from a manifest with a name::
+
+    >>> join_path('', 'a.html')
+    'a.html'
+    >>> join_path('a', 'b.html')
+    'a/b.html'
+    """
+    return '{0}/{1}'.format(directory, name) if directory else name
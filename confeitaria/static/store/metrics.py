@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import time
+import bisect
+import threading
+
+from confeitaria.static.store.aio import run_async, stream_async
+from confeitaria.static.store.batch import DEFAULT_JOBS, is_error, read_many
+from confeitaria.static.store.body import get_body, DEFAULT_CHUNK_SIZE
+from confeitaria.static.store.error import NotFoundError
+from confeitaria.static.store.stat import get_stat
+
+HIT = 'hit'
+MISS = 'miss'
+ERROR = 'error'
+
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MeteredStore(object):
+    """
+    ``MeteredStore`` counts the operations of another store. It receives the
+    store, a ``Metrics`` object and a name for the store in it::
+
+    >>> from confeitaria.static.store.fake import FakeStore
+    >>> metrics = Metrics()
+    >>> store = MeteredStore(FakeStore({'a.html': 'example'}), metrics)
+    >>> store.read('a.html')
+    'example'
+    >>> store.read('b.html')
+    Traceback (most recent call last):
+      ...
+    NotFoundError: Failed to read b.html. Reason: 'b.html'
+
+    For each operation (``read``, ``stat`` and ``stream``), the metrics have
+    the number of hits, misses (documents not found) and errors (other
+    failures), the bytes read and a histogram of the latencies::
+
+    >>> counters = metrics.get_counters('FakeStore', 'read')
+    >>> counters.hits, counters.misses, counters.errors, counters.bytes
+    (1, 1, 0, 7)
+
+    The name is, by default, the name of the class of the store. All other
+    attributes are the ones of the wrapped store.
+    """
+
+    def __init__(self, store, metrics, name=None):
+        self.store = store
+        self.metrics = metrics
+        self.name = name if name is not None else type(store).__name__
+
+    def read(self, path):
+        counters = self.metrics.get_counters(self.name, 'read')
+        start = time.time()
+
+        try:
+            content = self.store.read(path)
+        except Exception as e:
+            counters.record(get_outcome(e), time.time() - start)
+            raise
+
+        counters.record(HIT, time.time() - start, len(content))
+
+        return content
+
+    def stat(self, path):
+        counters = self.metrics.get_counters(self.name, 'stat')
+        start = time.time()
+
+        try:
+            stat = get_stat(self.store, path)
+        except Exception as e:
+            counters.record(get_outcome(e), time.time() - start)
+            raise
+
+        counters.record(HIT, time.time() - start)
+
+        return stat
+
+    def stream(
+            self, path, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None):
+        counters = self.metrics.get_counters(self.name, 'stream')
+        start = time.time()
+
+        try:
+            body = get_body(
+                self.store, path, chunk_size=chunk_size, offset=offset,
+                length=length)
+        except Exception as e:
+            counters.record(get_outcome(e), time.time() - start)
+            raise
+
+        counters.record(HIT, time.time() - start, body.length or 0)
+
+        return body
+
+    def read_many(self, paths, jobs=DEFAULT_JOBS):
+        counters = self.metrics.get_counters(self.name, 'read')
+        start = time.time()
+        results = read_many(self.store, paths, jobs)
+        seconds = (time.time() - start) / max(len(results), 1)
+
+        for result in results.values():
+            if is_error(result):
+                counters.record(get_outcome(result), seconds)
+            else:
+                counters.record(HIT, seconds, len(result))
+
+        return results
+
+    def read_async(self, path):
+        return run_async(self.read, path)
+
+    def stream_async(
+            self, path, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None):
+        return stream_async(
+            self, path, chunk_size=chunk_size, offset=offset, length=length)
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+
+class Metrics(object):
+    """
+    ``Metrics`` keeps the counters of many components (such as stores and
+    pages) and operations::
+
+    >>> metrics = Metrics()
+    >>> metrics.get_counters('FileStore', 'read').record(HIT, 0.002, 10)
+    >>> metrics.get_counters('FileStore', 'read').record(MISS, 0.0001)
+    >>> snapshot = metrics.snapshot()
+    >>> counters = snapshot['FileStore']['read']
+    >>> counters['hits'], counters['misses'], counters['bytes']
+    (1, 1, 10)
+    >>> counters['latency']['count']
+    2
+
+    They can be exported as JSON, by ``to_json()``, or in the text format of
+    Prometheus, by ``to_prometheus()``.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def get_counters(self, component, operation):
+        key = (component, operation)
+
+        try:
+            return self.counters[key]
+        except KeyError:
+            with self.lock:
+                return self.counters.setdefault(key, Counters(self.buckets))
+
+    def snapshot(self):
+        """
+        Returns a dict mapping each component to a dict mapping its
+        operations to their counters, as dicts.
+        """
+        result = {}
+
+        for (component, operation), counters in list(self.counters.items()):
+            result.setdefault(component, {})[operation] = counters.snapshot()
+
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.counters = {}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), sort_keys=True)
+
+    def to_prometheus(self, prefix='confeitaria_static'):
+        """
+        Returns the counters in the Prometheus text format::
+
+        >>> metrics = Metrics(buckets=[0.1])
+        >>> metrics.get_counters('FakeStore', 'read').record(HIT, 0.05, 3)
+        >>> print(metrics.to_prometheus()) # doctest: +ELLIPSIS
+        # TYPE confeitaria_static_operations_total counter
+        confeitaria_static_operations_total{component="FakeStore",\
+operation="read",result="hit"} 1
+        ...
+        confeitaria_static_latency_seconds_bucket{component="FakeStore",\
+operation="read",le="0.1"} 1
+        ...
+        """
+        operations = []
+        sizes = []
+        latencies = []
+
+        for (component, operation), counters in sorted(self.counters.items()):
+            labels = 'component="{0}",operation="{1}"'.format(
+                escape_label(component), escape_label(operation))
+            snapshot = counters.snapshot()
+
+            for result, field in ((HIT, 'hits'), (MISS, 'misses'),
+                                  (ERROR, 'errors')):
+                operations.append(
+                    '{0}_operations_total{{{1},result="{2}"}} {3}'.format(
+                        prefix, labels, result, snapshot[field]))
+
+            sizes.append(
+                '{0}_bytes_total{{{1}}} {2}'.format(
+                    prefix, labels, snapshot['bytes']))
+
+            latency = snapshot['latency']
+            bounds = [repr(b) for b in latency['buckets']] + ['+Inf']
+
+            for bound, count in zip(bounds, latency['counts']):
+                latencies.append(
+                    '{0}_latency_seconds_bucket{{{1},le="{2}"}} {3}'.format(
+                        prefix, labels, bound, count))
+
+            latencies.append(
+                '{0}_latency_seconds_sum{{{1}}} {2!r}'.format(
+                    prefix, labels, latency['sum']))
+            latencies.append(
+                '{0}_latency_seconds_count{{{1}}} {2}'.format(
+                    prefix, labels, latency['count']))
+
+        lines = (
+            ['# TYPE {0}_operations_total counter'.format(prefix)] +
+            operations +
+            ['# TYPE {0}_bytes_total counter'.format(prefix)] + sizes +
+            ['# TYPE {0}_latency_seconds histogram'.format(prefix)] +
+            latencies)
+
+        return '\n'.join(lines) + '\n'
+
+
+class Counters(object):
+    """
+    ``Counters`` counts the hits, misses, errors and bytes of an operation,
+    and keeps a histogram of its latencies, in seconds::
+
+    >>> counters = Counters(buckets=[0.01, 0.1])
+    >>> counters.record(HIT, 0.05, 100)
+    >>> counters.record(ERROR, 0.5)
+    >>> counters.hits, counters.errors, counters.bytes
+    (1, 1, 100)
+    >>> counters.snapshot()['latency']['counts']
+    [0, 1, 2]
+
+    The latency counts are cumulative, as in Prometheus histograms: each one
+    is the number of operations that took at most the corresponding bucket,
+    and the last one is the total.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.bytes = 0
+        self.latency_counts = [0] * (len(self.buckets) + 1)
+        self.latency_sum = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, outcome, seconds, size=0):
+        bucket = bisect.bisect_left(self.buckets, seconds)
+
+        with self.lock:
+            if outcome == HIT:
+                self.hits += 1
+            elif outcome == MISS:
+                self.misses += 1
+            else:
+                self.errors += 1
+
+            self.bytes += size
+            self.latency_counts[bucket] += 1
+            self.latency_sum += seconds
+
+    def snapshot(self):
+        with self.lock:
+            counts = []
+            total = 0
+
+            for count in self.latency_counts:
+                total += count
+                counts.append(total)
+
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'errors': self.errors,
+                'bytes': self.bytes,
+                'latency': {
+                    'buckets': list(self.buckets),
+                    'counts': counts,
+                    'sum': self.latency_sum,
+                    'count': total
+                }
+            }
+
+
+def get_outcome(error):
+    """
+    Returns whether an exception means a miss or an error::
+
+    >>> get_outcome(NotFoundError('a.html')), get_outcome(IOError())
+    ('miss', 'error')
+    """
+    return MISS if isinstance(error, NotFoundError) else ERROR
+
+
+def escape_label(value):
+    """
+    Escapes a Prometheus label value::
+
+    >>> print(escape_label('a"b\\\\c'))
+    a\\"b\\\\c
+    """
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n')
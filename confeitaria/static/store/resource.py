@@ -17,14 +17,34 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
 
+import sys
+import time
 import pkgutil
+import zipfile
 import os.path
 import errno
+import threading
+import contextlib
+import collections
+
+from confeitaria.static.store.aio import run_async, stream_async
+from confeitaria.static.store.batch import DEFAULT_JOBS, read_parallel
+from confeitaria.static.store.body import ContentBody, DEFAULT_CHUNK_SIZE
+from confeitaria.static.store.cache import LRUCache
+from confeitaria.static.store.error import NotFoundError
+from confeitaria.static.store.manifest import join_path, normalize_path
+from confeitaria.static.store.stat import Stat, content_etag
+from confeitaria.static.store.trace import traced
+
+ResourceEntry = collections.namedtuple(
+    'ResourceEntry', ['size', 'mtime', 'content'])
 
 
 class ResourceStore(object):
 
-    def __init__(self, package, directory, default_file_name='index.html'):
+    def __init__(
+            self, package, directory, default_file_name='index.html',
+            index=False, preload_size=64 * 1024, stat_cache_size=4096):
         """
         ``ResourceStore``` is a store to read content from package resources.
 
@@ -42,29 +62,308 @@ class ResourceStore(object):
         ...     store.read('test.html')
         'example'
 
-        If the resource does not exist, it will raise ``ValueError``::
+        If the resource does not exist, it will raise ``NotFoundError``, a
+        ``ValueError``::
 
         >>> with available_module('m'):
         ...     store = ResourceStore('m', 'resource_dir')
         ...     store.read('not_found.html')         # doctest: +ELLIPSIS
         Traceback (most recent call last):
           ...
-        ValueError: ...
+        NotFoundError: ...
+
+        Package resources are not expected to change while the package is
+        loaded, so ``stat()`` computes the entity tag of a resource from its
+        content only once::
+
+        >>> with available_module('m'), \\
+        ...         available_resource(
+        ...             'm', 'test.html', where='resource_dir',
+        ...             content='example'):
+        ...     store = ResourceStore('m', 'resource_dir')
+        ...     store.stat('test.html').etag
+        '"c3499c2729730a7f807efb8676a92dcb6f8a3f8f"'
+
+        At most ``stat_cache_size`` stats are kept, the least recently used
+        ones being forgotten first.
+
+        The stat also has the modification time of the resource, taken from the
+        file system or, if the package is zipped, from the zip entry.
+
+        If ``index`` is true, the store lists all resources of the directory
+        once, at the first request, so later requests for missing resources
+        or for directories do not need any I/O. Resources up to
+        ``preload_size`` bytes are read at the same time and kept in memory;
+        larger ones are read from the package at each request. Packages in
+        the file system and in zip files (such as eggs) are supported::
+
+        >>> with available_module('m'), \\
+        ...         available_resource(
+        ...             'm', 'index.html', where='resource_dir/sub',
+        ...             content='example'):
+        ...     store = ResourceStore('m', 'resource_dir', index=True)
+        ...     store.read('sub')
+        'example'
+        >>> store.read('sub')
+        'example'
+
+        Resources added to the package after the first request are not found
+        by indexed stores, and resources removed from the package after it
+        are not found either.
         """
         self.package = package
         self.directory = directory
         self.default_file_name = default_file_name
+        self.stats = LRUCache(max_entries=stat_cache_size)
+        self.index = index
+        self.preload_size = preload_size
+        self.entries = None
+        self.directories = None
+        self.lock = threading.Lock()
 
+    @traced('read')
     def read(self, path):
+        _, content = self.get_data(path)
+
+        return content
+
+    def read_many(self, paths, jobs=DEFAULT_JOBS):
+        return read_parallel(self.read, paths, jobs)
+
+    def get_data(self, path):
+        if self.index and self.load_index():
+            return self.get_indexed_data(path)
+
         path = path.strip('/')
         resource_path = os.path.join(self.directory, path)
 
         try:
-            return pkgutil.get_data(self.package, resource_path)
+            return path, pkgutil.get_data(self.package, resource_path)
         except IOError as e:
             if e.errno == errno.EISDIR:
                 resource_path = os.path.join(path, self.default_file_name)
 
-                return self.read(resource_path)
+                return self.get_data(resource_path)
             else:
-                raise ValueError('{0} not found.'.format(path))
+                raise NotFoundError('{0} not found.'.format(path))
+
+    @traced('stream')
+    def stream(
+            self, path, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None):
+        return ContentBody(
+            self.read(path), chunk_size=chunk_size, offset=offset,
+            length=length)
+
+    def read_async(self, path):
+        return run_async(self.read, path)
+
+    def stream_async(
+            self, path, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None):
+        return stream_async(
+            self, path, chunk_size=chunk_size, offset=offset, length=length)
+
+    @traced('stat')
+    def stat(self, path):
+        path = path.strip('/')
+
+        try:
+            return self.stats[path]
+        except KeyError:
+            pass
+
+        resource_path, content = self.get_data(path)
+
+        if self.entries is not None:
+            mtime = self.entries[resource_path].mtime
+        else:
+            mtime = get_resource_mtime(
+                self.package, os.path.join(self.directory, resource_path))
+
+        stat = Stat(
+            resource_path, size=len(content), mtime=mtime,
+            etag=content_etag(content))
+        self.stats[path] = stat
+
+        return stat
+
+    def get_indexed_data(self, path):
+        resource_path = normalize_path(path)
+
+        if resource_path in self.directories:
+            resource_path = join_path(resource_path, self.default_file_name)
+
+        entry = self.entries.get(resource_path)
+
+        if entry is None:
+            raise NotFoundError('{0} not found.'.format(path))
+
+        content = entry.content
+
+        if content is None:
+            try:
+                content = pkgutil.get_data(
+                    self.package, join_path(self.directory, resource_path))
+            except (IOError, OSError):
+                raise NotFoundError('{0} not found.'.format(path))
+
+        return resource_path, content
+
+    def load_index(self):
+        """
+        Lists the resources of the store, if not done yet. Returns ``False``
+        if the package loader is not supported.
+        """
+        if self.entries is None:
+            with self.lock:
+                if self.entries is None:
+                    index = walk_resources(
+                        self.package, self.directory, self.preload_size)
+
+                    if index is None:
+                        self.index = False
+                        return False
+
+                    self.directories, self.entries = index
+
+        return True
+
+
+def walk_resources(package, directory, preload_size=64 * 1024):
+    """
+    Lists the resources inside a directory of a package. Returns a set with
+    the paths of the directories and a dict mapping the paths of the
+    resources to ``ResourceEntry`` tuples, with their size, modification time
+    and, if they have at most ``preload_size`` bytes, content::
+
+    >>> from inelegant.module import available_module, available_resource
+    >>> with available_module('m'), \\
+    ...         available_resource(
+    ...             'm', 'test.html', where='resource_dir/sub',
+    ...             content='example'):
+    ...     directories, entries = walk_resources('m', 'resource_dir')
+    >>> sorted(directories)
+    ['', 'sub']
+    >>> entries['sub/test.html'].size, entries['sub/test.html'].content
+    (7, 'example')
+
+    Both packages in the file system and in zip files are supported. For other
+    kinds of packages, ``None`` is returned.
+    """
+    loader = pkgutil.get_loader(package)
+    module = sys.modules.get(package)
+
+    if loader is None or getattr(module, '__file__', None) is None:
+        return None
+
+    root = os.path.join(
+        os.path.dirname(module.__file__), *directory.split('/'))
+    archive = getattr(loader, 'archive', None)
+
+    if archive is not None:
+        prefix = os.path.relpath(root, archive).replace(os.sep, '/') + '/'
+
+        return walk_zip_resources(archive, prefix, preload_size)
+    elif os.path.isdir(os.path.dirname(module.__file__)):
+        return walk_file_resources(root, preload_size)
+
+    return None
+
+
+def walk_file_resources(root, preload_size):
+    directories = set()
+    entries = {}
+
+    for directory, _, file_names in os.walk(root):
+        path = os.path.relpath(directory, root).replace(os.sep, '/')
+        path = '' if path == '.' else path
+        directories.add(path)
+
+        for name in file_names:
+            file_path = os.path.join(directory, name)
+            s = os.stat(file_path)
+            content = None
+
+            if s.st_size <= preload_size:
+                with open(file_path, 'rb') as f:
+                    content = f.read()
+
+            entries[join_path(path, name)] = ResourceEntry(
+                s.st_size, s.st_mtime, content)
+
+    return directories, entries
+
+
+def walk_zip_resources(archive, prefix, preload_size):
+    directories = set()
+    entries = {}
+
+    with contextlib.closing(zipfile.ZipFile(archive)) as z:
+        for info in z.infolist():
+            if not info.filename.startswith(prefix):
+                continue
+
+            path = info.filename[len(prefix):]
+            names = path.split('/')
+
+            for i in range(len(names)):
+                directories.add('/'.join(names[:i]))
+
+            if path.endswith('/'):
+                continue
+
+            content = None
+
+            if info.file_size <= preload_size:
+                content = z.read(info)
+
+            entries[path] = ResourceEntry(
+                info.file_size, time.mktime(info.date_time + (0, 0, -1)),
+                content)
+
+    return directories, entries
+
+
+def get_resource_mtime(package, resource_path):
+    """
+    Returns the modification time of a package resource. If the package is in
+    the file system, the time comes from the resource file::
+
+    >>> from inelegant.module import available_module, available_resource
+    >>> with available_module('m'), \\
+    ...         available_resource(
+    ...             'm', 'test.html', where='resource_dir'):
+    ...     directory = os.path.dirname(sys.modules['m'].__file__)
+    ...     path = os.path.join(directory, 'resource_dir', 'test.html')
+    ...     get_resource_mtime('m', 'resource_dir/test.html') == \\
+    ...         os.path.getmtime(path)
+    True
+
+    If the package is in a zip file, the time comes from the zip entry. If the
+    time cannot be found, ``None`` is returned::
+
+    >>> with available_module('m'):
+    ...     get_resource_mtime('m', 'resource_dir/nofile.html') is None
+    True
+    """
+    loader = pkgutil.get_loader(package)
+    module = sys.modules.get(package)
+
+    if loader is None or module is None:
+        return None
+
+    filename = os.path.join(
+        os.path.dirname(module.__file__), *resource_path.split('/'))
+    archive = getattr(loader, 'archive', None)
+
+    try:
+        if archive is not None:
+            member = os.path.relpath(filename, archive).replace(os.sep, '/')
+
+            with contextlib.closing(zipfile.ZipFile(archive)) as z:
+                date_time = z.getinfo(member).date_time
+
+            return time.mktime(date_time + (0, 0, -1))
+        else:
+            return os.path.getmtime(filename)
+    except (IOError, OSError, KeyError):
+        return None
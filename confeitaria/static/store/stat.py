@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+
+from confeitaria.static.store.body import to_bytes
+
+
+class Stat(object):
+    """
+    ``Stat`` holds metadata about a document from a store, so one can know
+    whether a document changed without reading its content. It should at least
+    have the path of the document in the store (after resolving default file
+    names, such as ``index.html``) and the size of the document::
+
+    >>> s = Stat('test.html', size=7)
+    >>> s.path
+    'test.html'
+    >>> s.size
+    7
+
+    Stores that know when a document was modified also inform its
+    modification time::
+
+    >>> s = Stat('test.html', size=7, mtime=1420070400.0)
+    >>> s.mtime
+    1420070400.0
+
+    Two stats represent the same version of a document if they have the same
+    ``validator``::
+
+    >>> s1 = Stat('test.html', size=7, mtime=1420070400.0)
+    >>> s2 = Stat('test.html', size=7, mtime=1420070400.0)
+    >>> s1.validator == s2.validator
+    True
+    >>> s3 = Stat('test.html', size=8, mtime=1420070401.0)
+    >>> s1.validator == s3.validator
+    False
+
+    The entity tag is part of the validator, so stores without meaningful
+    modification times (such as ``FakeStore``) can tell versions of the same
+    size apart::
+
+    >>> s4 = Stat('test.html', size=7, etag='"a"')
+    >>> s5 = Stat('test.html', size=7, etag='"b"')
+    >>> s4.validator == s5.validator
+    False
+
+    A stat can also carry an entity tag, which is used as the HTTP ``ETag`` of
+    the document::
+
+    >>> s = Stat('test.html', size=7, etag=content_etag('example'))
+    >>> s.etag
+    '"c3499c2729730a7f807efb8676a92dcb6f8a3f8f"'
+
+    Stores that already know the media type of the document can inform it,
+    too::
+
+    >>> s = Stat('test.html', size=7, content_type='text/html')
+    >>> s.content_type
+    'text/html'
+    """
+
+    def __init__(
+            self, path, size, mtime=None, inode=None, etag=None,
+            content_type=None):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.inode = inode
+        self.etag = etag
+        self.content_type = content_type
+
+    @property
+    def validator(self):
+        return (self.size, self.mtime, self.inode, self.etag)
+
+
+def file_etag(inode, size, mtime):
+    """
+    Returns a strong entity tag for a file, computed from its inode, size and
+    modification time, so it can be known without reading the file::
+
+    >>> file_etag(inode=1234, size=7, mtime=1420070400.5)
+    '"4d2-7-50b8be7c72120"'
+    """
+    return '"{0:x}-{1:x}-{2:x}"'.format(inode, size, int(mtime * 1000000))
+
+
+def content_etag(content):
+    """
+    Returns a strong entity tag computed from the content of a document::
+
+    >>> content_etag('example')
+    '"c3499c2729730a7f807efb8676a92dcb6f8a3f8f"'
+
+    Text is hashed as UTF-8::
+
+    >>> content_etag(u'example')
+    '"c3499c2729730a7f807efb8676a92dcb6f8a3f8f"'
+    """
+    return '"{0}"'.format(hashlib.sha1(to_bytes(content)).hexdigest())
+
+
+def get_stat(store, path):
+    """
+    Returns the stat of a document from a store. If the store has no
+    ``stat()`` method, the stat is computed from the document content::
+
+    >>> class ReadOnlyStore(object):
+    ...     def read(self, path):
+    ...         return 'example'
+    >>> s = get_stat(ReadOnlyStore(), 'test.html')
+    >>> s.size, s.etag
+    (7, '"c3499c2729730a7f807efb8676a92dcb6f8a3f8f"')
+    """
+    try:
+        stat = store.stat
+    except AttributeError:
+        content = store.read(path)
+
+        return Stat(path, size=len(content), etag=content_etag(content))
+
+    return stat(path)
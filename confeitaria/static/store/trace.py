@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Tracing of the phases of serving a document, such as resolving its path,
+looking for it in each store of an aggregate store, reading it and encoding
+it.
+
+A hook is a function receiving a ``Span`` whenever a phase ends::
+
+    def hook(span):
+        print(span.phase, span.name, span.path, span.duration)
+
+    add_hook(hook)
+
+Hooks added by ``add_hook()`` receive the spans of all stores and pages, in
+all threads. Hooks given to ``tracing()`` only receive the spans of the
+current thread, inside the context (``StaticPage`` does so with the hooks
+given to it). When no hook is registered, traced methods only check two
+attributes before doing their work.
+"""
+
+import time
+import threading
+import functools
+import traceback
+import contextlib
+
+HOOKS = []
+
+
+class State(threading.local):
+    """
+    The hooks and the current span of a thread.
+    """
+    hooks = ()
+    span = None
+
+
+STATE = State()
+
+
+class Span(object):
+    """
+    ``Span`` describes a phase of serving a document: the name of the
+    ``phase``, the ``path`` of the document, the ``component`` (a store or a
+    page) doing it, when it started and how long it took, in seconds::
+
+    >>> span = Span('read', 'a.html', object(), start=10.0)
+    >>> span.end = 10.25
+    >>> span.name, span.duration
+    ('object', 0.25)
+
+    If the phase failed, ``error`` is the exception raised (for pages, which
+    raise their responses, it is the response). ``parent`` is the span of the
+    phase during which this one happened, if any.
+    """
+
+    def __init__(self, phase, path, component, start=None, parent=None):
+        self.phase = phase
+        self.path = path
+        self.component = component
+        self.start = start if start is not None else time.time()
+        self.end = None
+        self.error = None
+        self.parent = parent
+
+    @property
+    def name(self):
+        return type(self.component).__name__
+
+    @property
+    def duration(self):
+        return self.end - self.start if self.end is not None else None
+
+    def __repr__(self):
+        return 'Span({0!r}, {1!r}, {2})'.format(
+            self.phase, self.path, self.name)
+
+
+def traced(phase):
+    """
+    Decorates a method whose first argument is a path, so it is traced as the
+    given phase::
+
+    >>> class Store(object):
+    ...     @traced('read')
+    ...     def read(self, path):
+    ...         return 'example'
+    >>> spans = []
+    >>> with tracing([spans.append]):
+    ...     Store().read('a.html')
+    'example'
+    >>> spans
+    [Span('read', 'a.html', Store)]
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(self, path, *args, **kwargs):
+            if not HOOKS and not STATE.hooks:
+                return function(self, path, *args, **kwargs)
+
+            return call(phase, self, path, function, self, path, *args,
+                        **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def call(phase, component, path, function, *args, **kwargs):
+    """
+    Calls the function with the given arguments, tracing it as the given
+    phase of the component, if there is any hook::
+
+    >>> spans = []
+    >>> with tracing([spans.append]):
+    ...     call('upper', 'x', 'a.html', str.upper, 'example')
+    'EXAMPLE'
+    >>> spans
+    [Span('upper', 'a.html', str)]
+    """
+    if not HOOKS and not STATE.hooks:
+        return function(*args, **kwargs)
+
+    span = Span(phase, path, component, parent=STATE.span)
+    STATE.span = span
+
+    try:
+        return function(*args, **kwargs)
+    except Exception as e:
+        span.error = e
+        raise
+    finally:
+        span.end = time.time()
+        STATE.span = span.parent
+        notify(span)
+
+
+def notify(span):
+    """
+    Gives the span to the global hooks and the hooks of the thread. Failures
+    of hooks are printed, but do not affect the traced phase.
+    """
+    for hook in list(HOOKS) + list(STATE.hooks):
+        try:
+            hook(span)
+        except Exception:
+            traceback.print_exc()
+
+
+def add_hook(hook):
+    HOOKS.append(hook)
+
+
+def remove_hook(hook):
+    HOOKS.remove(hook)
+
+
+def is_tracing():
+    """
+    Checks whether there is any hook for the current thread::
+
+    >>> is_tracing()
+    False
+    >>> with tracing([repr]):
+    ...     is_tracing()
+    True
+    """
+    return bool(HOOKS or STATE.hooks)
+
+
+@contextlib.contextmanager
+def tracing(hooks):
+    """
+    Gives the spans of the current thread to the hooks, inside the context.
+    """
+    previous = STATE.hooks
+    STATE.hooks = previous + tuple(hooks)
+
+    try:
+        yield
+    finally:
+        STATE.hooks = previous
@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import sys
+import codecs
+import errno
+import select
+import posixpath
+import struct
+import threading
+import traceback
+import ctypes
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+    IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR |
+    IN_DONT_FOLLOW)
+
+FILE_SYSTEM_ENCODING = sys.getfilesystemencoding() or 'utf-8'
+
+if codecs.lookup(FILE_SYSTEM_ENCODING).name == 'ascii':
+    FILE_SYSTEM_ENCODING = 'utf-8'
+
+try:
+    codecs.lookup_error('surrogateescape')
+    FILE_NAME_ERRORS = 'surrogateescape'
+except LookupError:
+    FILE_NAME_ERRORS = 'strict'
+
+EVENT_HEADER = struct.Struct('iIII')
+EVENT_BUFFER_SIZE = 64 * 1024
+
+
+class Watcher(object):
+    """
+    ``Watcher`` watches a directory tree with Linux's inotify and, whenever a
+    file or directory in it is created, modified, moved or deleted, calls its
+    listeners with the path of the changed file, relative to the directory::
+
+    >>> import time
+    >>> from inelegant.fs import temp_dir, temp_file
+    >>> changed = []
+    >>> with temp_dir() as d:
+    ...     with Watcher(d, listeners=[changed.append]):
+    ...         with temp_file(where=d, name='test.html'):
+    ...             pass
+    ...         time.sleep(0.1)
+    >>> 'test.html' in changed
+    True
+
+    Listeners are called from a thread of the watcher, so they should be
+    thread-safe. If the kernel drops events, the listeners are called with an
+    empty path, meaning anything could have changed.
+
+    Stores which keep caches or indexes of the directory have an
+    ``invalidate()`` method which can be used as listener, as has
+    ``confeitaria.static.page.StaticPage``.
+
+    The watcher is started by ``start()`` (or when used as a context manager)
+    and stopped by ``stop()``. If inotify is not available, ``start()`` raises
+    ``OSError``; ``is_watch_available()`` tells whether it is.
+    """
+
+    def __init__(self, directory, listeners=()):
+        self.directory = decode_name(
+            os.path.realpath(encode_name(directory)),
+            not isinstance(directory, bytes))
+        self.listeners = list(listeners)
+        self.watches = {}
+        self.libc = None
+        self.fd = None
+        self.thread = None
+        self.stop_pipe = None
+
+    def start(self):
+        libc = get_libc()
+
+        if libc is None:
+            raise OSError(errno.ENOSYS, 'inotify is not available')
+
+        fd = libc.inotify_init1(IN_CLOEXEC)
+
+        if fd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, os.strerror(e))
+
+        self.fd = fd
+        self.libc = libc
+        self.stop_pipe = os.pipe()
+        self.add_watches('')
+
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+        return self
+
+    def stop(self):
+        if self.thread is None:
+            return
+
+        os.write(self.stop_pipe[1], b'x')
+        self.thread.join()
+        self.thread = None
+
+        for fd in (self.fd,) + self.stop_pipe:
+            os.close(fd)
+
+        self.fd = self.stop_pipe = None
+        self.watches.clear()
+
+    def run(self):
+        while True:
+            ready, _, _ = select.select([self.fd, self.stop_pipe[0]], [], [])
+
+            if self.stop_pipe[0] in ready:
+                return
+
+            try:
+                data = os.read(self.fd, EVENT_BUFFER_SIZE)
+            except OSError as e:
+                if e.errno in (errno.EINTR, errno.EAGAIN):
+                    continue
+
+                raise
+
+            for path in self.handle(data):
+                self.notify(path)
+
+    def handle(self, data):
+        """
+        Parses the events in ``data``, as read from the inotify file
+        descriptor, and returns the changed paths. New directories are watched
+        as well.
+        """
+        paths = []
+        offset = 0
+
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                paths.append('')
+                continue
+
+            directory = self.watches.get(wd)
+
+            if directory is None:
+                continue
+
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                continue
+
+            text = not isinstance(self.directory, bytes)
+            path = posixpath.join(directory, decode_name(name, text)) \
+                if name else directory
+
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                paths.extend(self.add_watches(path))
+
+            paths.append(path)
+
+        return paths
+
+    def add_watches(self, path):
+        """
+        Watches the directory at ``path`` and all its subdirectories. Returns
+        the paths of the files found in them, since they may have been created
+        before the directories were watched.
+        """
+        found = []
+        text = not isinstance(self.directory, bytes)
+        root = encode_name(self.directory)
+        top = os.path.join(root, *encode_name(path).split(b'/')) if path \
+            else root
+
+        for directory, directory_names, file_names in os.walk(top):
+            relative_path = os.path.relpath(directory, root)
+            relative_path = decode_name(
+                b'' if relative_path == os.curdir.encode() else
+                relative_path.replace(os.sep.encode(), b'/'), text)
+            wd = self.libc.inotify_add_watch(self.fd, directory, WATCH_MASK)
+
+            if wd < 0:
+                continue
+
+            self.watches[wd] = relative_path
+            found.extend(
+                posixpath.join(relative_path, decode_name(n, text))
+                for n in file_names)
+
+        return found
+
+    def notify(self, path):
+        for listener in self.listeners:
+            try:
+                listener(path)
+            except Exception:
+                traceback.print_exc()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
+
+
+def get_libc():
+    """
+    Returns the C library with the inotify functions, or ``None`` if they are
+    not available.
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    except (OSError, AttributeError):
+        return None
+
+    return libc
+
+
+def is_watch_available():
+    """
+    Checks whether directories can be watched in this platform.
+    """
+    return get_libc() is not None
+
+
+def is_affected(request_path, changed_path):
+    """
+    Checks whether a change in the file or directory at ``changed_path`` (as
+    reported by ``Watcher``) can affect what is served for ``request_path``.
+    This happens if both are the same path::
+
+    >>> is_affected('/a/b.html', 'a/b.html')
+    True
+    >>> is_affected('/a/c.html', 'a/b.html')
+    False
+
+    ...if the requested path is inside the changed directory::
+
+    >>> is_affected('/a/b.html', 'a')
+    True
+
+    ...or if the changed path is inside the requested one, since it could be
+    its default file::
+
+    >>> is_affected('/a/', 'a/index.html')
+    True
+
+    An empty changed path means anything could have changed::
+
+    >>> is_affected('/a/b.html', '')
+    True
+
+    Both paths are normalized before being compared::
+
+    >>> is_affected('/x/../a/b.html', 'a/./b.html')
+    True
+    """
+    if not changed_path:
+        return True
+
+    request_path = normalize_path(request_path)
+    changed_path = normalize_path(changed_path)
+
+    return (
+        request_path == changed_path or
+        request_path.startswith(changed_path + '/') or
+        changed_path.startswith(request_path + '/') or
+        not request_path
+    )
+
+
+def normalize_path(path):
+    """
+    Normalizes a path, relative to the watched directory, so paths to the
+    same file are equal::
+
+    >>> normalize_path('/a//b/./c/../d.html')
+    'a/b/d.html'
+    >>> normalize_path('/../a.html'), normalize_path('/')
+    ('a.html', '')
+    """
+    return posixpath.normpath('/' + path).lstrip('/')
+
+
+def encode_name(name):
+    """
+    Encodes a file name to be given to inotify or to the file system. Names
+    are encoded with the file system encoding, or UTF-8 if it is ASCII (as in
+    Python 2 under the C locale). Python 2 has no ``surrogateescape`` error
+    handler, so names that cannot be encoded fail there::
+
+    >>> encode_name(u'a.html') == b'a.html'
+    True
+    """
+    if isinstance(name, bytes):
+        return name
+
+    return name.encode(FILE_SYSTEM_ENCODING, FILE_NAME_ERRORS)
+
+
+def decode_name(name, text=True):
+    """
+    Decodes a file name read from inotify, if ``text`` is true::
+
+    >>> decode_name(b'a.html') == u'a.html'
+    True
+    >>> decode_name(b'a.html', text=False) == b'a.html'
+    True
+    """
+    if not text or not isinstance(name, bytes):
+        return name
+
+    return name.decode(FILE_SYSTEM_ENCODING, FILE_NAME_ERRORS)
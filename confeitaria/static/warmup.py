@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Warms up the caches of a store (and the page cache of the operating system)
+by reading the most requested documents before serving them. The documents
+can be given as a list of paths or found in an access log in the common log
+format.
+"""
+
+import re
+import time
+import collections
+import multiprocessing.pool
+
+try:
+    from urllib.parse import unquote
+except ImportError:
+    from urllib import unquote
+
+from confeitaria.static.store.stat import get_stat
+
+DEFAULT_JOBS = 8
+
+LOG_LINE = re.compile(
+    r'^\S+ \S+ \S+ \[[^\]]*\] "(?P<method>[A-Z]+) (?P<path>\S+)[^"]*" '
+    r'(?P<status>\d{3}) ')
+
+
+def warm_up(store, paths, limit=None, max_size=None, jobs=DEFAULT_JOBS):
+    """
+    Reads the documents from the given paths through the store, so they are
+    cached by it. The paths are ranked by frequency, and only the ``limit``
+    most frequent ones are read, as long as their sizes do not add up to more
+    than ``max_size`` bytes. Returns a dict with the number of documents and
+    bytes read, the number of documents skipped for not fitting in
+    ``max_size``, the number of paths that could not be read and the seconds
+    taken::
+
+    >>> from confeitaria.static.store.fake import FakeStore
+    >>> store = FakeStore({'a.html': 'aaaa', 'b.html': 'bb', 'c.html': 'c'})
+    >>> paths = ['b.html', 'a.html', 'c.html', 'b.html', 'a.html', 'a.html']
+    >>> report = warm_up(store, paths, max_size=5)
+    >>> report['documents'], report['bytes'], report['skipped']
+    (2, 5, 1)
+
+    The documents are read in parallel, by ``jobs`` threads, through the
+    store resolution (so ``/`` is read as ``/index.html`` and a document
+    missing from the first store of an
+    ``confeitaria.static.store.aggregate.AggregateStore`` is read from the
+    next one). Paths that are not found are counted as failed, and do not
+    stop the warm-up.
+    """
+    start = time.time()
+    ranked = rank_paths(paths, limit)
+    pool = multiprocessing.pool.ThreadPool(processes=max(1, jobs))
+
+    try:
+        sizes = pool.map(lambda path: get_size(store, path), ranked)
+        selected = select_paths(ranked, sizes, max_size)
+        results = pool.map(lambda path: read(store, path), selected)
+    finally:
+        pool.close()
+        pool.join()
+
+    loaded = [size for size in results if size is not None]
+    found = len([size for size in sizes if size is not None])
+
+    return {
+        'documents': len(loaded),
+        'bytes': sum(loaded),
+        'skipped': found - len(selected),
+        'failed': len(ranked) - len(loaded) - (found - len(selected)),
+        'seconds': time.time() - start
+    }
+
+
+def rank_paths(paths, limit=None):
+    """
+    Returns the distinct paths in decreasing order of frequency, up to
+    ``limit`` of them::
+
+    >>> rank_paths(['a', 'b', 'b', 'c', 'b', 'c'])
+    ['b', 'c', 'a']
+    >>> rank_paths(['a', 'b', 'b', 'c', 'b', 'c'], limit=2)
+    ['b', 'c']
+
+    Paths with the same frequency keep the order of their first occurrence.
+    """
+    counter = collections.Counter()
+    order = {}
+
+    for path in paths:
+        counter[path] += 1
+        order.setdefault(path, len(order))
+
+    ranked = sorted(counter, key=lambda path: (-counter[path], order[path]))
+
+    return ranked if limit is None else ranked[:limit]
+
+
+def select_paths(paths, sizes, max_size=None):
+    """
+    Returns the paths that can be read within ``max_size`` bytes, given their
+    sizes, preferring the first ones. Paths with ``None`` sizes were not
+    found, and are skipped::
+
+    >>> select_paths(['a', 'b', 'c', 'd'], [4, None, 3, 1], max_size=5)
+    ['a', 'd']
+    """
+    selected = []
+    total = 0
+
+    for path, size in zip(paths, sizes):
+        if size is None:
+            continue
+
+        if max_size is not None and total + size > max_size:
+            continue
+
+        selected.append(path)
+        total += size
+
+    return selected
+
+
+def read_log(lines, prefix='/'):
+    """
+    Returns the paths requested in the lines of an access log in the common
+    (or combined) log format. Only successful ``GET`` and ``HEAD`` requests
+    are considered, and query strings are removed::
+
+    >>> log = [
+    ...     '127.0.0.1 - - [10/Oct/2020:13:55:36 +0000] '
+    ...         '"GET /a%20b.html?x=1 HTTP/1.1" 200 2326',
+    ...     '127.0.0.1 - - [10/Oct/2020:13:55:37 +0000] '
+    ...         '"POST /form HTTP/1.1" 200 12',
+    ...     '127.0.0.1 - - [10/Oct/2020:13:55:38 +0000] '
+    ...         '"GET /missing.html HTTP/1.1" 404 0',
+    ...     'garbage',
+    ... ]
+    >>> list(read_log(log))
+    ['a b.html']
+
+    If the page is not served at the root, its path can be given as
+    ``prefix``. Requests outside it are ignored, and the prefix is removed
+    from the returned paths::
+
+    >>> list(read_log(log, prefix='/a'))
+    []
+    """
+    prefix = prefix.rstrip('/') + '/'
+
+    for line in lines:
+        match = LOG_LINE.match(line)
+
+        if match is None:
+            continue
+
+        if match.group('method') not in ('GET', 'HEAD'):
+            continue
+
+        if int(match.group('status')) >= 400:
+            continue
+
+        path = unquote(match.group('path').split('?', 1)[0])
+
+        if path.startswith(prefix):
+            yield path[len(prefix):]
+
+
+def read_log_file(filename, prefix='/'):
+    """
+    Returns the paths requested in an access log file, as ``read_log()``
+    does.
+    """
+    with open(filename) as f:
+        return list(read_log(f, prefix))
+
+
+def get_size(store, path):
+    """
+    Returns the size of a document from the store, or ``None`` if it is not
+    found. If the store does not know the size, zero is returned, so the
+    document is not limited by the size of the warm-up.
+    """
+    try:
+        size = get_stat(store, path).size
+    except ValueError:
+        return None
+
+    return 0 if size is None else size
+
+
+def read(store, path):
+    """
+    Reads a document from the store, returning its size, or ``None`` if it
+    is not found.
+    """
+    try:
+        return len(store.read(path))
+    except ValueError:
+        return None
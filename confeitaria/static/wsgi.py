@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import confeitaria.request
+from confeitaria.responses import Response, OK, MethodNotAllowed
+
+from confeitaria.static.http import get_environ_headers
+from confeitaria.static.store.body import FileBody, to_bytes
+
+
+class StaticApplication(object):
+    """
+    ``StaticApplication`` is a WSGI application serving a ``StaticPage``.
+
+    The Confeitaria server does not make the HTTP request headers available to
+    pages, so features such as conditional requests cannot work through it.
+    ``StaticApplication`` gives the page a request with a ``headers`` dict, so
+    the page can use them. So, given a page...
+
+    ::
+
+    >>> from confeitaria.static.page import StaticPage
+    >>> from confeitaria.static.store.fake import FakeStore
+    >>> page = StaticPage(store=FakeStore({'index.html': 'example'}))
+
+    ...and a function to start the response...
+
+    ::
+
+    >>> def start_response(status, headers):
+    ...     global response
+    ...     response = status, headers
+
+    ...``StaticApplication`` works as any WSGI application::
+
+    >>> app = StaticApplication(page)
+    >>> app({'PATH_INFO': '/index.html'}, start_response)
+    ['example']
+    >>> response[0]
+    '200 OK'
+
+    The headers are then available to the page. If the ``If-None-Match``
+    header matches the entity tag of the document, for example, the page will
+    respond without content::
+
+    >>> etag = dict(response[1])['ETag']
+    >>> environ = {'PATH_INFO': '/index.html', 'HTTP_IF_NONE_MATCH': etag}
+    >>> app(environ, start_response)
+    ['']
+    >>> response[0]
+    '304 Not Modified'
+
+    Unlike the Confeitaria server, ``StaticApplication`` can serve the
+    iterable bodies returned by pages in streaming mode::
+
+    >>> page = StaticPage(
+    ...     store=FakeStore({'index.html': 'example'}), stream=True,
+    ...     chunk_size=4)
+    >>> app = StaticApplication(page)
+    >>> list(app({'PATH_INFO': '/index.html'}, start_response))
+    ['exam', 'ple']
+
+    If the server provides a ``wsgi.file_wrapper`` and the page streams a
+    whole file, the file is given to the wrapper, so the server can send it
+    with its most efficient method (such as ``sendfile()``). Other bodies
+    are given to the server as ``BytesBody`` objects.
+    """
+
+    def __init__(self, page):
+        self.page = page
+
+    def __call__(self, environ, start_response):
+        method = environ.get('REQUEST_METHOD', 'GET')
+        path = environ.get('PATH_INFO', '')
+        query = environ.get('QUERY_STRING', '')
+
+        r = get_response(
+            self.page, method, path, query, get_environ_headers(environ))
+        start_response(r.status_code, list(r.headers))
+        content = get_message(r)
+        content = content if content is not None else ''
+
+        if is_string(content):
+            content = [content]
+        elif 'wsgi.file_wrapper' in environ and is_whole_file(content):
+            content = environ['wsgi.file_wrapper'](
+                content.file, content.chunk_size)
+        elif not isinstance(content, FileBody):
+            content = BytesBody(content)
+
+        return content
+
+
+class BytesBody(object):
+    """
+    ``BytesBody`` yields the chunks of a body as bytes, as WSGI servers
+    expect. Some bodies yield text, or views of mapped files (as
+    ``confeitaria.static.store.archive.ArchiveStore`` streams do), which
+    are only copied here::
+
+    >>> body = BytesBody([memoryview(b'exam'), u'ple'])
+    >>> list(body) == [b'exam', b'ple']
+    True
+
+    Closing it closes the body::
+
+    >>> import io
+    >>> body = BytesBody(FileBody(io.BytesIO(b'abc'), length=3, size=3))
+    >>> body.close()
+    >>> body.body.file.closed
+    True
+    """
+
+    def __init__(self, body):
+        self.body = body
+
+    def __iter__(self):
+        for chunk in self.body:
+            yield to_bytes(chunk)
+
+    def close(self):
+        if hasattr(self.body, 'close'):
+            self.body.close()
+
+
+def get_response(page, method, path, query='', headers=None):
+    """
+    Serves a request to a page, returning the
+    ``confeitaria.responses.Response`` it results in. The page receives a
+    request with the given ``headers`` dict::
+
+    >>> from confeitaria.static.page import StaticPage
+    >>> from confeitaria.static.store.fake import FakeStore
+    >>> page = StaticPage(store=FakeStore({'index.html': 'example'}))
+    >>> r = get_response(page, 'GET', '/index.html')
+    >>> r.status_code, get_message(r)
+    ('200 OK', 'example')
+
+    ``HEAD`` requests get the same headers as ``GET`` requests, but no
+    content::
+
+    >>> r = get_response(page, 'HEAD', '/index.html')
+    >>> r.status_code, get_message(r)
+    ('200 OK', '')
+    >>> dict(r.headers)['Content-Length']
+    '7'
+
+    Other methods are not accepted::
+
+    >>> get_response(page, 'POST', '/index.html').status_code
+    '405 Method Not Allowed'
+    """
+    url = path + ('?' + query if query else '')
+    request = confeitaria.request.Request(
+        page=page, path=path, page_path='', args_path=path, url=url,
+        method=method)
+    request.headers = headers if headers is not None else {}
+
+    try:
+        if method not in ('GET', 'HEAD'):
+            raise MethodNotAllowed(message='')
+
+        page.set_request(request)
+        content = page.index()
+
+        raise OK(message=content, headers=[('Content-type', 'text/html')])
+    except Response as r:
+        if method == 'HEAD':
+            set_message(r, '')
+
+        return r
+
+
+def get_message(response):
+    """
+    Returns the content of a ``confeitaria.responses.Response``. Python 3
+    exceptions have no ``message`` attribute, so it is read from the
+    arguments of the exception::
+
+    >>> get_message(OK(message='example'))
+    'example'
+    """
+    return response.args[0] if response.args else None
+
+
+def set_message(response, message):
+    """
+    Replaces the content of a ``confeitaria.responses.Response``, closing the
+    previous one if it is a body with open files::
+
+    >>> import io
+    >>> body = FileBody(io.BytesIO(b'abc'), length=3, size=3)
+    >>> r = OK(message=body)
+    >>> set_message(r, '')
+    >>> get_message(r), body.file.closed
+    ('', True)
+    """
+    previous = get_message(response)
+
+    if hasattr(previous, 'close'):
+        previous.close()
+
+    response.args = (message,) + response.args[1:]
+    response.message = message
+
+
+def is_whole_file(content):
+    """
+    Checks whether the content is a ``FileBody`` going up to the end of its
+    file, so it can be given to the ``wsgi.file_wrapper`` of the server::
+
+    >>> import io
+    >>> is_whole_file(FileBody(io.BytesIO(b'abc'), length=3, size=3))
+    True
+    >>> is_whole_file(FileBody(io.BytesIO(b'abc'), length=2, size=3))
+    False
+    >>> is_whole_file(['abc'])
+    False
+    """
+    return isinstance(content, FileBody) and content.is_whole_file()
+
+
+def is_string(value):
+    """
+    Checks whether the value is a string, as opposed to other iterables::
+
+    >>> is_string('abc'), is_string(u'abc'), is_string(['abc'])
+    (True, True, False)
+    """
+    return isinstance(value, (bytes, type(u'')))
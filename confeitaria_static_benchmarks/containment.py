@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Compares the number of ``lstat()`` system calls needed to check whether a
+path is inside the directory of a ``FileStore``, in the current
+implementation and in the former one, which resolved every ancestor of the
+path. Run it with::
+
+    $ python -m confeitaria_static_benchmarks.containment
+"""
+
+import os
+import sys
+import timeit
+import contextlib
+
+from inelegant.fs import temp_dir, temp_file
+
+from confeitaria.static.store.file import FileStore, is_root
+
+
+def recursive_is_parent(parent_path, path):
+    """
+    The former implementation of ``confeitaria.static.store.file.is_parent()``,
+    kept for comparison. It resolves the parent path and each ancestor of the
+    path.
+    """
+    parent_path = os.path.realpath(parent_path)
+    path = os.path.realpath(path)
+
+    if parent_path == path:
+        return True
+    elif is_root(path):
+        return False
+    else:
+        return recursive_is_parent(parent_path, os.path.dirname(path))
+
+
+@contextlib.contextmanager
+def counting_lstat():
+    """
+    Counts the calls to ``os.lstat()`` made inside the context. Yields a list
+    whose only item is the count.
+    """
+    count = [0]
+    original = os.lstat
+
+    def lstat(*args, **kwargs):
+        count[0] += 1
+
+        return original(*args, **kwargs)
+
+    os.lstat = lstat
+
+    try:
+        yield count
+    finally:
+        os.lstat = original
+
+
+def count_lstat(function, *args):
+    """
+    Returns how many times ``os.lstat()`` is called by the function.
+    """
+    with counting_lstat() as count:
+        function(*args)
+
+    return count[0]
+
+
+def run(depths=(1, 5, 10, 20, 40), repeat=1000, output=sys.stdout):
+    """
+    Prints, for paths of each depth, the number of ``lstat()`` calls and the
+    time spent by the former and the current containment checks. The cache of
+    resolved paths of the store is disabled, so every path is resolved anew.
+    """
+    output.write(
+        '{0:>5} {1:>12} {2:>12} {3:>12} {4:>12}\n'.format(
+            'depth', 'old lstat', 'new lstat', 'old usec', 'new usec'))
+
+    for depth in depths:
+        with temp_dir() as d:
+            subdir = os.path.join(d, *['d{0}'.format(i) for i in range(depth)])
+            os.makedirs(subdir)
+
+            with temp_file(where=subdir, name='a.txt', content='a') as f:
+                store = FileStore(directory=d, resolve_cache_size=0)
+                relative = os.path.relpath(f, d)
+
+                def old():
+                    return recursive_is_parent(d, f)
+
+                def new():
+                    return store.get_path(relative)
+
+                old_time = timeit.timeit(old, number=repeat) / repeat
+                new_time = timeit.timeit(new, number=repeat) / repeat
+
+                output.write(
+                    '{0:>5} {1:>12} {2:>12} {3:>12.1f} {4:>12.1f}\n'.format(
+                        depth, count_lstat(old), count_lstat(new),
+                        old_time * 1e6, new_time * 1e6))
+
+
+if __name__ == '__main__':
+    run()
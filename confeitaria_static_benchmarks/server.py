@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measures the throughput and the latency of a ``StaticPage`` served by
+``confeitaria.server.Server``, requested by many concurrent clients. Run it
+with::
+
+    $ python -m confeitaria_static_benchmarks.server
+"""
+
+import os
+import sys
+import time
+import threading
+import contextlib
+import multiprocessing.pool
+
+import requests
+
+from inelegant.fs import temp_dir
+
+from confeitaria.server import Server
+from confeitaria.static.page import StaticPage
+
+SIZES = (128, 16 * 1024, 1024 * 1024)
+
+
+def run(
+        sizes=SIZES, concurrency=8, number=500, port=8000, cache=True,
+        output=sys.stdout):
+    """
+    Requests a document of each size ``number`` times, by ``concurrency``
+    clients. Returns a list of dicts with the requests per second and the
+    median (``p50``) and 99th percentile (``p99``) latencies, in
+    milliseconds, for each size, and prints a table with them to ``output``
+    (if it is not ``None``).
+    """
+    results = []
+
+    if output is not None:
+        output.write(
+            '{0:>8} {1:>12} {2:>10} {3:>10}\n'.format(
+                'size', 'requests/s', 'p50 ms', 'p99 ms'))
+
+    with temp_dir() as d:
+        for size in sizes:
+            with open(os.path.join(d, '{0}.bin'.format(size)), 'wb') as f:
+                f.write(os.urandom(size))
+
+        server = Server(StaticPage(directory=d, cache=cache), port=port)
+
+        with quiet():
+            server.__enter__()
+
+        try:
+            for size in sizes:
+                url = 'http://localhost:{0}/{1}.bin'.format(port, size)
+                latencies, seconds = request(url, concurrency, number)
+                result = {
+                    'size': size,
+                    'concurrency': concurrency,
+                    'requests_per_second': number / seconds,
+                    'p50': percentile(latencies, 50) * 1000,
+                    'p99': percentile(latencies, 99) * 1000
+                }
+                results.append(result)
+
+                if output is not None:
+                    output.write(
+                        '{size:>8} {requests_per_second:>12.1f} '
+                        '{p50:>10.2f} {p99:>10.2f}\n'.format(**result))
+        finally:
+            server.__exit__(None, None, None)
+
+    return results
+
+
+def request(url, concurrency, number):
+    """
+    Requests the URL ``number`` times, by ``concurrency`` threads. Returns
+    the latencies of the requests and the total time taken, in seconds.
+    """
+    local = threading.local()
+
+    def get(i):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+
+        start = time.time()
+        response = local.session.get(url)
+        response.raise_for_status()
+
+        return time.time() - start
+
+    pool = multiprocessing.pool.ThreadPool(processes=concurrency)
+
+    try:
+        start = time.time()
+        latencies = pool.map(get, range(number), chunksize=1)
+        seconds = time.time() - start
+    finally:
+        pool.close()
+        pool.join()
+
+    return latencies, seconds
+
+
+@contextlib.contextmanager
+def quiet():
+    """
+    Sends the standard output and error to ``/dev/null`` inside the context,
+    so the server process, started in it, does not log every request.
+    """
+    stdout, stderr = sys.stdout, sys.stderr
+
+    with open(os.devnull, 'w') as devnull:
+        sys.stdout = sys.stderr = devnull
+
+        try:
+            yield
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+
+
+def percentile(values, p):
+    """
+    Returns the ``p``-th percentile of the values, by the nearest rank::
+
+    >>> percentile(range(1, 101), 50), percentile(range(1, 101), 99)
+    (50, 99)
+    >>> percentile([3, 1, 2], 50)
+    2
+    """
+    values = sorted(values)
+    rank = int(-(-p * len(values) // 100))
+
+    return values[max(rank, 1) - 1]
+
+
+if __name__ == '__main__':
+    run()
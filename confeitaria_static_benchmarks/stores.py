@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measures how long each store takes to read documents, for documents of many
+sizes, at many depths in the directory tree, with many proportions of
+requests for missing documents. Run it with::
+
+    $ python -m confeitaria_static_benchmarks.stores
+"""
+
+import os
+import sys
+import time
+import contextlib
+
+from inelegant.fs import temp_dir
+
+from confeitaria.static.store.aggregate import AggregateStore
+from confeitaria.static.store.cache import CacheStore
+from confeitaria.static.store.fake import FakeStore
+from confeitaria.static.store.file import FileStore
+from confeitaria.static.store.resource import ResourceStore
+
+SIZES = (128, 16 * 1024, 1024 * 1024)
+DEPTHS = (1, 8)
+HIT_RATIOS = (1.0, 0.5, 0.0)
+
+PACKAGE = 'confeitaria_static_benchmark_site'
+
+
+def run(
+        sizes=SIZES, depths=DEPTHS, hit_ratios=HIT_RATIOS, min_time=0.2,
+        output=sys.stdout):
+    """
+    Measures the reads of each store, for each combination of document size,
+    depth and hit ratio, during at least ``min_time`` seconds each. Returns a
+    list of dicts with the parameters and the results of each measure, and
+    prints a table with them to ``output`` (if it is not ``None``).
+    """
+    results = []
+
+    if output is not None:
+        output.write(
+            '{0:<22} {1:>8} {2:>5} {3:>5} {4:>10} {5:>12}\n'.format(
+                'store', 'size', 'depth', 'hits', 'usec', 'reads/sec'))
+
+    with build_site(sizes, depths) as (site, documents):
+        for name, store in get_stores(site, documents):
+            for size in sizes:
+                for depth in depths:
+                    for hit_ratio in hit_ratios:
+                        paths = get_paths(size, depth, hit_ratio)
+                        reads, seconds = measure(store, paths, min_time)
+                        result = {
+                            'store': name,
+                            'size': size,
+                            'depth': depth,
+                            'hit_ratio': hit_ratio,
+                            'usec': seconds / reads * 1e6,
+                            'reads_per_second': reads / seconds
+                        }
+                        results.append(result)
+
+                        if output is not None:
+                            output.write(
+                                '{store:<22} {size:>8} {depth:>5} '
+                                '{hit_ratio:>5.2f} {usec:>10.1f} '
+                                '{reads_per_second:>12.0f}\n'.format(
+                                    **result))
+
+    return results
+
+
+def measure(store, paths, min_time):
+    """
+    Reads the paths from the store, over and over, for at least ``min_time``
+    seconds. Returns how many reads were done and how long they took.
+    """
+    reads = 0
+    start = time.time()
+
+    while True:
+        for path in paths:
+            try:
+                store.read(path)
+            except ValueError:
+                pass
+
+        reads += len(paths)
+        seconds = time.time() - start
+
+        if seconds >= min_time:
+            return reads, seconds
+
+
+@contextlib.contextmanager
+def build_site(sizes, depths):
+    """
+    Creates, in a temporary directory, an importable package with a site
+    containing a document of each size at each depth. Yields the path of
+    the site and a dict mapping the paths of the documents to their content.
+    """
+    with temp_dir() as d:
+        package = os.path.join(d, PACKAGE)
+        site = os.path.join(package, 'site')
+        documents = {}
+
+        os.makedirs(site)
+        open(os.path.join(package, '__init__.py'), 'w').close()
+
+        for depth in depths:
+            directory = os.path.join(site, get_directory(depth))
+
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+
+            for size in sizes:
+                path = get_path(size, depth)
+                content = os.urandom(size)
+                documents[path] = content
+
+                with open(os.path.join(site, path), 'wb') as f:
+                    f.write(content)
+
+        sys.path.insert(0, d)
+
+        try:
+            yield site, documents
+        finally:
+            sys.path.remove(d)
+            sys.modules.pop(PACKAGE, None)
+
+
+def get_stores(site, documents):
+    """
+    Returns the names and instances of the stores to be measured, all of
+    them serving the same documents.
+    """
+    empty = os.path.join(site, 'empty')
+
+    if not os.path.isdir(empty):
+        os.mkdir(empty)
+
+    return [
+        ('FakeStore', FakeStore(documents)),
+        ('FileStore', FileStore(site)),
+        ('CacheStore', CacheStore(FileStore(site))),
+        ('AggregateStore', AggregateStore(FileStore(empty), FileStore(site))),
+        ('ResourceStore', ResourceStore(PACKAGE, 'site')),
+        ('ResourceStore(index)', ResourceStore(PACKAGE, 'site', index=True)),
+    ]
+
+
+def get_paths(size, depth, hit_ratio, count=100):
+    """
+    Returns ``count`` paths at the given depth, of which ``hit_ratio`` are
+    paths of the document of the given size and the others are missing::
+
+    >>> get_paths(128, 2, 0.5, count=4)
+    ['d0/d1/missing-0.bin', 'd0/d1/128.bin', 'd0/d1/missing-2.bin', \
+'d0/d1/128.bin']
+    """
+    hits = int(round(hit_ratio * count))
+    paths = []
+
+    for i in range(count):
+        if (i + 1) * hits // count > i * hits // count:
+            paths.append(get_path(size, depth))
+        else:
+            paths.append(
+                '/'.join([get_directory(depth), 'missing-{0}.bin'.format(i)]))
+
+    return paths
+
+
+def get_path(size, depth):
+    return '/'.join([get_directory(depth), '{0}.bin'.format(size)])
+
+
+def get_directory(depth):
+    return '/'.join('d{0}'.format(i) for i in range(depth))
+
+
+if __name__ == '__main__':
+    run()
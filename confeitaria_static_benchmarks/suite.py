@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Runs the store and the server benchmarks, writing their results as JSON, and
+optionally compares them to the results of a previous run::
+
+    $ python -m confeitaria_static_benchmarks.suite --output baseline.json
+    $ python -m confeitaria_static_benchmarks.suite --baseline baseline.json
+
+When a baseline is given, measures more than ``--threshold`` (by default,
+10%) slower than in the baseline are reported, and the command exits with
+status 1.
+"""
+
+import sys
+import json
+import platform
+import argparse
+
+from confeitaria_static_benchmarks import server, stores
+
+STORE_KEYS = ('store', 'size', 'depth', 'hit_ratio')
+SERVER_KEYS = ('size', 'concurrency')
+
+
+def run(quick=False, run_server=True, port=8000, output=sys.stderr):
+    """
+    Runs the benchmarks, returning a dict with their results. In ``quick``
+    mode, each measure is shorter and less precise.
+    """
+    results = {
+        'python': platform.python_version(),
+        'stores': stores.run(
+            min_time=0.02 if quick else 0.2, output=output),
+        'server': []
+    }
+
+    if run_server:
+        results['server'] = server.run(
+            number=100 if quick else 1000, port=port, output=output)
+
+    return results
+
+
+def compare(baseline, results, threshold=0.1):
+    """
+    Compares the results with the baseline. Returns a list of tuples with the
+    name of the measure, its value in the baseline and in the results, for
+    each measure slower than in the baseline by more than ``threshold``::
+
+    >>> baseline = {'stores': [
+    ...     {'store': 'FileStore', 'size': 128, 'depth': 1, 'hit_ratio': 1.0,
+    ...      'usec': 10.0}]}
+    >>> results = {'stores': [
+    ...     {'store': 'FileStore', 'size': 128, 'depth': 1, 'hit_ratio': 1.0,
+    ...      'usec': 12.0}]}
+    >>> compare(baseline, results)
+    [('stores FileStore 128 1 1.0 usec', 10.0, 12.0)]
+    >>> compare(baseline, results, threshold=0.5)
+    []
+
+    Measures missing from any of them are ignored.
+    """
+    regressions = []
+    measures = [
+        ('stores', STORE_KEYS, 'usec'),
+        ('server', SERVER_KEYS, 'p50'),
+        ('server', SERVER_KEYS, 'p99'),
+    ]
+
+    for group, keys, field in measures:
+        old = index_results(baseline.get(group, []), keys)
+        new = index_results(results.get(group, []), keys)
+
+        for key in sorted(set(old) & set(new)):
+            old_value, new_value = old[key][field], new[key][field]
+
+            if new_value > old_value * (1 + threshold):
+                name = ' '.join(
+                    [group] + [str(k) for k in key] + [field])
+                regressions.append((name, old_value, new_value))
+
+    return regressions
+
+
+def index_results(results, keys):
+    """
+    Returns a dict mapping the values of ``keys`` in each result to the
+    result::
+
+    >>> index_results([{'size': 1, 'p50': 2.0}], ('size',))
+    {(1,): {'p50': 2.0, 'size': 1}}
+    """
+    return dict(
+        (tuple(result[k] for k in keys), result) for result in results)
+
+
+def main(args):
+    parser = argparse.ArgumentParser(
+        description='Run the Confeitaria Static benchmarks.')
+    parser.add_argument('--output', help='file to write the results to')
+    parser.add_argument('--baseline', help='results to compare with')
+    parser.add_argument(
+        '--threshold', type=float, default=0.1,
+        help='tolerated slowdown, as a fraction (default: 0.1)')
+    parser.add_argument(
+        '--quick', action='store_true', help='run shorter measures')
+    parser.add_argument(
+        '--no-server', action='store_true',
+        help='skip the end-to-end server benchmark')
+    parser.add_argument(
+        '--port', type=int, default=8000,
+        help='port of the server benchmark (default: 8000)')
+    options = parser.parse_args(args)
+
+    results = run(
+        quick=options.quick, run_server=not options.no_server,
+        port=options.port)
+
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(
+                results, f, indent=2, separators=(',', ': '),
+                sort_keys=True)
+    else:
+        json.dump(
+            results, sys.stdout, indent=2, separators=(',', ': '),
+            sort_keys=True)
+        sys.stdout.write('\n')
+
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = compare(baseline, results, options.threshold)
+
+        for name, old_value, new_value in regressions:
+            sys.stderr.write(
+                'Slower: {0}: {1:.2f} -> {2:.2f}\n'.format(
+                    name, old_value, new_value))
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
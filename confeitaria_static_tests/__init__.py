@@ -22,11 +22,32 @@ import unittest
 from inelegant.finder import TestFinder
 
 load_tests = TestFinder(
+    'confeitaria_static_tests.aioserver',
+    'confeitaria_static_tests.bundle',
+    'confeitaria_static_tests.cache_control',
+    'confeitaria_static_tests.compress',
+    'confeitaria_static_tests.content_type',
+    'confeitaria_static_tests.fingerprint',
+    'confeitaria_static_tests.http',
     'confeitaria_static_tests.page',
     'confeitaria_static_tests.store.aggregate',
+    'confeitaria_static_tests.store.aio',
+    'confeitaria_static_tests.store.archive',
+    'confeitaria_static_tests.store.batch',
+    'confeitaria_static_tests.store.body',
+    'confeitaria_static_tests.store.bundle',
+    'confeitaria_static_tests.store.cache',
+    'confeitaria_static_tests.store.error',
     'confeitaria_static_tests.store.fake',
     'confeitaria_static_tests.store.file',
-    'confeitaria_static_tests.store.resource'
+    'confeitaria_static_tests.store.manifest',
+    'confeitaria_static_tests.store.metrics',
+    'confeitaria_static_tests.store.resource',
+    'confeitaria_static_tests.store.stat',
+    'confeitaria_static_tests.store.trace',
+    'confeitaria_static_tests.store.watch',
+    'confeitaria_static_tests.warmup',
+    'confeitaria_static_tests.wsgi'
 ).load_tests
 
 if __name__ == "__main__":
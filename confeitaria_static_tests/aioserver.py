@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import sys
+import unittest
+
+import requests
+
+from inelegant.fs import temp_dir, temp_file
+
+from confeitaria.static.page import StaticPage
+
+
+@unittest.skipIf(sys.version_info < (3, 7), 'asyncio server requires 3.7+')
+class TestAsyncServer(unittest.TestCase):
+
+    def setUp(self):
+        import asyncio
+        from confeitaria.static.aioserver import serve
+
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.serve = serve
+
+    def tearDown(self):
+        import asyncio
+
+        tasks = asyncio.all_tasks(self.loop)
+
+        for task in tasks:
+            task.cancel()
+
+        self.loop.run_until_complete(
+            asyncio.gather(*tasks, return_exceptions=True))
+        self.loop.close()
+
+    def test_serve_page(self):
+        """
+        The server should serve the documents of a page, streaming them.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='index.html', content='example'):
+            page = StaticPage(directory=d, stream=True, chunk_size=2)
+            r = self.get(page, '/index.html')
+
+            self.assertEquals(200, r.status_code)
+            self.assertEquals('example', r.text)
+
+    def test_conditional_request(self):
+        """
+        The server should give the request headers to the page.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='index.html', content='example'):
+            page = StaticPage(directory=d, stream=True)
+            etag = self.get(page, '/index.html').headers['ETag']
+            r = self.get(page, '/index.html', {'If-None-Match': etag})
+
+            self.assertEquals(304, r.status_code)
+
+    def test_not_found(self):
+        """
+        The server should respond with 404 to missing documents.
+        """
+        with temp_dir() as d:
+            page = StaticPage(directory=d, stream=True)
+
+            self.assertEquals(404, self.get(page, '/nofile.html').status_code)
+
+    def test_send_file(self):
+        """
+        The server should send whole files and ranges of files, including
+        binary ones, directly from the file.
+        """
+        content = b'\x00\r\n\xff' * 100000
+
+        with temp_dir() as d:
+            with open(os.path.join(d, 'a.bin'), 'wb') as f:
+                f.write(content)
+
+            page = StaticPage(directory=d, stream=True)
+            r = self.get(page, '/a.bin')
+            partial = self.get(page, '/a.bin', {'Range': 'bytes=4-9'})
+
+            self.assertEquals(content, r.content)
+            self.assertEquals(206, partial.status_code)
+            self.assertEquals(content[4:10], partial.content)
+
+    def test_range(self):
+        """
+        The server should send the requested ranges of the documents.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.txt', content='0123456789'):
+            page = StaticPage(directory=d)
+            r = self.get(page, '/a.txt', {'Range': 'bytes=0-1,8-9'})
+
+            self.assertEquals(206, r.status_code)
+            self.assertIn('\r\n01\r\n', r.text)
+            self.assertIn('\r\n89\r\n', r.text)
+
+    def test_head(self):
+        """
+        The server should answer ``HEAD`` requests without content.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='index.html', content='example'):
+            page = StaticPage(directory=d, stream=True)
+            r = self.get(page, '/index.html', method='HEAD')
+
+            self.assertEquals(200, r.status_code)
+            self.assertEquals('7', r.headers['Content-Length'])
+            self.assertEquals('', r.text)
+
+    def test_quoted_path(self):
+        """
+        The server should unquote the paths of the requests.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a b.html', content='example'):
+            page = StaticPage(directory=d, stream=True)
+            r = self.get(page, '/a%20b.html')
+
+            self.assertEquals(200, r.status_code)
+            self.assertEquals('example', r.text)
+
+    def test_internal_server_error(self):
+        """
+        The server should respond with 500 if the page fails unexpectedly.
+        """
+        from contextlib import redirect_stderr
+
+        class FailingStore(object):
+            def stat(self, path):
+                raise IOError('Unexpected error')
+
+        page = StaticPage(store=FailingStore())
+
+        with redirect_stderr(io.StringIO()):
+            r = self.get(page, '/index.html')
+
+        self.assertEquals(500, r.status_code)
+
+    def test_keep_alive_after_body(self):
+        """
+        The server should discard the bodies of requests, so the next
+        request of a kept alive connection is read correctly.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='index.html', content='example'):
+            page = StaticPage(directory=d)
+
+            def post_and_get(url):
+                with requests.Session() as session:
+                    r = session.post(url + '/index.html', data='a=1')
+                    return r, session.get(url + '/index.html')
+
+            r1, r2 = self.call(page, post_and_get)
+
+            self.assertEquals(405, r1.status_code)
+            self.assertNotEquals('close', r1.headers.get('Connection'))
+            self.assertEquals(200, r2.status_code)
+            self.assertEquals('example', r2.text)
+
+    def get(self, page, path, headers=None, method='GET'):
+        """
+        Serves the page in a free port and requests the path from it, asking
+        the server to close the connection afterwards.
+        """
+        headers = dict(headers or {}, Connection='close')
+
+        return self.call(
+            page,
+            lambda url: requests.request(method, url + path, headers=headers))
+
+    def call(self, page, function):
+        """
+        Serves the page in a free port and calls the function, in another
+        thread, with the URL of the server.
+        """
+        server = self.loop.run_until_complete(
+            self.serve(page, 'localhost', 0))
+        port = server.sockets[0].getsockname()[1]
+        url = 'http://localhost:{0}'.format(port)
+
+        try:
+            return self.loop.run_until_complete(
+                self.loop.run_in_executor(None, lambda: function(url)))
+        finally:
+            server.close()
+            self.loop.run_until_complete(server.wait_closed())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import os.path
+import sys
+import zipfile
+import unittest
+import contextlib
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from inelegant.finder import TestFinder
+from inelegant.fs import temp_dir, temp_file
+
+from confeitaria.static.bundle import build_bundle, main
+from confeitaria.static.store.bundle import BUNDLE_INDEX, BundleStore
+
+from confeitaria_static_tests.compress import gunzip
+
+
+class TestBuildBundle(unittest.TestCase):
+
+    def test_build_in_parallel(self):
+        """
+        The bundle should have all documents, even when built by many
+        processes, and gzipped siblings of the compressible ones.
+        """
+        content = 'body { color: red; }' * 100
+
+        with temp_dir() as d, \
+                temp_dir(where=d, name='sub') as sub, \
+                temp_file(where=d, name='index.html', content='index'), \
+                temp_file(where=sub, name='a.css', content=content):
+            archive = os.path.join(d, 'site.zip')
+            build_bundle(d, archive, jobs=2)
+
+            with contextlib.closing(zipfile.ZipFile(archive)) as z:
+                self.assertEquals(
+                    ['index.html', 'sub/a.css', 'sub/a.css.gz', BUNDLE_INDEX],
+                    [i.filename for i in z.infolist()])
+                self.assertEquals(content, gunzip(z.read('sub/a.css.gz')))
+                self.assertEquals(
+                    set([zipfile.ZIP_STORED]),
+                    set(i.compress_type for i in z.infolist()[:-1]))
+
+    def test_gzipped_document_not_replaced(self):
+        """
+        If the directory already has a document with the name of a gzipped
+        sibling, this document should be bundled instead of the sibling.
+        """
+        content = 'body { color: red; }' * 100
+
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.css', content=content), \
+                temp_file(where=d, name='a.css.gz', content='precompressed'):
+            archive = os.path.join(d, 'site.zip')
+            report = build_bundle(d, archive, jobs=1)
+
+            with contextlib.closing(zipfile.ZipFile(archive)) as z:
+                self.assertEquals(
+                    ['a.css', 'a.css.gz', BUNDLE_INDEX],
+                    [i.filename for i in z.infolist()])
+                self.assertEquals(b'precompressed', z.read('a.css.gz'))
+
+            self.assertEquals(0, report['compressed'])
+
+    def test_output_not_bundled(self):
+        """
+        If the bundle is in the directory, an older version of it should not
+        be bundled.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='index.html', content='index'):
+            archive = os.path.join(d, 'site.zip')
+            build_bundle(d, archive, jobs=1)
+            build_bundle(d, archive, jobs=1)
+
+            store = BundleStore(archive)
+
+            try:
+                with self.assertRaises(ValueError):
+                    store.read('site.zip')
+            finally:
+                store.close()
+
+    def test_reserved_name(self):
+        """
+        A document named as the index of the bundle should not be bundled,
+        and no bundle should be written.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name=BUNDLE_INDEX, content='a'):
+            archive = os.path.join(d, 'site.zip')
+
+            with self.assertRaises(ValueError):
+                build_bundle(d, archive, jobs=1)
+
+            self.assertFalse(os.path.exists(archive))
+
+    def test_main(self):
+        """
+        The command line should build a bundle.
+        """
+        with temp_dir() as d, temp_dir() as output_dir, \
+                temp_file(where=d, name='index.html', content='index'):
+            archive = os.path.join(output_dir, 'site.zip')
+            stdout = sys.stdout
+            sys.stdout = StringIO()
+
+            try:
+                self.assertEquals(0, main([d, archive, '--jobs', '1']))
+                self.assertIn('1 documents', sys.stdout.getvalue())
+            finally:
+                sys.stdout = stdout
+
+            store = BundleStore(archive)
+
+            try:
+                self.assertEquals('index', store.read(''))
+            finally:
+                store.close()
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.bundle'
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from inelegant.finder import TestFinder
+
+from confeitaria.static import cache_control
+from confeitaria.static.cache_control import CachePolicy, CachePolicyMap
+
+
+class TestCachePolicyMap(unittest.TestCase):
+
+    def test_first_match(self):
+        """
+        The first matching pattern should give the policy.
+        """
+        policies = CachePolicyMap([
+            ('/static/*.html', 'no-cache'),
+            ('/static/', 'max-age=60'),
+            ('*.html', 'no-store'),
+        ])
+
+        self.assertEquals(
+            'no-cache', policies.get('/static/a.html').cache_control)
+        self.assertEquals(
+            'max-age=60', policies.get('/static/b/a.html').cache_control)
+        self.assertEquals('no-store', policies.get('a.html').cache_control)
+        self.assertIsNone(policies.get('/a.css'))
+
+    def test_patterns(self):
+        """
+        ``*`` and ``?`` should not match ``/``, but ``**`` should.
+        """
+        policies = CachePolicyMap([
+            ('/a/?.css', 'one'),
+            ('/a/*.css', 'any'),
+            ('/b/**/c.css', 'deep'),
+        ])
+
+        self.assertEquals('one', policies.get('/a/x.css').cache_control)
+        self.assertEquals('any', policies.get('/a/xy.css').cache_control)
+        self.assertIsNone(policies.get('/a/x/y.css'))
+        self.assertEquals('deep', policies.get('/b/c.css').cache_control)
+        self.assertEquals('deep', policies.get('/b/x/y/c.css').cache_control)
+        self.assertIsNone(policies.get('/b/c.css.map'))
+
+    def test_special_characters(self):
+        """
+        Characters special in regular expressions should match themselves.
+        """
+        policies = CachePolicyMap([('/a+b/(c).css', 'literal')])
+
+        self.assertEquals(
+            'literal', policies.get('/a+b/(c).css').cache_control)
+        self.assertIsNone(policies.get('/aab/c.css'))
+
+    def test_many_patterns(self):
+        """
+        More patterns than a single regular expression can hold should be
+        matched in order.
+        """
+        patterns = [
+            ('/{0}.css'.format(i), str(i))
+            for i in range(cache_control.MAX_GROUPS * 2 + 5)
+        ]
+        policies = CachePolicyMap(patterns + [('*.css', 'last')])
+
+        self.assertEquals(3, len(policies.expressions))
+        self.assertEquals('0', policies.get('/0.css').cache_control)
+        self.assertEquals('150', policies.get('/150.css').cache_control)
+        self.assertEquals('last', policies.get('/x.css').cache_control)
+
+    def test_cache(self):
+        """
+        The policy of each path should be found only once.
+        """
+        policies = CachePolicyMap([('*.css', 'max-age=60')])
+        policy = policies.get('/a.css')
+        policies.policies = [('*.css', CachePolicy('changed'))]
+
+        self.assertIs(policy, policies.get('/a.css'))
+
+    def test_policy_without_cache_control(self):
+        """
+        A policy may only give an ``Expires`` header.
+        """
+        headers = CachePolicy(expires=60).get_headers(now=0)
+
+        self.assertEquals(
+            [('Expires', 'Thu, 01 Jan 1970 00:01:00 GMT')], headers)
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.cache_control'
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+import io
+import gzip
+import unittest
+
+from inelegant.finder import TestFinder
+
+from confeitaria.static.compress import GzipBody, gzip_content
+from confeitaria.static.store.body import ContentBody
+
+
+class TestGzipBody(unittest.TestCase):
+
+    def test_same_as_gzip_content(self):
+        """
+        ``GzipBody`` should produce the same content as ``gzip_content()``.
+        """
+        content = 'example ' * 10000
+        body = GzipBody(ContentBody(content, chunk_size=1000), level=9)
+
+        self.assertEquals(gzip_content(content, level=9), ''.join(body))
+
+    def test_empty_body(self):
+        """
+        ``GzipBody`` should produce a valid gzip content from an empty body.
+        """
+        compressed = ''.join(GzipBody(ContentBody('')))
+
+        self.assertEquals('', gunzip(compressed))
+
+
+def gunzip(content):
+    """
+    Decompresses a gzip content.
+    """
+    return gzip.GzipFile(fileobj=io.BytesIO(content)).read()
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.compress'
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
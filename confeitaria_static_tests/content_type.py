@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from inelegant.finder import TestFinder
+
+from confeitaria.static.content_type import ContentTypeMap
+
+
+class TestContentTypeMap(unittest.TestCase):
+
+    def test_type_computed_once_per_extension(self):
+        """
+        The type of an extension should be computed only once.
+        """
+        types = ContentTypeMap()
+        types.get('a.css')
+        types.types['.css'] = 'text/plain'
+
+        self.assertEquals('text/css; charset=utf-8', types.get('b.css'))
+
+    def test_no_charset(self):
+        """
+        If the charset is ``None``, no charset parameter should be added.
+        """
+        types = ContentTypeMap(charset=None)
+
+        self.assertEquals('text/html', types.get('index.html'))
+
+    def test_default(self):
+        """
+        The default type of unknown extensions can be changed.
+        """
+        types = ContentTypeMap(default='text/plain')
+
+        self.assertEquals('text/plain; charset=utf-8', types.get('a.qqq'))
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.content_type'
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+import unittest
+
+from inelegant.finder import TestFinder
+from inelegant.fs import temp_dir, temp_file
+
+from confeitaria.static.fingerprint import FingerprintMap
+from confeitaria.static.store.fake import FakeStore
+from confeitaria.static.store.file import FileStore
+
+
+class TestFingerprintMap(unittest.TestCase):
+
+    def test_content_change(self):
+        """
+        The fingerprint should change when the content does, and former
+        fingerprints should no longer be resolved.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='app.js', content='a') as f:
+            fingerprints = FingerprintMap(FileStore(d))
+            old_url = fingerprints.get_url('app.js')
+
+            with open(f, 'w') as g:
+                g.write('b')
+
+            os.utime(f, (time.time() + 10, time.time() + 10))
+            new_url = fingerprints.get_url('app.js')
+
+            self.assertNotEquals(old_url, new_url)
+            self.assertIsNone(fingerprints.resolve(old_url))
+            self.assertEquals('app.js', fingerprints.resolve(new_url))
+
+    def test_computed_once(self):
+        """
+        The fingerprint of a version of a document should be computed only
+        once.
+        """
+        store = ReadCountingStore({'app.js': b'a'})
+        fingerprints = FingerprintMap(store)
+
+        url = fingerprints.get_url('app.js')
+        fingerprints.get_url('app.js')
+        fingerprints.resolve(url)
+
+        self.assertEquals(1, store.reads)
+
+    def test_length(self):
+        """
+        The length of the fingerprints can be chosen.
+        """
+        fingerprints = FingerprintMap(FakeStore({'a.css': b'a'}), length=12)
+        url = fingerprints.get_url('a.css')
+
+        self.assertEquals('a.86f7e437faa5.css', url)
+        self.assertEquals('a.css', fingerprints.resolve(url))
+        self.assertIsNone(fingerprints.resolve('a.86f7e437.css'))
+
+    def test_missing_document(self):
+        """
+        Fingerprints of missing documents should fail as the store does, and
+        should not be resolved.
+        """
+        fingerprints = FingerprintMap(FakeStore({}))
+
+        with self.assertRaises(ValueError):
+            fingerprints.get_url('a.css')
+
+        self.assertIsNone(fingerprints.resolve('a.86f7e437.css'))
+
+
+class ReadCountingStore(FakeStore):
+
+    def __init__(self, *args, **kwargs):
+        FakeStore.__init__(self, *args, **kwargs)
+        self.reads = 0
+
+    def read(self, path):
+        self.reads += 1
+
+        return FakeStore.read(self, path)
+
+
+load_tests = TestFinder(__name__, 'confeitaria.static.fingerprint').load_tests
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+import unittest
+
+from inelegant.finder import TestFinder
+
+from confeitaria.static.http import parse_etags, etag_matches
+
+
+class TestETags(unittest.TestCase):
+
+    def test_parse_malformed_etags(self):
+        """
+        ``parse_etags()`` should return the valid entity tags found before
+        any malformed one.
+        """
+        self.assertEquals(['"a"'], parse_etags('"a", b, "c"'))
+        self.assertEquals(['"a"'], parse_etags('"a", "b'))
+        self.assertEquals([], parse_etags(''))
+
+    def test_strong_comparison(self):
+        """
+        Weak entity tags never match in a strong comparison.
+        """
+        self.assertFalse(etag_matches('W/"a"', 'W/"a"', weak=False))
+        self.assertTrue(etag_matches('"a"', '"a"', weak=False))
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.http',
+    'confeitaria.static.responses'
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,16 +17,23 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
 import unittest
 import requests
 
 from inelegant.fs import temp_file, temp_dir
 from inelegant.finder import TestFinder
 
+from confeitaria.static.cache_control import CachePolicy
 from confeitaria.static.page import StaticPage
 from confeitaria.server import Server
+from confeitaria.request import Request
+from confeitaria.responses import Response
 
 from confeitaria.static.store.file import FileStore
+from confeitaria.static.store.fake import FakeStore
+
+from confeitaria_static_tests.compress import gunzip
 
 
 class TestStaticPage(unittest.TestCase):
@@ -155,6 +162,671 @@ class TestStaticPage(unittest.TestCase):
                 self.assertEquals(200, r.status_code)
                 self.assertEquals('example', r.text)
 
+    def test_page_can_cache_content(self):
+        """
+        This tests ensure that ``StaticPage`` can keep the served content in
+        memory, and that edited files are served updated.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='index.html', content='example') as f:
+
+            page = StaticPage(directory=d, cache=True)
+
+            with Server(page):
+                r = requests.get('http://localhost:8000/index.html')
+
+                self.assertEquals(200, r.status_code)
+                self.assertEquals('example', r.text)
+
+                with open(f, 'w') as fd:
+                    fd.write('modified')
+
+                r = requests.get('http://localhost:8000/index.html')
+
+                self.assertEquals(200, r.status_code)
+                self.assertEquals('modified', r.text)
+
+    def test_page_sends_etag(self):
+        """
+        This tests ensure that ``StaticPage`` sends an entity tag for the
+        documents it serves.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='index.html', content='example') as f:
+
+            page = StaticPage(directory=d)
+
+            with Server(page):
+                r1 = requests.get('http://localhost:8000/index.html')
+                r2 = requests.get('http://localhost:8000/index.html')
+
+                self.assertEquals(200, r1.status_code)
+                self.assertTrue(r1.headers['etag'])
+                self.assertEquals(r1.headers['etag'], r2.headers['etag'])
+
+    def test_page_not_modified(self):
+        """
+        This tests ensure that ``StaticPage`` responds with ``304 Not
+        Modified``, without reading the document, if the ``If-None-Match``
+        header matches its entity tag.
+        """
+        store = ReadCountingStore({'index.html': 'example'})
+        page = StaticPage(store=store)
+
+        response = get_response(page, '/index.html')
+        etag = dict(response.headers)['ETag']
+
+        self.assertEquals('200 OK', response.status_code)
+        self.assertEquals(1, store.reads)
+
+        response = get_response(
+            page, '/index.html', headers={'If-None-Match': etag})
+
+        self.assertEquals('304 Not Modified', response.status_code)
+        self.assertEquals('', response.message)
+        self.assertEquals(etag, dict(response.headers)['ETag'])
+        self.assertEquals(1, store.reads)
+
+        response = get_response(
+            page, '/index.html', headers={'If-None-Match': '"other"'})
+
+        self.assertEquals('200 OK', response.status_code)
+        self.assertEquals('example', response.message)
+        self.assertEquals(2, store.reads)
+
+    def test_page_not_modified_since(self):
+        """
+        This tests ensure that ``StaticPage`` sends the ``Last-Modified``
+        header and responds with ``304 Not Modified`` if the document was not
+        modified since the date in the ``If-Modified-Since`` header.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='index.html', content='example') as f:
+
+            page = StaticPage(directory=d)
+            response = get_response(page, '/index.html')
+            last_modified = dict(response.headers)['Last-Modified']
+
+            self.assertEquals('200 OK', response.status_code)
+
+            response = get_response(
+                page, '/index.html',
+                headers={'If-Modified-Since': last_modified})
+
+            self.assertEquals('304 Not Modified', response.status_code)
+
+            response = get_response(
+                page, '/index.html',
+                headers={'If-Modified-Since': 'Thu, 01 Jan 1970 00:00:00 GMT'})
+
+            self.assertEquals('200 OK', response.status_code)
+
+    def test_page_sends_content_length(self):
+        """
+        This tests ensure that ``StaticPage`` sends the length of the
+        documents it serves.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='index.html', content='example') as f:
+
+            page = StaticPage(directory=d)
+
+            with Server(page):
+                r = requests.get('http://localhost:8000/index.html')
+
+                self.assertEquals('7', r.headers['content-length'])
+
+    def test_page_streams_content(self):
+        """
+        This tests ensure that ``StaticPage`` returns an iterable reading the
+        document in chunks if in streaming mode.
+        """
+        content = 'example' * 1000
+
+        with temp_dir() as d, \
+                temp_file(where=d, name='index.html', content=content) as f:
+
+            page = StaticPage(directory=d, stream=True, chunk_size=1024)
+            response = get_response(page, '/index.html')
+            body = response.message
+
+            try:
+                chunks = list(body)
+            finally:
+                body.close()
+
+            self.assertEquals('200 OK', response.status_code)
+            self.assertEquals(
+                str(len(content)), dict(response.headers)['Content-Length'])
+            self.assertEquals(content, ''.join(chunks))
+            self.assertEquals(7, len(chunks))
+
+    def test_page_serves_range(self):
+        """
+        This tests ensure that ``StaticPage`` serves only the requested range
+        of a document.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.txt', content='0123456789') as f:
+
+            page = StaticPage(directory=d)
+            response = get_response(
+                page, '/a.txt', headers={'Range': 'bytes=2-5'})
+            headers = dict(response.headers)
+
+            self.assertEquals('206 Partial Content', response.status_code)
+            self.assertEquals('2345', response.message)
+            self.assertEquals('bytes 2-5/10', headers['Content-Range'])
+            self.assertEquals('4', headers['Content-Length'])
+
+    def test_page_serves_range_streaming(self):
+        """
+        This tests ensure that ``StaticPage`` streams only the requested range
+        of a document in streaming mode.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.txt', content='0123456789') as f:
+
+            page = StaticPage(directory=d, stream=True)
+            response = get_response(
+                page, '/a.txt', headers={'Range': 'bytes=-3'})
+            body = response.message
+
+            try:
+                content = ''.join(body)
+            finally:
+                body.close()
+
+            self.assertEquals('206 Partial Content', response.status_code)
+            self.assertEquals('789', content)
+            self.assertEquals(
+                'bytes 7-9/10', dict(response.headers)['Content-Range'])
+
+    def test_page_serves_multiple_ranges(self):
+        """
+        This tests ensure that ``StaticPage`` serves many ranges of a document
+        as a ``multipart/byteranges`` content.
+        """
+        page = StaticPage(store=FakeStore({'a.txt': '0123456789'}))
+        response = get_response(
+            page, '/a.txt', headers={'Range': 'bytes=0-1,8-'})
+        headers = dict(response.headers)
+        content_type = headers['Content-type']
+        boundary = content_type.split('boundary=')[1]
+
+        self.assertEquals('206 Partial Content', response.status_code)
+        self.assertTrue(content_type.startswith('multipart/byteranges;'))
+        self.assertEquals(
+            str(len(response.message)), headers['Content-Length'])
+
+        parts = response.message.split('--' + boundary)
+
+        self.assertEquals(4, len(parts))
+        self.assertIn('Content-Range: bytes 0-1/10', parts[1])
+        self.assertTrue(parts[1].endswith('\r\n\r\n01\r\n'))
+        self.assertIn('Content-Range: bytes 8-9/10', parts[2])
+        self.assertTrue(parts[2].endswith('\r\n\r\n89\r\n'))
+        self.assertEquals('--\r\n', parts[3])
+
+    def test_page_range_not_satisfiable(self):
+        """
+        This tests ensure that ``StaticPage`` responds with ``416 Range Not
+        Satisfiable`` if no requested range can be served.
+        """
+        page = StaticPage(store=FakeStore({'a.txt': '0123456789'}))
+        response = get_response(
+            page, '/a.txt', headers={'Range': 'bytes=10-20'})
+
+        self.assertEquals('416 Range Not Satisfiable', response.status_code)
+        self.assertEquals(
+            'bytes */10', dict(response.headers)['Content-Range'])
+
+    def test_page_if_range(self):
+        """
+        This tests ensure that ``StaticPage`` serves the whole document if the
+        ``If-Range`` header does not match it.
+        """
+        page = StaticPage(store=FakeStore({'a.txt': '0123456789'}))
+        response = get_response(
+            page, '/a.txt', headers={'Range': 'bytes=2-5', 'If-Range': '"x"'})
+
+        self.assertEquals('200 OK', response.status_code)
+        self.assertEquals('0123456789', response.message)
+
+        etag = dict(response.headers)['ETag']
+        response = get_response(
+            page, '/a.txt', headers={'Range': 'bytes=2-5', 'If-Range': etag})
+
+        self.assertEquals('206 Partial Content', response.status_code)
+        self.assertEquals('2345', response.message)
+
+    def test_page_serves_precompressed_siblings(self):
+        """
+        This tests ensure that ``StaticPage`` serves the precompressed sibling
+        of a document if the client accepts its content coding.
+        """
+        page = StaticPage(store=FakeStore({
+            'app.js': 'plain', 'app.js.gz': 'gzipped', 'app.js.br': 'brotli'
+        }))
+
+        response = get_response(
+            page, '/app.js', headers={'Accept-Encoding': 'gzip'})
+        headers = dict(response.headers)
+
+        self.assertEquals('gzipped', response.message)
+        self.assertEquals('gzip', headers['Content-Encoding'])
+        self.assertEquals('Accept-Encoding', headers['Vary'])
+
+        response = get_response(
+            page, '/app.js', headers={'Accept-Encoding': 'gzip, br'})
+
+        self.assertEquals('brotli', response.message)
+        self.assertEquals('br', dict(response.headers)['Content-Encoding'])
+
+        response = get_response(page, '/app.js')
+        headers = dict(response.headers)
+
+        self.assertEquals('plain', response.message)
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEquals('Accept-Encoding', headers['Vary'])
+
+    def test_page_remembers_precompressed_siblings(self):
+        """
+        This tests ensure that ``StaticPage`` only looks for precompressed
+        siblings of a document once.
+        """
+        store = StatCountingStore({'app.js': 'plain'})
+        page = StaticPage(store=store)
+
+        get_response(page, '/app.js', headers={'Accept-Encoding': 'gzip'})
+        stats = store.stats
+
+        response = get_response(
+            page, '/app.js', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEquals('plain', response.message)
+        self.assertNotIn('Vary', dict(response.headers))
+        self.assertEquals(stats + 1, store.stats)
+
+    def test_page_compresses_content(self):
+        """
+        This tests ensure that ``StaticPage`` compresses compressible
+        documents if the client accepts it, and compresses each document only
+        once.
+        """
+        content = 'body { color: red; }' * 100
+        store = ReadCountingStore({'a.css': content})
+        page = StaticPage(store=store)
+
+        for i in range(2):
+            response = get_response(
+                page, '/a.css', headers={'Accept-Encoding': 'gzip'})
+            headers = dict(response.headers)
+
+            self.assertEquals(content, gunzip(response.message))
+            self.assertEquals('gzip', headers['Content-Encoding'])
+            self.assertEquals('Accept-Encoding', headers['Vary'])
+            self.assertEquals(
+                str(len(response.message)), headers['Content-Length'])
+
+        self.assertEquals(1, store.reads)
+
+        etag = headers['ETag']
+        response = get_response(
+            page, '/a.css',
+            headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+
+        self.assertEquals('304 Not Modified', response.status_code)
+
+        response = get_response(page, '/a.css')
+        headers = dict(response.headers)
+
+        self.assertEquals(content, response.message)
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertNotEquals(etag, headers['ETag'])
+
+    def test_page_does_not_compress_for_head(self):
+        """
+        ``HEAD`` requests should get the headers of the compressed document
+        without compressing it. The length is only sent if the document was
+        already compressed.
+        """
+        content = 'body { color: red; }' * 100
+        page = StaticPage(store=FakeStore({'a.css': content}))
+        accept = {'Accept-Encoding': 'gzip'}
+
+        r = get_response(page, '/a.css', accept, method='HEAD')
+        headers = dict(r.headers)
+
+        self.assertEquals('gzip', headers['Content-Encoding'])
+        self.assertNotIn('Content-Length', headers)
+        self.assertEquals(0, len(page.compressed_cache))
+
+        length = dict(get_response(page, '/a.css', accept).headers)[
+            'Content-Length']
+        r = get_response(page, '/a.css', accept, method='HEAD')
+
+        self.assertEquals(length, dict(r.headers)['Content-Length'])
+
+    def test_page_does_not_compress_some_documents(self):
+        """
+        This tests ensure that ``StaticPage`` does not compress documents
+        which are too small or whose content type is not compressible.
+        """
+        page = StaticPage(store=FakeStore({
+            'small.css': 'body { color: red; }',
+            'image.png': 'PNG' * 1000
+        }))
+
+        for path in ['/small.css', '/image.png']:
+            response = get_response(
+                page, path, headers={'Accept-Encoding': 'gzip'})
+            headers = dict(response.headers)
+
+            self.assertNotIn('Content-Encoding', headers)
+            self.assertNotIn('Vary', headers)
+
+    def test_page_compresses_streams(self):
+        """
+        This tests ensure that ``StaticPage``, in streaming mode, compresses
+        large documents while sending them.
+        """
+        content = 'body { color: red; }' * 100000
+        page = StaticPage(store=FakeStore({'a.css': content}), stream=True)
+
+        response = get_response(
+            page, '/a.css', headers={'Accept-Encoding': 'gzip'})
+        body = response.message
+
+        try:
+            compressed = ''.join(body)
+        finally:
+            body.close()
+
+        self.assertEquals(content, gunzip(compressed))
+        self.assertNotIn('Content-Length', dict(response.headers))
+
+    def test_page_sends_content_type(self):
+        """
+        This tests ensure that ``StaticPage`` sends the content type of the
+        documents, with the charset of text documents.
+        """
+        page = StaticPage(store=FakeStore({
+            'index.html': 'html', 'app.wasm': 'wasm', 'data': 'data'
+        }))
+        expected = [
+            ('/', 'text/html; charset=utf-8'),
+            ('/app.wasm', 'application/wasm'),
+            ('/data', 'application/octet-stream')
+        ]
+
+        for path, content_type in expected:
+            response = get_response(page, path)
+
+            self.assertEquals(
+                content_type, dict(response.headers)['Content-type'])
+
+    def test_page_content_type_of_precompressed_siblings(self):
+        """
+        This tests ensure that ``StaticPage`` sends the content type of the
+        original document when serving a precompressed sibling.
+        """
+        page = StaticPage(store=FakeStore({
+            'app.js': 'plain', 'app.js.gz': 'gzipped'
+        }))
+
+        response = get_response(
+            page, '/app.js', headers={'Accept-Encoding': 'gzip'})
+        headers = dict(response.headers)
+
+        self.assertEquals('gzip', headers['Content-Encoding'])
+        self.assertEquals(
+            'text/javascript; charset=utf-8', headers['Content-type'])
+
+    def test_page_content_types(self):
+        """
+        This tests ensure that the content types of ``StaticPage`` can be
+        overridden by extension, and the charset can be changed.
+        """
+        page = StaticPage(
+            store=FakeStore({'a.txt': 'a', 'b.mjs': 'b'}),
+            content_types={'.mjs': 'application/javascript'},
+            charset='latin-1')
+
+        self.assertEquals(
+            'text/plain; charset=latin-1',
+            dict(get_response(page, '/a.txt').headers)['Content-type'])
+        self.assertEquals(
+            'application/javascript; charset=latin-1',
+            dict(get_response(page, '/b.mjs').headers)['Content-type'])
+
+    def test_page_metrics_fall_through(self):
+        """
+        The metrics of ``StaticPage`` should tell how often documents are
+        not found in the primary store and come from the secondary one.
+        """
+        page = StaticPage(store=FakeStore({}), metrics=True)
+
+        get_response(page, '/index.html')
+        get_response(page, '/nofile.html')
+
+        primary = page.metrics.get_counters('FakeStore', 'stat')
+        secondary = page.metrics.get_counters('ResourceStore', 'stat')
+        counters = page.metrics.get_counters('StaticPage', 'index')
+
+        self.assertEquals(0, primary.hits)
+        self.assertEquals(1, secondary.hits)
+        self.assertEquals(1, counters.hits)
+        self.assertEquals(1, counters.misses)
+        self.assertTrue(counters.bytes > 0)
+
+    def test_page_metrics_path(self):
+        """
+        ``StaticPage`` should serve its metrics as JSON and Prometheus text at
+        the metrics path.
+        """
+        page = StaticPage(
+            store=FakeStore({'a.html': 'a'}), metrics_path='_metrics')
+
+        get_response(page, '/a.html')
+
+        r = get_response(page, '/_metrics.json')
+        metrics = json.loads(r.message)
+
+        self.assertEquals('200 OK', r.status_code)
+        self.assertEquals(1, metrics['StaticPage']['index']['hits'])
+
+        r = get_response(page, '/_metrics')
+
+        self.assertTrue(
+            dict(r.headers)['Content-type'].startswith('text/plain'))
+        self.assertIn(
+            'confeitaria_static_operations_total{component="StaticPage",'
+            'operation="index",result="hit"} 1', r.message)
+
+    def test_page_without_metrics(self):
+        """
+        Without metrics, the stores of ``StaticPage`` should not be wrapped,
+        and there should be no metrics path.
+        """
+        store = FakeStore({'_metrics': 'document'})
+        page = StaticPage(store=store)
+
+        self.assertIsNone(page.metrics)
+        self.assertIs(store, page.store.primary)
+        self.assertEquals('document', get_response(page, '/_metrics').message)
+
+    def test_page_trace_hooks(self):
+        """
+        The hooks of ``StaticPage`` should receive the spans of its requests,
+        nested in the span of the request.
+        """
+        spans = []
+        page = StaticPage(
+            store=FakeStore({'a.html': 'a'}), trace_hooks=[spans.append])
+
+        get_response(page, '/a.html')
+
+        request = spans[-1]
+        phases = [s.phase for s in spans if s.parent is request]
+
+        self.assertEquals('request', request.phase)
+        self.assertEquals('200 OK', request.error.status_code)
+        self.assertEquals(['stat', 'negotiate', 'content'], phases)
+
+    def test_page_trace_hooks_per_page(self):
+        """
+        The hooks of a ``StaticPage`` should not receive spans of other pages.
+        """
+        spans = []
+        StaticPage(store=FakeStore({}), trace_hooks=[spans.append])
+        page = StaticPage(store=FakeStore({'a.html': 'a'}))
+
+        get_response(page, '/a.html')
+
+        self.assertEquals([], spans)
+
+    def test_page_fingerprint(self):
+        """
+        ``StaticPage`` should serve fingerprinted URLs as immutable, even in
+        conditional requests, but not the plain URLs.
+        """
+        page = StaticPage(
+            store=FakeStore({'app.js': 'a'}), fingerprint=True)
+        url = page.get_url('/app.js')
+
+        r = get_response(page, url)
+        etag = dict(r.headers)['ETag']
+
+        self.assertEquals('a', r.message)
+        self.assertEquals(
+            'public, max-age=31536000, immutable',
+            dict(r.headers)['Cache-Control'])
+
+        r = get_response(page, url, {'If-None-Match': etag})
+
+        self.assertEquals('304 Not Modified', r.status_code)
+        self.assertIn('Cache-Control', dict(r.headers))
+
+        r = get_response(page, '/app.js')
+
+        self.assertEquals('a', r.message)
+        self.assertNotIn('Cache-Control', dict(r.headers))
+
+    def test_page_stale_fingerprint(self):
+        """
+        ``StaticPage`` should not serve URLs with fingerprints of other
+        contents, unless there is such a document.
+        """
+        store = FakeStore({'app.js': 'a', 'lib.0123abcd.js': 'lib'})
+        page = StaticPage(store=store, fingerprint=True)
+
+        r = get_response(page, '/app.0123abcd.js')
+
+        self.assertEquals(404, int(r.status_code.split()[0]))
+
+        r = get_response(page, '/lib.0123abcd.js')
+
+        self.assertEquals('lib', r.message)
+        self.assertNotIn('Cache-Control', dict(r.headers))
+
+    def test_page_without_fingerprint(self):
+        """
+        Without fingerprints, ``get_url()`` should return the path itself.
+        """
+        page = StaticPage(store=FakeStore({'app.js': 'a'}))
+
+        self.assertEquals('/app.js', page.get_url('/app.js'))
+
+    def test_page_cache_control(self):
+        """
+        ``StaticPage`` should send the caching headers of the policy of the
+        document, even when it is not modified.
+        """
+        page = StaticPage(
+            store=FakeStore({'a.css': 'a'}),
+            cache_control=[('*.css', CachePolicy('max-age=60', expires=60))])
+
+        r = get_response(page, '/a.css')
+        headers = dict(r.headers)
+        etag = headers['ETag']
+
+        self.assertEquals('max-age=60', headers['Cache-Control'])
+        self.assertIn('Expires', headers)
+
+        r = get_response(page, '/a.css', {'If-None-Match': etag})
+
+        self.assertEquals('304 Not Modified', r.status_code)
+        self.assertEquals('max-age=60', dict(r.headers)['Cache-Control'])
+
+    def test_page_cache_control_resources(self):
+        """
+        The resource policy should only apply to the documents of the page
+        itself, even if their paths match other policies.
+        """
+        page = StaticPage(
+            store=FakeStore({'a.html': 'a'}),
+            cache_control=[('*.html', 'no-cache')],
+            resource_cache_control='max-age=3600')
+
+        self.assertEquals(
+            'no-cache',
+            dict(get_response(page, '/a.html').headers)['Cache-Control'])
+        self.assertEquals(
+            'max-age=3600',
+            dict(get_response(page, '/index.html').headers)['Cache-Control'])
+
+    def test_page_cache_control_resources_stat_once(self):
+        """
+        Finding out whether the document is a resource of the page should not
+        stat it again.
+        """
+        class CountingStore(FakeStore):
+            stats = 0
+
+            def stat(self, path):
+                self.stats += 1
+                return FakeStore.stat(self, path)
+
+        store = CountingStore({'a.html': 'a'})
+        page = StaticPage(
+            store=store, resource_cache_control='max-age=3600',
+            compress=False, precompressed=False)
+
+        get_response(page, '/a.html')
+
+        self.assertEquals(1, store.stats)
+
+    def test_page_cache_control_resources_without_directory(self):
+        """
+        Pages without a directory or store should apply the resource policy
+        to their resources.
+        """
+        page = StaticPage(resource_cache_control='max-age=3600')
+
+        r = get_response(page, '/index.html')
+
+        self.assertEquals('200 OK', r.status_code)
+        self.assertEquals('max-age=3600', dict(r.headers)['Cache-Control'])
+
+    def test_page_cache_control_fingerprint(self):
+        """
+        Fingerprinted URLs should be immutable, whatever the policy of the
+        document.
+        """
+        page = StaticPage(
+            store=FakeStore({'app.js': 'a'}), fingerprint=True,
+            cache_control=[('*.js', 'no-cache')])
+
+        r = get_response(page, page.get_url('/app.js'))
+
+        self.assertEquals(
+            'public, max-age=31536000, immutable',
+            dict(r.headers)['Cache-Control'])
+        self.assertEquals(
+            'no-cache',
+            dict(get_response(page, '/app.js').headers)['Cache-Control'])
+
     def test_page_has_default_index_html(self):
         """
         If we request the ``StaticPage`` root directory (e.g.
@@ -172,6 +844,51 @@ class TestStaticPage(unittest.TestCase):
                 self.assertTrue(r.text)
 
 
+class ReadCountingStore(FakeStore):
+    """
+    A fake store that counts how many times documents were read.
+    """
+
+    def __init__(self, *args, **kwargs):
+        FakeStore.__init__(self, *args, **kwargs)
+        self.reads = 0
+
+    def read(self, path, *args, **kwargs):
+        self.reads += 1
+
+        return FakeStore.read(self, path, *args, **kwargs)
+
+
+class StatCountingStore(FakeStore):
+    """
+    A fake store that counts how many times documents were stat'ed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        FakeStore.__init__(self, *args, **kwargs)
+        self.stats = 0
+
+    def stat(self, path):
+        self.stats += 1
+
+        return FakeStore.stat(self, path)
+
+
+def get_response(page, path, headers=None, method='GET'):
+    """
+    Requests a path from a page, giving it the headers from the dict, and
+    returns the ``confeitaria.responses.Response`` it raises.
+    """
+    request = Request(page=page, path=path, args_path=path, method=method)
+    request.headers = headers if headers is not None else {}
+    page.set_request(request)
+
+    try:
+        page.index()
+    except Response as r:
+        return r
+
+
 load_tests = TestFinder(
     __name__,
     'confeitaria.static.page'
@@ -19,6 +19,7 @@
 
 import os
 import os.path
+import time
 import unittest
 import contextlib
 
@@ -26,6 +27,7 @@ from inelegant.finder import TestFinder
 
 from confeitaria.static.store.fake import FakeStore
 from confeitaria.static.store.aggregate import AggregateStore
+from confeitaria.static.store.error import NotFoundError
 
 from confeitaria_static_tests.store.reference import ReferenceStoreTestCase
 from confeitaria_static_tests.store.fake import available_document
@@ -46,6 +48,127 @@ class TestAggregateStore(unittest.TestCase):
         self.assertEquals(
             primary.read('test.html'), aggregate.read('test.html'))
 
+    def test_many_stores(self):
+        """
+        The aggregate store should try all its stores in order.
+        """
+        aggregate = AggregateStore(
+            FakeStore({'a.html': 'first'}),
+            FakeStore({'a.html': 'second', 'b.html': 'second'}),
+            FakeStore({'b.html': 'third', 'c.html': 'third'}))
+
+        self.assertEquals('first', aggregate.read('a.html'))
+        self.assertEquals('second', aggregate.read('b.html'))
+        self.assertEquals('third', aggregate.read('c.html'))
+
+        with self.assertRaises(NotFoundError):
+            aggregate.read('d.html')
+
+    def test_none_stores_are_ignored(self):
+        """
+        Stores given as ``None`` should be ignored.
+        """
+        aggregate = AggregateStore(None, FakeStore({'a.html': 'a'}))
+
+        self.assertEquals('a', aggregate.read('a.html'))
+
+    def test_go_straight_to_owner(self):
+        """
+        Once a store provides a document not found in the first store, the
+        next requests for this document should go straight to it.
+        """
+        primary = CountingStore({})
+        secondary = CountingStore({'a.html': 'a'})
+        aggregate = AggregateStore(primary, secondary)
+
+        aggregate.stat('a.html')
+        aggregate.read('a.html')
+        aggregate.read('a.html')
+
+        self.assertEquals(1, primary.calls)
+        self.assertEquals(3, secondary.calls)
+
+    def test_owner_forgotten_if_not_found(self):
+        """
+        If the owner of a document does not provide it anymore, the other
+        stores should be tried again.
+        """
+        secondary = FakeStore({'a.html': 'secondary'})
+        third = FakeStore({'a.html': 'third'})
+        aggregate = AggregateStore(FakeStore({}), secondary, third)
+
+        aggregate.read('a.html')
+        del secondary.documents['a.html']
+
+        self.assertEquals('third', aggregate.read('a.html'))
+
+    def test_owner_expires(self):
+        """
+        Owners should only be remembered for ``index_ttl`` seconds, so a
+        document added to a previous store is found afterwards.
+        """
+        primary = FakeStore({})
+        aggregate = AggregateStore(
+            primary, FakeStore({'index.html': 'bundled'}), index_ttl=60)
+
+        self.assertEquals('bundled', aggregate.read('index.html'))
+
+        primary.documents['index.html'] = 'primary'
+        aggregate.owners['index.html'] = (1, time.time() - 1)
+
+        self.assertEquals('primary', aggregate.read('index.html'))
+
+    def test_index_can_be_disabled(self):
+        """
+        If ``index_size`` is zero, all stores should be tried at every
+        request.
+        """
+        primary = CountingStore({})
+        aggregate = AggregateStore(
+            primary, FakeStore({'a.html': 'a'}), index_size=0)
+
+        aggregate.read('a.html')
+        aggregate.read('a.html')
+
+        self.assertEquals(2, primary.calls)
+
+    def test_real_errors_are_not_swallowed(self):
+        """
+        Errors other than ``NotFoundError`` should not make the aggregate store
+        try the next store.
+        """
+        aggregate = AggregateStore(
+            FailingStore(), FakeStore({'a.html': 'a'}))
+
+        with self.assertRaises(ValueError) as c:
+            aggregate.read('a.html')
+
+        self.assertNotIsInstance(c.exception, NotFoundError)
+
+
+class CountingStore(FakeStore):
+    """
+    A fake store which counts how many times it was requested a document.
+    """
+
+    def __init__(self, *args, **kwargs):
+        FakeStore.__init__(self, *args, **kwargs)
+        self.calls = 0
+
+    def get_path(self, path):
+        self.calls += 1
+
+        return FakeStore.get_path(self, path)
+
+
+class FailingStore(object):
+    """
+    A store which fails to read any document, as if it had no permission.
+    """
+
+    def read(self, path):
+        raise ValueError('Permission denied: {0}'.format(path))
+
 
 class ReferenceAggregateStoreTestCase(ReferenceStoreTestCase):
 
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from inelegant.finder import TestFinder
+from inelegant.fs import temp_dir, temp_file
+
+from confeitaria.static.store import aio
+from confeitaria.static.store.aggregate import AggregateStore
+from confeitaria.static.store.error import NotFoundError
+from confeitaria.static.store.fake import FakeStore
+from confeitaria.static.store.file import FileStore
+
+
+@unittest.skipIf(aio.asyncio is None, 'asyncio is not available')
+class TestAsyncStores(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = aio.asyncio.new_event_loop()
+        aio.asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        aio.asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def test_read_async(self):
+        """
+        Stores should read documents asynchronously.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.txt', content='file'):
+            stores = [
+                FileStore(d), FakeStore({'a.txt': b'file'}),
+                AggregateStore(FakeStore({}), FileStore(d))
+            ]
+
+            for store in stores:
+                self.assertEquals(
+                    b'file',
+                    self.loop.run_until_complete(store.read_async('a.txt')))
+
+    def test_read_async_not_found(self):
+        """
+        Reading a missing document asynchronously should fail as reading it
+        synchronously does.
+        """
+        with temp_dir() as d:
+            for store in [FileStore(d), FakeStore({})]:
+                with self.assertRaises(NotFoundError):
+                    self.loop.run_until_complete(
+                        store.read_async('a.txt'))
+
+    def test_stream_async(self):
+        """
+        Streams should be iterable asynchronously.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.txt', content='example'):
+            for store in [FileStore(d), FakeStore({'a.txt': b'example'})]:
+                body = self.loop.run_until_complete(
+                    store.stream_async('a.txt', chunk_size=3, offset=1))
+
+                try:
+                    self.assertEquals(
+                        [b'xam', b'ple'], self.collect(body))
+                finally:
+                    body.close()
+
+    def test_read_async_without_method(self):
+        """
+        Stores without ``read_async()`` should be read in the executor.
+        """
+        class ReadOnlyStore(object):
+            def read(self, path):
+                return b'example'
+
+        self.assertEquals(
+            b'example',
+            self.loop.run_until_complete(
+                aio.read_async(ReadOnlyStore(), 'a.txt')))
+
+    def collect(self, body):
+        """
+        Returns all chunks from an asynchronous body.
+        """
+        chunks = []
+
+        while True:
+            try:
+                chunks.append(self.loop.run_until_complete(body.__anext__()))
+            except StopAsyncIteration:
+                return chunks
+
+
+@unittest.skipIf(aio.asyncio is not None, 'asyncio is available')
+class TestWithoutAsyncio(unittest.TestCase):
+
+    def test_read_async_fails(self):
+        """
+        Without ``asyncio``, asynchronous methods should fail.
+        """
+        with self.assertRaises(RuntimeError):
+            FakeStore({'a.txt': 'a'}).read_async('a.txt')
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.store.aio'
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
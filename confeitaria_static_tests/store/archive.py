@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import os.path
+import zipfile
+import unittest
+import contextlib
+
+from inelegant.finder import TestFinder
+from inelegant.fs import temp_dir
+
+from confeitaria.static.store.archive import ArchiveStore
+from confeitaria.static.store.body import to_bytes
+from confeitaria.static.store.error import NotFoundError
+
+from confeitaria_static_tests.store.fake import available_document
+from confeitaria_static_tests.store.reference import ReferenceStoreTestCase
+
+
+class TestArchiveStore(unittest.TestCase):
+
+    def test_view_is_not_a_copy(self):
+        """
+        Views of uncompressed members should not be copies of their content.
+        """
+        with available_archive({'a.txt': 'example'}) as archive:
+            store = ArchiveStore(archive)
+            view = store.view('a.txt')
+
+            self.assertNotIsInstance(view, (bytes, str))
+            self.assertEquals(b'example', view[:7])
+
+            del view
+            store.close()
+
+    def test_stream_is_not_a_copy(self):
+        """
+        Streams of uncompressed members should be views of their content.
+        """
+        with available_archive({'a.txt': 'example'}) as archive:
+            store = ArchiveStore(archive)
+            body = store.stream('a.txt', chunk_size=4, offset=1)
+
+            self.assertNotIsInstance(body.content, (bytes, str))
+            self.assertEquals(
+                [b'xamp', b'le'], [to_bytes(chunk) for chunk in body])
+
+            del body
+            store.close()
+
+    def test_compressed_members(self):
+        """
+        Compressed members should be decompressed.
+        """
+        content = 'example' * 100
+
+        with available_archive(
+                {'a.txt': content}, compression=zipfile.ZIP_DEFLATED) as a:
+            store = ArchiveStore(a)
+
+            self.assertEquals(content, store.read('a.txt'))
+            self.assertEquals(content, store.view('a.txt').tobytes())
+            self.assertEquals(
+                content[3:10], ''.join(store.stream('a.txt', 3, 3, 7)))
+            self.assertEquals(len(content), store.stat('a.txt').size)
+
+            store.close()
+
+    def test_directory(self):
+        """
+        Only members inside the given directory should be served.
+        """
+        with available_archive({'site/a.txt': 'a', 'b.txt': 'b'}) as archive:
+            store = ArchiveStore(archive, directory='site')
+
+            self.assertEquals('a', store.read('a.txt'))
+
+            with self.assertRaises(NotFoundError):
+                store.read('../b.txt')
+            with self.assertRaises(NotFoundError):
+                store.read('b.txt')
+
+            store.close()
+
+    def test_stat_mtime(self):
+        """
+        The stat of a member should have the modification time of the zip
+        entry, and its entity tag should change with the content.
+        """
+        with available_archive({'a.txt': 'a'}) as a1, \
+                available_archive({'a.txt': 'b'}) as a2:
+            store1 = ArchiveStore(a1)
+            store2 = ArchiveStore(a2)
+
+            self.assertIsNotNone(store1.stat('a.txt').mtime)
+            self.assertNotEquals(
+                store1.stat('a.txt').etag, store2.stat('a.txt').etag)
+
+            store1.close()
+            store2.close()
+
+
+@contextlib.contextmanager
+def available_archive(members, compression=zipfile.ZIP_STORED):
+    """
+    Creates a temporary zip file with the given members, given as a dict
+    mapping their paths to their contents, and yields its path.
+    """
+    with temp_dir() as d:
+        archive = os.path.join(d, 'archive.zip')
+
+        with contextlib.closing(zipfile.ZipFile(archive, 'w')) as z:
+            for path, content in members.items():
+                z.writestr(path, content, compression)
+
+        yield archive
+
+
+class ReferenceTestArchiveStore(ReferenceStoreTestCase):
+
+    def get_store(self, container, default_file_name='index.html'):
+        """
+        Create a zip file with the documents from the container, and an
+        archive store to serve it.
+        """
+        members, directory = container
+        archive = os.path.join(directory, 'archive.zip')
+
+        with contextlib.closing(zipfile.ZipFile(archive, 'w')) as z:
+            for path, content in members.items():
+                z.writestr(path, content)
+
+        return ArchiveStore(archive, default_file_name=default_file_name)
+
+    @contextlib.contextmanager
+    def make_container(self):
+        """
+        Yields a tuple with a dict, to which the documents to be zipped are
+        added, and a temporary directory for the zip file.
+        """
+        with temp_dir() as d:
+            yield {}, d
+
+    def make_document(self, name, where, content='', path=None):
+        """
+        Add a document to the dict of documents to be zipped.
+        """
+        members, _ = where
+
+        return available_document(members, name, content, path=path)
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.store.archive',
+    skip=ReferenceStoreTestCase
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+import threading
+import unittest
+
+from inelegant.finder import TestFinder
+from inelegant.fs import temp_dir, temp_file
+
+from confeitaria.static.store.aggregate import AggregateStore
+from confeitaria.static.store.batch import is_error, read_many
+from confeitaria.static.store.error import NotFoundError
+from confeitaria.static.store.fake import FakeStore
+from confeitaria.static.store.file import FileStore
+from confeitaria.static.store.resource import ResourceStore
+
+
+class TestReadMany(unittest.TestCase):
+
+    def test_stores(self):
+        """
+        All stores should read many documents at once, returning them in the
+        given order.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.txt', content='a'), \
+                temp_file(where=d, name='b.txt', content='b'):
+            stores = [
+                FileStore(d),
+                FakeStore({'a.txt': b'a', 'b.txt': b'b'}),
+                AggregateStore(
+                    FakeStore({'a.txt': b'a'}), FakeStore({'b.txt': b'b'}))
+            ]
+
+            for store in stores:
+                results = store.read_many(['b.txt', 'a.txt', 'c.txt'])
+
+                self.assertEquals(['b.txt', 'a.txt', 'c.txt'], list(results))
+                self.assertEquals(b'b', results['b.txt'])
+                self.assertEquals(b'a', results['a.txt'])
+                self.assertTrue(isinstance(results['c.txt'], NotFoundError))
+
+    def test_resource_store(self):
+        """
+        Resource stores should read many documents at once.
+        """
+        for index in (False, True):
+            store = ResourceStore(
+                'confeitaria_static_tests', 'store', index=index)
+            results = store.read_many(['__init__.py', 'nofile.py'])
+
+            self.assertTrue(b'Confeitaria' in results['__init__.py'])
+            self.assertTrue(is_error(results['nofile.py']))
+
+    def test_file_store_parallel(self):
+        """
+        ``FileStore`` should read the files by many threads.
+        """
+        threads = set()
+
+        class RecordingFileStore(FileStore):
+            def read(self, path):
+                threads.add(threading.current_thread().ident)
+                time.sleep(0.001)
+                return FileStore.read(self, path)
+
+        with temp_dir() as d:
+            store = RecordingFileStore(d)
+            store.read_many([str(i) for i in range(32)], jobs=4)
+
+        self.assertTrue(1 < len(threads) <= 4)
+
+    def test_read_many_without_method(self):
+        """
+        Stores without ``read_many()`` should be read one path at a time.
+        """
+        class ReadOnlyStore(object):
+            def read(self, path):
+                return path.upper()
+
+        self.assertEquals(
+            {'a': 'A', 'b': 'B'},
+            dict(read_many(ReadOnlyStore(), ['a', 'b', 'a'])))
+
+
+class TestAggregateStoreReadMany(unittest.TestCase):
+
+    def test_split_batch(self):
+        """
+        The aggregate store should give each store a single batch, with only
+        the documents not found in the previous stores.
+        """
+        store1 = BatchRecordingStore({'a': b'1'})
+        store2 = BatchRecordingStore({'b': b'2'})
+        store3 = BatchRecordingStore({'c': b'3'})
+        store = AggregateStore(store1, store2, store3)
+
+        results = store.read_many(['a', 'b', 'c', 'd'])
+
+        self.assertEquals(
+            [b'1', b'2', b'3'], [results['a'], results['b'], results['c']])
+        self.assertTrue(is_error(results['d']))
+        self.assertEquals([['a', 'b', 'c', 'd']], store1.batches)
+        self.assertEquals([['b', 'c', 'd']], store2.batches)
+        self.assertEquals([['c', 'd']], store3.batches)
+
+    def test_owners(self):
+        """
+        Documents whose owners are known should go straight to them.
+        """
+        store1 = BatchRecordingStore({'a': b'1'})
+        store2 = BatchRecordingStore({'b': b'2'})
+        store = AggregateStore(store1, store2)
+
+        store.read('b')
+        store.read_many(['a', 'b'])
+
+        self.assertEquals([['a']], store1.batches)
+        self.assertEquals([['b']], store2.batches)
+
+    def test_owner_lost_document(self):
+        """
+        If the known owner of a document no longer has it, the document
+        should be read from the other stores.
+        """
+        store1 = FakeStore({})
+        store2 = FakeStore({'a': b'2'})
+        store = AggregateStore(store1, store2)
+
+        store.read('a')
+        del store2.documents['a']
+        store1.documents['a'] = b'1'
+
+        self.assertEquals(b'1', store.read_many(['a'])['a'])
+
+    def test_other_errors(self):
+        """
+        Errors other than ``NotFoundError`` should not make the aggregate
+        store try the next store.
+        """
+        class ForbiddenStore(object):
+            def read(self, path):
+                raise ValueError('Forbidden')
+
+        store = AggregateStore(ForbiddenStore(), FakeStore({'a': b'a'}))
+        result = store.read_many(['a'])['a']
+
+        self.assertEquals('Forbidden', str(result))
+
+
+class BatchRecordingStore(FakeStore):
+    """
+    A fake store that records the batches given to ``read_many()``.
+    """
+
+    def __init__(self, documents):
+        FakeStore.__init__(self, documents)
+        self.batches = []
+
+    def read_many(self, paths, jobs=None):
+        self.batches.append(list(paths))
+
+        return FakeStore.read_many(self, paths, jobs)
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.store.batch'
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
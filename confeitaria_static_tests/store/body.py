@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+import io
+import unittest
+
+from inelegant.finder import TestFinder
+
+from confeitaria.static.store.body import FileBody, ContentBody
+
+
+class TestFileBody(unittest.TestCase):
+
+    def test_chunks_are_read_lazily(self):
+        """
+        ``FileBody`` should only read the file when the next chunk is needed.
+        """
+        f = io.BytesIO(b'abcdef')
+        chunks = iter(FileBody(f, length=6, chunk_size=2))
+
+        self.assertEquals(0, f.tell())
+        self.assertEquals(b'ab', next(chunks))
+        self.assertEquals(2, f.tell())
+
+    def test_empty_file(self):
+        """
+        ``FileBody`` should yield nothing for empty files.
+        """
+        self.assertEquals([], list(FileBody(io.BytesIO(), length=0)))
+
+
+class TestContentBody(unittest.TestCase):
+
+    def test_empty_content(self):
+        """
+        ``ContentBody`` should yield nothing for empty content.
+        """
+        self.assertEquals([], list(ContentBody('')))
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.store.body'
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import os.path
+import json
+import zlib
+import zipfile
+import unittest
+import contextlib
+
+from inelegant.finder import TestFinder
+from inelegant.fs import temp_dir, temp_file
+
+from confeitaria.static.bundle import build_bundle
+from confeitaria.static.page import StaticPage
+from confeitaria.static.store.bundle import BundleStore, BUNDLE_INDEX
+
+from confeitaria_static_tests.page import get_response
+
+
+class TestBundleStore(unittest.TestCase):
+
+    def test_index_not_served(self):
+        """
+        The index of the bundle should not be served as a document.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='index.html', content='index'):
+            archive = os.path.join(d, 'site.zip')
+            build_bundle(d, archive, jobs=1)
+            store = BundleStore(archive)
+
+            try:
+                with self.assertRaises(ValueError):
+                    store.read('.bundle-index')
+            finally:
+                store.close()
+
+    def test_index_is_json(self):
+        """
+        The index of the bundle should be stored as compressed JSON, so it
+        does not depend on the Python version which built it.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='index.html', content='index'):
+            archive = os.path.join(d, 'site.zip')
+            build_bundle(d, archive, jobs=1)
+
+            with contextlib.closing(zipfile.ZipFile(archive)) as z:
+                data = zlib.decompress(z.read(BUNDLE_INDEX))
+
+            index = json.loads(data.decode('utf-8'))
+
+            self.assertEquals(
+                ['e540cdd1328b2b21e29a95405c301b9313b7c346', 'text/html'],
+                index['index']['index.html'])
+
+    def test_page_serves_gzipped_siblings(self):
+        """
+        A page serving a bundle should send the gzipped siblings built with
+        the bundle, with the media type from the bundle index.
+        """
+        content = 'body { color: red; }' * 100
+
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.css', content=content):
+            archive = os.path.join(d, 'site.zip')
+            build_bundle(d, archive, jobs=1)
+            store = BundleStore(archive)
+
+            try:
+                page = StaticPage(store=store, compress=False)
+                response = get_response(
+                    page, '/a.css', headers={'Accept-Encoding': 'gzip'})
+                headers = dict(response.headers)
+
+                self.assertEquals('gzip', headers['Content-Encoding'])
+                self.assertEquals(
+                    'text/css; charset=utf-8', headers['Content-type'])
+            finally:
+                store.close()
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.store.bundle'
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+import os
+import os.path
+import threading
+import unittest
+
+from inelegant.fs import temp_file, temp_dir
+from inelegant.finder import TestFinder
+
+from confeitaria.static.store.cache import CacheStore
+from confeitaria.static.store.fake import FakeStore
+from confeitaria.static.store.file import FileStore
+
+from confeitaria_static_tests.store.reference import ReferenceStoreTestCase
+from confeitaria_static_tests.store.fake import available_document
+
+
+class TestCacheStore(unittest.TestCase):
+
+    def test_serve_from_cache(self):
+        """
+        Once a document is read, the cache store should not read it again from
+        the underlying store.
+        """
+        documents = {'test.html': 'example'}
+        store = CountingStore(documents)
+        cache = CacheStore(store)
+
+        self.assertEquals('example', cache.read('test.html'))
+        self.assertEquals('example', cache.read('test.html'))
+        self.assertEquals(1, store.reads)
+
+    def test_read_modified_file(self):
+        """
+        If the underlying store can tell the document was modified, the cache
+        store should read it again.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='test.html', content='example') as f:
+            store = CacheStore(FileStore(directory=d))
+
+            self.assertEquals('example', store.read('test.html'))
+
+            with open(f, 'w') as fd:
+                fd.write('modified')
+
+            self.assertEquals('modified', store.read('test.html'))
+
+    def test_read_same_size_change(self):
+        """
+        If a document changes but keeps its size, and the store has no
+        modification time, the new entity tag should make the cache store
+        read it again.
+        """
+        documents = {'test.html': 'example'}
+        store = CacheStore(FakeStore(documents))
+
+        self.assertEquals('example', store.read('test.html'))
+
+        documents['test.html'] = 'EXAMPLE'
+
+        self.assertEquals('EXAMPLE', store.read('test.html'))
+
+    def test_invalidate_alias(self):
+        """
+        Invalidating a document should also invalidate the paths which are
+        aliases of it.
+        """
+        with temp_dir() as d, temp_dir(where=d, name='x'), \
+                temp_file(where=d, name='a.html', content='a') as f:
+            store = CacheStore(FileStore(d), validate=False)
+            store.read('x/../a.html')
+
+            with open(f, 'w') as o:
+                o.write('changed')
+
+            store.invalidate('a.html')
+
+            self.assertEquals('changed', store.read('x/../a.html'))
+
+    def test_evict_by_entries(self):
+        """
+        The cache store should not keep more documents than the maximum
+        number of entries.
+        """
+        documents = {'a.html': 'a', 'b.html': 'b', 'c.html': 'c'}
+        store = CountingStore(documents)
+        cache = CacheStore(store, max_entries=2)
+
+        for path in ['a.html', 'b.html', 'c.html', 'a.html']:
+            cache.read(path)
+
+        self.assertEquals(4, store.reads)
+        self.assertEquals(2, len(cache.cache))
+
+    def test_evict_by_size(self):
+        """
+        The cache store should not keep more bytes than its maximum size.
+        """
+        documents = {'a.html': 'aaaa', 'b.html': 'bbbb', 'c.html': 'cccc'}
+        cache = CacheStore(FakeStore(documents), max_size=10)
+
+        for path in ['a.html', 'b.html', 'c.html']:
+            cache.read(path)
+
+        self.assertEquals(8, cache.cache.size)
+        self.assertEquals(['b.html', 'c.html'], sorted(cache.cache.keys()))
+
+    def test_not_found_is_not_cached(self):
+        """
+        Missing documents should not be cached, so they can be served once they
+        become available.
+        """
+        documents = {}
+        cache = CacheStore(FakeStore(documents))
+
+        with self.assertRaises(ValueError):
+            cache.read('test.html')
+
+        with available_document(documents, 'test.html', 'example'):
+            self.assertEquals('example', cache.read('test.html'))
+
+    def test_thread_safety(self):
+        """
+        Many threads should be able to use the same cache store.
+        """
+        documents = {
+            '{0}.html'.format(i): 'content {0}'.format(i) for i in range(20)
+        }
+        cache = CacheStore(FakeStore(documents), max_entries=5)
+        errors = []
+
+        def read_all():
+            try:
+                for i in range(200):
+                    path = '{0}.html'.format(i % 20)
+                    if cache.read(path) != documents[path]:
+                        errors.append(path)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=read_all) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEquals([], errors)
+        self.assertTrue(len(cache.cache) <= 5)
+
+
+class CountingStore(FakeStore):
+    """
+    A fake store that counts how many times it was read.
+    """
+
+    def __init__(self, *args, **kwargs):
+        FakeStore.__init__(self, *args, **kwargs)
+        self.reads = 0
+
+    def read(self, path):
+        self.reads += 1
+
+        return FakeStore.read(self, path)
+
+
+class ReferenceTestCacheStore(ReferenceStoreTestCase):
+
+    def get_store(self, container, default_file_name='index.html'):
+        """
+        Create a cache store wrapping a file store.
+        """
+        store = FileStore(
+            directory=container, default_file_name=default_file_name)
+
+        return CacheStore(store)
+
+    def make_container(self):
+        """
+        Create a temporary directory to be given to the file store.
+        """
+        return temp_dir()
+
+    def make_document(self, name, where, content='', path=None):
+        """
+        Create a temporary file to be given to the file store.
+        """
+        if path is not None:
+            path = os.path.join(where, path)
+            os.makedirs(path)
+        else:
+            path = where
+
+        return temp_file(where=path, name=name, content=content)
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.store.cache',
+    skip=ReferenceStoreTestCase
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
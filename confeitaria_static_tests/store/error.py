@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from inelegant.finder import TestFinder
+from inelegant.fs import temp_dir
+from inelegant.module import available_module
+
+from confeitaria.static.store.error import NotFoundError
+from confeitaria.static.store.fake import FakeStore
+from confeitaria.static.store.file import FileStore
+from confeitaria.static.store.resource import ResourceStore
+
+
+class TestNotFoundError(unittest.TestCase):
+
+    def test_stores_raise_not_found_error(self):
+        """
+        All stores should raise ``NotFoundError`` if the document does not
+        exist.
+        """
+        with temp_dir() as d, available_module('m'):
+            stores = [
+                FakeStore({}), FileStore(directory=d),
+                ResourceStore('m', 'resource_dir')
+            ]
+
+            for store in stores:
+                with self.assertRaises(NotFoundError):
+                    store.read('nofile.html')
+                with self.assertRaises(NotFoundError):
+                    store.stat('nofile.html')
+                with self.assertRaises(NotFoundError):
+                    store.stream('nofile.html')
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.store.error'
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,12 +18,14 @@
 # along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
 import os
 import os.path
+import time
 import unittest
 
 from inelegant.fs import temp_file, temp_dir
 from inelegant.finder import TestFinder
 
 from confeitaria.static.store.file import FileStore
+from confeitaria.static.store.manifest import Manifest
 
 from confeitaria_static_tests.store.reference import ReferenceStoreTestCase
 
@@ -44,6 +46,253 @@ class TestFileStore(unittest.TestCase):
             with self.assertRaises(ValueError):
                 store.read('/../passwd')
 
+    def test_raise_valueerror_if_symlink_to_outside_directory(self):
+        """
+        If the path is a symbolic link to a file outside the directory given
+        to the store, it should raise ``ValueError``.
+        """
+        with temp_dir() as root_dir, \
+                temp_dir(where=root_dir) as d, \
+                temp_file(where=root_dir, name='passwd') as f:
+
+            os.symlink(f, os.path.join(d, 'link'))
+            store = FileStore(directory=d)
+
+            with self.assertRaises(ValueError):
+                store.read('link')
+
+    def test_containment_check_resolves_path_once(self):
+        """
+        Checking whether a path is inside the directory should not resolve
+        each ancestor of the path, so the number of ``lstat()`` calls should
+        only grow linearly with the depth of the path.
+        """
+        depth = 30
+
+        with temp_dir() as d:
+            subdir = os.path.join(d, *['d'] * depth)
+            os.makedirs(subdir)
+
+            with temp_file(where=subdir, name='a.txt', content='a'):
+                store = FileStore(directory=d)
+                path = '/'.join(['d'] * depth + ['a.txt'])
+                calls = []
+                lstat = os.lstat
+
+                def counting_lstat(*args):
+                    calls.append(args)
+                    return lstat(*args)
+
+                os.lstat = counting_lstat
+
+                try:
+                    store.get_path(path)
+                finally:
+                    os.lstat = lstat
+
+                self.assertTrue(len(calls) <= depth + d.count(os.sep) + 2)
+
+    def test_resolved_path_is_cached(self):
+        """
+        Once a path is resolved, reading it again should not check again
+        whether it is a directory.
+        """
+        with temp_dir() as d, \
+                temp_dir(where=d, name='sub'), \
+                temp_file(where=os.path.join(d, 'sub'), name='index.html',
+                          content='index'):
+            store = FileStore(directory=d)
+            store.read('sub')
+            calls = []
+            isdir = os.path.isdir
+
+            def counting_isdir(*args):
+                calls.append(args)
+                return isdir(*args)
+
+            os.path.isdir = counting_isdir
+
+            try:
+                self.assertEquals('index', store.read('sub'))
+            finally:
+                os.path.isdir = isdir
+
+            self.assertEquals([], calls)
+
+    def test_resolved_path_is_checked(self):
+        """
+        A resolved path should not be served from outside the directory once a
+        symbolic link in it points there: the remembered real file should be
+        served until the path expires, and then the new link is rejected.
+        """
+        with temp_dir() as root_dir, \
+                temp_dir(where=root_dir, name='outside') as outside, \
+                temp_file(where=outside, name='a.txt', content='outside'), \
+                temp_dir(where=root_dir, name='site') as d, \
+                temp_dir(where=d, name='inside') as inside, \
+                temp_file(where=inside, name='a.txt', content='inside'):
+            link = os.path.join(d, 'link')
+            os.symlink(inside, link)
+            store = FileStore(directory=d)
+
+            self.assertEquals('inside', store.read('link/a.txt'))
+
+            os.remove(link)
+            os.symlink(outside, link)
+
+            self.assertEquals('inside', store.read('link/a.txt'))
+
+            expire(store, 'link/a.txt')
+
+            with self.assertRaises(ValueError):
+                store.read('link/a.txt')
+
+    def test_manifest_path_is_checked(self):
+        """
+        A path resolved by the manifest should not be served if a symbolic
+        link in it points outside the directory.
+        """
+        with temp_dir() as root_dir, \
+                temp_file(where=root_dir, name='passwd') as f, \
+                temp_dir(where=root_dir, name='site') as d, \
+                temp_file(where=d, name='a.txt', content='inside') as a:
+            link = os.path.join(d, 'link.txt')
+            os.symlink(a, link)
+            store = FileStore(directory=d, manifest=Manifest(d).update())
+
+            self.assertEquals('inside', store.read('link.txt'))
+
+            os.remove(link)
+            os.symlink(f, link)
+            expire(store, 'link.txt')
+
+            with self.assertRaises(ValueError):
+                store.read('link.txt')
+
+    def test_resolved_path_is_not_resolved_again(self):
+        """
+        Until a resolved path expires, reading it again should not touch the
+        file system to resolve it.
+        """
+        with temp_dir() as d:
+            subdir = os.path.join(d, 'a', 'b', 'c')
+            os.makedirs(subdir)
+
+            with temp_file(where=subdir, name='a.txt', content='a'):
+                store = FileStore(directory=d, resolve_ttl=60)
+                store.read('a/b/c/a.txt')
+                calls = []
+                lstat = os.lstat
+
+                def counting_lstat(*args):
+                    calls.append(args)
+                    return lstat(*args)
+
+                os.lstat = counting_lstat
+
+                try:
+                    self.assertEquals('a', store.read('a/b/c/a.txt'))
+                finally:
+                    os.lstat = lstat
+
+                self.assertEquals([], calls)
+
+    def test_missing_path_is_cached(self):
+        """
+        Once a path is not found, requesting it again should fail without
+        touching the file system.
+        """
+        with temp_dir() as d:
+            store = FileStore(directory=d, negative_ttl=60)
+
+            with self.assertRaises(ValueError):
+                store.read('missing.html')
+
+            calls = []
+            isdir = os.path.isdir
+
+            def counting_isdir(*args):
+                calls.append(args)
+                return isdir(*args)
+
+            os.path.isdir = counting_isdir
+
+            try:
+                with self.assertRaises(ValueError):
+                    store.read('missing.html')
+                with self.assertRaises(ValueError):
+                    store.stat('missing.html')
+            finally:
+                os.path.isdir = isdir
+
+            self.assertEquals([], calls)
+
+    def test_missing_path_expires(self):
+        """
+        Missing paths should only be remembered for ``negative_ttl`` seconds.
+        """
+        with temp_dir() as d:
+            store = FileStore(directory=d, negative_ttl=60)
+
+            with self.assertRaises(ValueError):
+                store.read('later.html')
+
+            store.missing['later.html'] = time.time() - 1
+
+            with temp_file(where=d, name='later.html', content='late'):
+                self.assertEquals('late', store.read('later.html'))
+
+    def test_negative_cache_can_be_disabled(self):
+        """
+        If ``negative_ttl`` is zero, missing paths should not be remembered.
+        """
+        with temp_dir() as d:
+            store = FileStore(directory=d, negative_ttl=0)
+
+            with self.assertRaises(ValueError):
+                store.read('later.html')
+
+            with temp_file(where=d, name='later.html', content='late'):
+                self.assertEquals('late', store.read('later.html'))
+
+    def test_removed_file_is_forgotten(self):
+        """
+        If a resolved file is removed, the store should forget its path.
+        """
+        with temp_dir() as d:
+            store = FileStore(directory=d, negative_ttl=0)
+
+            with temp_file(where=d, name='a.html', content='a'):
+                store.read('a.html')
+
+            with self.assertRaises(ValueError):
+                store.read('a.html')
+
+            self.assertNotIn('a.html', store.resolved)
+
+    def test_read_binary_file(self):
+        """
+        The store should read files as they are, without decoding them or
+        translating line endings.
+        """
+        content = '\x00\x01\r\n\xfe\xff\n'
+
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.bin', content=content) as f:
+            store = FileStore(directory=d)
+
+            self.assertEquals(content, store.read('a.bin'))
+
+    def test_stat_mtime(self):
+        """
+        The stat of a file should have its modification time.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.html', content='A') as f:
+            store = FileStore(directory=d)
+
+            self.assertEquals(os.path.getmtime(f), store.stat('a.html').mtime)
+
 
 class ReferenceTestFileStore(ReferenceStoreTestCase):
 
@@ -74,6 +323,14 @@ class ReferenceTestFileStore(ReferenceStoreTestCase):
         return temp_file(where=path, name=name, content=content)
 
 
+def expire(store, path):
+    """
+    Makes the resolved path expire in the store.
+    """
+    file_path, real_path, _ = store.resolved[path]
+    store.resolved[path] = (file_path, real_path, time.time() - 1)
+
+
 load_tests = TestFinder(
     __name__,
     'confeitaria.static.store.file',
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import os.path
+import unittest
+
+from inelegant.finder import TestFinder
+from inelegant.fs import temp_dir, temp_file
+
+from confeitaria.static.page import StaticPage
+from confeitaria.static.store.error import NotFoundError
+from confeitaria.static.store.file import FileStore
+from confeitaria.static.store.manifest import (
+    Manifest, get_manifest, load_manifest)
+from confeitaria.static.wsgi import get_message, get_response
+
+
+class TestManifest(unittest.TestCase):
+
+    def test_subdirectories(self):
+        """
+        The manifest should have the files of all subdirectories.
+        """
+        with temp_dir() as d, \
+                temp_dir(where=d, name='a') as a, \
+                temp_dir(where=a, name='b') as b, \
+                temp_file(where=b, name='c.css', content='c'):
+            manifest = Manifest(d).update()
+
+            self.assertEquals(['a/b/c.css'], sorted(manifest.files))
+            self.assertEquals(
+                'text/css', manifest.get('a/b/c.css').content_type)
+
+    def test_ignore_symlink_to_outside(self):
+        """
+        Symbolic links to files outside the directory should not be in the
+        manifest.
+        """
+        with temp_dir() as root_dir, \
+                temp_dir(where=root_dir) as d, \
+                temp_file(where=root_dir, name='passwd') as f:
+            os.symlink(f, os.path.join(d, 'link'))
+
+            self.assertEquals({}, Manifest(d).update().files)
+
+    def test_update_only_lists_changed_directories(self):
+        """
+        Updating a manifest should only list the directories whose
+        modification time changed.
+        """
+        with temp_dir() as d, \
+                temp_dir(where=d, name='a') as a, \
+                temp_dir(where=d, name='b') as b, \
+                temp_file(where=a, name='a.html', content='a'), \
+                temp_file(where=b, name='b.html', content='b'):
+            manifest = Manifest(d).update()
+            past = os.stat(b).st_mtime - 10
+
+            with temp_file(where=b, name='new.html', content='new'):
+                os.utime(b, (past, past))
+                listed = []
+                listdir = os.listdir
+
+                def counting_listdir(path):
+                    listed.append(path)
+                    return listdir(path)
+
+                os.listdir = counting_listdir
+
+                try:
+                    manifest.update()
+                finally:
+                    os.listdir = listdir
+
+                self.assertEquals([b], listed)
+                self.assertIn('b/new.html', manifest.files)
+
+    def test_update_changed_file(self):
+        """
+        If a file changes, its entry should be updated.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.html', content='a') as f:
+            manifest = Manifest(d).update()
+
+            with open(f, 'wb') as o:
+                o.write(b'changed')
+
+            manifest.update(check_files=True)
+
+            self.assertEquals(7, manifest.get('a.html').size)
+
+    def test_update_does_not_stat_files_of_unchanged_directories(self):
+        """
+        Updating a manifest should not stat the files of directories whose
+        modification time did not change.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.html', content='a'):
+            manifest = Manifest(d).update()
+            stat = os.stat
+            stated = []
+
+            def recording_stat(path):
+                stated.append(path)
+                return stat(path)
+
+            os.stat = recording_stat
+
+            try:
+                manifest.update()
+            finally:
+                os.stat = stat
+
+            self.assertEquals(
+                [], [p for p in stated if p.endswith('a.html')])
+            self.assertIn('a.html', manifest.files)
+
+    def test_update_removed_file(self):
+        """
+        If a file is removed, it should be removed from the manifest.
+        """
+        with temp_dir() as d:
+            with temp_file(where=d, name='a.html', content='a'):
+                manifest = Manifest(d).update()
+
+            manifest.update()
+
+            self.assertIsNone(manifest.get('a.html'))
+
+    def test_save_and_load(self):
+        """
+        A saved manifest should be loaded with the same data.
+        """
+        with temp_dir() as d, \
+                temp_dir(where=d, name='sub') as sub, \
+                temp_file(where=sub, name='index.html', content='index'):
+            filename = os.path.join(d, 'manifest')
+            manifest = Manifest(d).update()
+            manifest.save(filename)
+            loaded = load_manifest(filename)
+
+            self.assertEquals(manifest.root, loaded.root)
+            self.assertEquals(manifest.directories, loaded.directories)
+            self.assertEquals(manifest.files, loaded.files)
+            self.assertEquals('sub/index.html', loaded.resolve('sub'))
+
+    def test_invalid_manifest_file_is_rebuilt(self):
+        """
+        If the manifest file is not valid, a new manifest should be built.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.html', content='a'), \
+                temp_file(where=d, name='manifest', content='garbage') as m:
+            self.assertIsNone(load_manifest(m))
+            self.assertIn('a.html', get_manifest(d, m).files)
+            self.assertIn('a.html', load_manifest(m).files)
+
+
+class TestFileStoreWithManifest(unittest.TestCase):
+
+    def test_miss_does_not_touch_file_system(self):
+        """
+        A path missing from the manifest should not be looked for in the file
+        system.
+        """
+        with temp_dir() as d:
+            store = FileStore(directory=d, manifest=Manifest(d).update())
+            isdir = os.path.isdir
+            calls = []
+
+            def counting_isdir(*args):
+                calls.append(args)
+                return isdir(*args)
+
+            os.path.isdir = counting_isdir
+
+            try:
+                with self.assertRaises(NotFoundError):
+                    store.read('nofile.html')
+            finally:
+                os.path.isdir = isdir
+
+            self.assertEquals([], calls)
+
+    def test_read_default_file(self):
+        """
+        Directories should be resolved to their default files.
+        """
+        with temp_dir() as d, \
+                temp_dir(where=d, name='sub') as sub, \
+                temp_file(where=sub, name='index.html', content='index'):
+            store = FileStore(directory=d, manifest=Manifest(d).update())
+
+            self.assertEquals('index', store.read('sub'))
+            self.assertEquals('index', store.read('/sub/'))
+
+    def test_load_manifest_file(self):
+        """
+        Given the name of a manifest file, the store should load the manifest
+        saved there, and serve documents from it.
+        """
+        with temp_dir() as d, temp_dir() as m, \
+                temp_file(where=d, name='a.html', content='a'):
+            filename = os.path.join(m, 'manifest')
+            Manifest(d).update().save(filename)
+            store = FileStore(directory=d, manifest=filename)
+
+            self.assertIn('a.html', store.manifest.files)
+            self.assertEquals('a', store.read('a.html'))
+            self.assertEquals(
+                '"{0}"'.format(store.manifest.get('a.html').digest),
+                store.stat('a.html').etag)
+
+    def test_page_with_manifest_file(self):
+        """
+        The page should give the manifest file to its store.
+        """
+        with temp_dir() as d, temp_dir() as m, \
+                temp_file(where=d, name='a.html', content='a'):
+            filename = os.path.join(m, 'manifest')
+            page = StaticPage(directory=d, manifest=filename)
+            r = get_response(page, 'GET', '/a.html')
+
+            self.assertEquals('a', get_message(r))
+            self.assertIsNotNone(page.store.primary.manifest)
+
+            self.assertIn('a.html', load_manifest(filename).files)
+
+    def test_stat_from_changed_file(self):
+        """
+        If a file changed after the manifest was built, its stat should not
+        come from the manifest.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.html', content='a') as f:
+            store = FileStore(directory=d, manifest=Manifest(d).update())
+
+            with open(f, 'wb') as o:
+                o.write(b'changed')
+
+            stat = store.stat('a.html')
+
+            self.assertEquals(7, stat.size)
+            self.assertIsNone(stat.content_type)
+            self.assertNotEquals(
+                '"{0}"'.format(store.manifest.get('a.html').digest),
+                stat.etag)
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.store.manifest'
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import threading
+import unittest
+
+from inelegant.finder import TestFinder
+
+from confeitaria.static.store.aggregate import AggregateStore
+from confeitaria.static.store.error import NotFoundError
+from confeitaria.static.store.fake import FakeStore
+from confeitaria.static.store.metrics import (
+    HIT, MISS, MeteredStore, Metrics, Counters)
+
+
+class TestMeteredStore(unittest.TestCase):
+
+    def test_operations(self):
+        """
+        Each operation of the store should have its own counters.
+        """
+        metrics = Metrics()
+        store = MeteredStore(FakeStore({'a.txt': b'abc'}), metrics)
+
+        store.stat('a.txt')
+        store.stream('a.txt', offset=1)
+
+        with self.assertRaises(NotFoundError):
+            store.stream('b.txt')
+
+        stat = metrics.get_counters('FakeStore', 'stat')
+        stream = metrics.get_counters('FakeStore', 'stream')
+
+        self.assertEquals((1, 0, 0), (stat.hits, stat.misses, stat.bytes))
+        self.assertEquals(
+            (1, 1, 2), (stream.hits, stream.misses, stream.bytes))
+
+    def test_errors(self):
+        """
+        Failures other than ``NotFoundError`` should be counted as errors.
+        """
+        class ForbiddenStore(object):
+            def read(self, path):
+                raise ValueError('Forbidden')
+
+        metrics = Metrics()
+        store = MeteredStore(ForbiddenStore(), metrics, name='forbidden')
+
+        with self.assertRaises(ValueError):
+            store.read('a.txt')
+
+        counters = metrics.get_counters('forbidden', 'read')
+
+        self.assertEquals((0, 0, 1), (
+            counters.hits, counters.misses, counters.errors))
+
+    def test_read_many(self):
+        """
+        Batch reads should count each document.
+        """
+        metrics = Metrics()
+        store = MeteredStore(FakeStore({'a.txt': b'abc'}), metrics)
+
+        store.read_many(['a.txt', 'b.txt'])
+
+        counters = metrics.get_counters('FakeStore', 'read')
+
+        self.assertEquals((1, 1, 3), (
+            counters.hits, counters.misses, counters.bytes))
+
+    def test_aggregate_fall_through(self):
+        """
+        Wrapping the stores of an aggregate store should tell how often it
+        falls through to the secondary store.
+        """
+        metrics = Metrics()
+        store = MeteredStore(
+            AggregateStore(
+                MeteredStore(FakeStore({'a.txt': b'a'}), metrics, 'primary'),
+                MeteredStore(FakeStore({'b.txt': b'b'}), metrics, 'secondary'),
+                index_size=0),
+            metrics)
+
+        store.read('a.txt')
+        store.read('b.txt')
+        store.read('b.txt')
+
+        primary = metrics.get_counters('primary', 'read')
+        secondary = metrics.get_counters('secondary', 'read')
+        aggregate = metrics.get_counters('AggregateStore', 'read')
+
+        self.assertEquals((1, 2), (primary.hits, primary.misses))
+        self.assertEquals((2, 0), (secondary.hits, secondary.misses))
+        self.assertEquals(3, aggregate.hits)
+
+    def test_delegate_attributes(self):
+        """
+        Other attributes should be the ones of the wrapped store.
+        """
+        fake = FakeStore({'a.txt': b'a'})
+        store = MeteredStore(fake, Metrics())
+
+        self.assertIs(fake.documents, store.documents)
+
+        with self.assertRaises(AttributeError):
+            store.nothing
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_concurrent_counters(self):
+        """
+        Counters should not lose updates from concurrent threads.
+        """
+        metrics = Metrics()
+
+        def record():
+            for i in range(1000):
+                metrics.get_counters('store', 'read').record(HIT, 0.001, 1)
+
+        threads = [threading.Thread(target=record) for i in range(8)]
+
+        for t in threads:
+            t.start()
+
+        for t in threads:
+            t.join()
+
+        counters = metrics.get_counters('store', 'read')
+
+        self.assertEquals(8000, counters.hits)
+        self.assertEquals(8000, counters.bytes)
+
+    def test_histogram(self):
+        """
+        Latencies should be counted in the first bucket they fit in.
+        """
+        counters = Counters(buckets=[0.001, 0.01])
+
+        counters.record(HIT, 0.001)
+        counters.record(HIT, 0.005)
+        counters.record(MISS, 1)
+
+        latency = counters.snapshot()['latency']
+
+        self.assertEquals([1, 2, 3], latency['counts'])
+        self.assertAlmostEqual(1.006, latency['sum'])
+
+    def test_to_json(self):
+        """
+        The metrics should be exported as JSON.
+        """
+        metrics = Metrics()
+        metrics.get_counters('store', 'read').record(MISS, 0.001)
+
+        result = json.loads(metrics.to_json())
+
+        self.assertEquals(1, result['store']['read']['misses'])
+
+    def test_to_prometheus(self):
+        """
+        The metrics should be exported in the Prometheus text format, with
+        cumulative buckets.
+        """
+        metrics = Metrics(buckets=[0.01])
+        metrics.get_counters('store', 'read').record(HIT, 0.001, 5)
+        metrics.get_counters('store', 'read').record(HIT, 0.1, 5)
+
+        lines = metrics.to_prometheus().splitlines()
+        labels = 'component="store",operation="read"'
+
+        self.assertIn(
+            'confeitaria_static_bytes_total{{{0}}} 10'.format(labels), lines)
+        self.assertIn(
+            'confeitaria_static_latency_seconds_bucket{{{0},le="0.01"}} 1'
+            .format(labels), lines)
+        self.assertIn(
+            'confeitaria_static_latency_seconds_bucket{{{0},le="+Inf"}} 2'
+            .format(labels), lines)
+        self.assertIn(
+            'confeitaria_static_latency_seconds_count{{{0}}} 2'.format(
+                labels), lines)
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.store.metrics'
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
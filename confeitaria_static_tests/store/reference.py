@@ -104,3 +104,114 @@ class ReferenceStoreTestCase(unittest.TestCase):
 
             store = self.get_store(container=d)
             self.assertEquals('subdir', store.read('/a/b/c/sub.txt'))
+
+    def test_stat(self):
+        """
+        The store should provide the size and an entity tag of a document
+        without changing it.
+        """
+        with self.make_container() as d, \
+                self.make_document('test.txt', where=d, content='stat') as f:
+
+            store = self.get_store(container=d)
+            stat = store.stat('test.txt')
+
+            self.assertEquals(4, stat.size)
+            self.assertTrue(stat.etag)
+            self.assertEquals(stat.etag, store.stat('test.txt').etag)
+            self.assertEquals('stat', store.read('test.txt'))
+
+    def test_stat_default_file(self):
+        """
+        If given a path to a dir, the store should provide the stat of the
+        default file.
+        """
+        with self.make_container() as d, \
+                self.make_document(
+                    'test.txt', where=d, path='a/b/c', content='defsub') as f:
+
+            store = self.get_store(container=d, default_file_name='test.txt')
+            stat = store.stat('a/b/c')
+
+            self.assertEquals(6, stat.size)
+            self.assertEquals('a/b/c/test.txt', stat.path)
+
+    def test_stat_raise_valueerror_on_not_found(self):
+        """
+        If the file does not exist, ``stat()`` should raise ``ValueError``.
+        """
+        with self.make_container() as d:
+            store = self.get_store(container=d)
+
+            with self.assertRaises(ValueError):
+                store.stat('nofile.txt')
+
+    def test_stream(self):
+        """
+        The store should provide the content of a document in chunks of at
+        most the given size.
+        """
+        with self.make_container() as d, \
+                self.make_document(
+                    'test.txt', where=d, content='streamed content') as f:
+
+            store = self.get_store(container=d)
+            body = store.stream('test.txt', chunk_size=5)
+
+            try:
+                chunks = list(body)
+            finally:
+                body.close()
+
+            self.assertEquals(16, body.length)
+            self.assertEquals('streamed content', ''.join(chunks))
+            self.assertTrue(all(len(c) <= 5 for c in chunks))
+
+    def test_stream_raise_valueerror_on_not_found(self):
+        """
+        If the file does not exist, ``stream()`` should raise ``ValueError``.
+        """
+        with self.make_container() as d:
+            store = self.get_store(container=d)
+
+            with self.assertRaises(ValueError):
+                store.stream('nofile.txt')
+
+    def test_stream_range(self):
+        """
+        The store should provide only part of the content of a document, given
+        an offset and a length.
+        """
+        with self.make_container() as d, \
+                self.make_document(
+                    'test.txt', where=d, content='streamed content') as f:
+
+            store = self.get_store(container=d)
+            body = store.stream('test.txt', chunk_size=3, offset=2, length=8)
+
+            try:
+                chunks = list(body)
+            finally:
+                body.close()
+
+            self.assertEquals(8, body.length)
+            self.assertEquals('reamed c', ''.join(chunks))
+
+    def test_stream_range_beyond_end(self):
+        """
+        If the requested range goes beyond the end of the document, the store
+        should provide the content up to the end of the document.
+        """
+        with self.make_container() as d, \
+                self.make_document(
+                    'test.txt', where=d, content='streamed content') as f:
+
+            store = self.get_store(container=d)
+            body = store.stream('test.txt', offset=9, length=100)
+
+            try:
+                content = ''.join(body)
+            finally:
+                body.close()
+
+            self.assertEquals('content', content)
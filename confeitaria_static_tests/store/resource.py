@@ -18,6 +18,10 @@
 # along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
 import os
 import os.path
+import sys
+import time
+import pkgutil
+import zipfile
 import contextlib
 
 import unittest
@@ -26,11 +30,166 @@ from inelegant.module import available_module, available_resource
 from inelegant.fs import temp_file, temp_dir
 from inelegant.finder import TestFinder
 
+from confeitaria.static.store.error import NotFoundError
 from confeitaria.static.store.resource import ResourceStore
 
 from confeitaria_static_tests.store.reference import ReferenceStoreTestCase
 
 
+class TestResourceStore(unittest.TestCase):
+
+    def test_stat_mtime(self):
+        """
+        The stat of a resource should have its modification time.
+        """
+        with available_module('m'), \
+                available_resource('m', 'a.html', where='r', content='A'):
+            directory = os.path.dirname(sys.modules['m'].__file__)
+            path = os.path.join(directory, 'r', 'a.html')
+
+            store = ResourceStore('m', 'r')
+
+            self.assertEquals(
+                os.path.getmtime(path), store.stat('a.html').mtime)
+
+    def test_zipped_package(self):
+        """
+        The store should read resources from zipped packages, and take their
+        modification time from the zip entries.
+        """
+        date_time = (2015, 1, 1, 12, 30, 0)
+
+        with available_zipped_package(
+                'zm', {'r/a.html': 'A'}, date_time=date_time):
+            store = ResourceStore('zm', 'r')
+
+            self.assertEquals('A', store.read('a.html'))
+            self.assertEquals(
+                time.mktime(date_time + (0, 0, -1)),
+                store.stat('a.html').mtime)
+
+    def test_indexed_zipped_package(self):
+        """
+        An indexed store should read resources from zipped packages, including
+        default files of directories without entries in the zip file.
+        """
+        date_time = (2015, 1, 1, 12, 30, 0)
+        resources = {'r/sub/index.html': 'A', 'r/large.txt': 'L' * 100}
+
+        with available_zipped_package('zm', resources, date_time=date_time):
+            store = ResourceStore('zm', 'r', index=True, preload_size=10)
+
+            self.assertEquals('A', store.read('sub'))
+            self.assertEquals('L' * 100, store.read('large.txt'))
+            self.assertEquals(
+                time.mktime(date_time + (0, 0, -1)),
+                store.stat('/sub/').mtime)
+            self.assertEquals('sub/index.html', store.stat('sub').path)
+
+    def test_indexed_misses_do_no_io(self):
+        """
+        Once an indexed store listed its resources, it should not read the
+        package to find out whether a resource or a directory exists, nor to
+        read small resources.
+        """
+        with available_module('m'), \
+                available_resource('m', 'index.html', where='r/sub'), \
+                available_resource('m', 'a.html', where='r', content='A'):
+            store = ResourceStore('m', 'r', index=True)
+            store.read('a.html')
+            get_data = pkgutil.get_data
+            calls = []
+
+            def counting_get_data(*args):
+                calls.append(args)
+                return get_data(*args)
+
+            pkgutil.get_data = counting_get_data
+
+            try:
+                self.assertEquals('A', store.read('a.html'))
+                store.read('sub')
+
+                with self.assertRaises(NotFoundError):
+                    store.read('nofile.html')
+                with self.assertRaises(NotFoundError):
+                    store.read('../a.html')
+            finally:
+                pkgutil.get_data = get_data
+
+            self.assertEquals([], calls)
+
+    def test_large_resources_are_read_lazily(self):
+        """
+        Resources larger than ``preload_size`` should be read at every
+        request.
+        """
+        with available_module('m'), \
+                available_resource('m', 'a.txt', where='r', content='large'):
+            store = ResourceStore('m', 'r', index=True, preload_size=2)
+
+            self.assertIsNone(store.entries)
+            self.assertEquals('large', store.read('a.txt'))
+            self.assertIsNone(store.entries['a.txt'].content)
+
+    def test_removed_large_resource_is_not_found(self):
+        """
+        If a large resource is removed from the package after the store
+        listed its resources, reading it should raise ``NotFoundError``.
+        """
+        with available_module('m'):
+            with available_resource('m', 'a.txt', where='r', content='large'):
+                store = ResourceStore('m', 'r', index=True, preload_size=2)
+                store.load_index()
+
+            with self.assertRaises(NotFoundError):
+                store.read('a.txt')
+
+    def test_stats_are_bounded(self):
+        """
+        The store should keep at most ``stat_cache_size`` stats, even if
+        the same resource is requested through many paths.
+        """
+        with available_module('m'), \
+                available_resource('m', 'a.html', where='r', content='A'):
+            store = ResourceStore('m', 'r', stat_cache_size=2)
+
+            for i in range(10):
+                store.stat('./' * i + 'a.html')
+
+            self.assertEquals(2, len(store.stats))
+
+
+@contextlib.contextmanager
+def available_zipped_package(
+        name, resources, date_time=(2015, 1, 1, 0, 0, 0)):
+    """
+    Makes importable, from a zip file, a package with the given resources. The
+    resources are given as a dict mapping the path inside the package to the
+    content.
+    """
+    with temp_dir() as d:
+        archive = os.path.join(d, name + '.zip')
+
+        with contextlib.closing(zipfile.ZipFile(archive, 'w')) as z:
+            entries = dict(resources)
+            entries['__init__.py'] = ''
+
+            for path, content in entries.items():
+                info = zipfile.ZipInfo(name + '/' + path, date_time=date_time)
+                z.writestr(info, content)
+
+        sys.path.insert(0, archive)
+
+        try:
+            __import__(name)
+            yield archive
+        finally:
+            sys.path.remove(archive)
+            sys.modules.pop(name, None)
+            sys.path_importer_cache.pop(archive, None)
+
+
 class ReferenceTestResourceStore(ReferenceStoreTestCase):
 
     def get_store(self, container, default_file_name=None):
@@ -65,6 +224,18 @@ class ReferenceTestResourceStore(ReferenceStoreTestCase):
         return available_resource(module, name, where=subdir, content=content)
 
 
+class ReferenceTestIndexedResourceStore(ReferenceTestResourceStore):
+
+    def get_store(self, container, default_file_name=None):
+        """
+        Create an indexed resource store with the given arguments.
+        """
+        module, subdir = container
+
+        return ResourceStore(
+            module, subdir, default_file_name=default_file_name, index=True)
+
+
 load_tests = TestFinder(
     __name__,
     'confeitaria.static.store.resource',
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+import unittest
+
+from inelegant.finder import TestFinder
+
+from confeitaria.static.store.stat import file_etag, content_etag
+
+
+class TestETags(unittest.TestCase):
+
+    def test_file_etag_changes_with_mtime(self):
+        """
+        The entity tag of a file should change if its modification time
+        changes, even if by a fraction of a second.
+        """
+        self.assertNotEquals(
+            file_etag(inode=1, size=1, mtime=1420070400.1),
+            file_etag(inode=1, size=1, mtime=1420070400.2))
+
+    def test_content_etag_changes_with_content(self):
+        """
+        The entity tag of a content should change if the content changes.
+        """
+        self.assertNotEquals(content_etag('abc'), content_etag('abd'))
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.store.stat'
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
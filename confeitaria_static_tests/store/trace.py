@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import sys
+import threading
+import unittest
+
+from inelegant.finder import TestFinder
+from inelegant.fs import temp_dir, temp_file
+
+from confeitaria.static.store import trace
+from confeitaria.static.store.aggregate import AggregateStore
+from confeitaria.static.store.error import NotFoundError
+from confeitaria.static.store.fake import FakeStore
+from confeitaria.static.store.file import FileStore
+from confeitaria.static.store.trace import add_hook, remove_hook, tracing
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+
+class TestTrace(unittest.TestCase):
+
+    def test_file_store_phases(self):
+        """
+        ``FileStore`` should trace the resolution of the path inside the
+        read.
+        """
+        spans = []
+
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.txt', content='a'):
+            store = FileStore(d)
+
+            with tracing([spans.append]):
+                store.read('a.txt')
+
+        resolve, read = spans
+
+        self.assertEquals(('resolve', 'read'), (resolve.phase, read.phase))
+        self.assertIs(read, resolve.parent)
+        self.assertIs(store, read.component)
+        self.assertEquals('a.txt', read.path)
+        self.assertTrue(read.duration >= resolve.duration >= 0)
+
+    def test_aggregate_fall_through(self):
+        """
+        ``AggregateStore`` should trace each store it tries, with their
+        errors.
+        """
+        spans = []
+        primary = FakeStore({})
+        secondary = FakeStore({'a.txt': b'a'})
+        store = AggregateStore(primary, secondary)
+
+        with tracing([spans.append]):
+            store.read('a.txt')
+
+        delegates = [s for s in spans if s.phase == 'delegate']
+
+        self.assertEquals(
+            [primary, secondary], [s.component for s in delegates])
+        self.assertTrue(isinstance(delegates[0].error, NotFoundError))
+        self.assertIsNone(delegates[1].error)
+        self.assertEquals('read', spans[-1].phase)
+        self.assertIs(store, spans[-1].component)
+
+    def test_global_hooks(self):
+        """
+        Global hooks should receive the spans of all threads.
+        """
+        spans = []
+        store = FakeStore({'a.txt': b'a'})
+        add_hook(spans.append)
+
+        try:
+            thread = threading.Thread(target=store.read, args=('a.txt',))
+            thread.start()
+            thread.join()
+        finally:
+            remove_hook(spans.append)
+
+        store.read('a.txt')
+
+        self.assertEquals(['read'], [s.phase for s in spans])
+
+    def test_thread_hooks(self):
+        """
+        Hooks given to ``tracing()`` should only receive the spans of the
+        current thread, inside the context.
+        """
+        spans = []
+        store = FakeStore({'a.txt': b'a'})
+
+        with tracing([spans.append]):
+            thread = threading.Thread(target=store.read, args=('a.txt',))
+            thread.start()
+            thread.join()
+
+        store.read('a.txt')
+
+        self.assertEquals([], spans)
+        self.assertFalse(trace.is_tracing())
+
+    def test_failing_hook(self):
+        """
+        A failing hook should not make the traced phase fail.
+        """
+        def hook(span):
+            raise Exception('Hook failure')
+
+        stderr = sys.stderr
+        sys.stderr = StringIO()
+
+        try:
+            with tracing([hook]):
+                content = FakeStore({'a.txt': b'a'}).read('a.txt')
+
+            self.assertEquals(b'a', content)
+            self.assertIn('Hook failure', sys.stderr.getvalue())
+        finally:
+            sys.stderr = stderr
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.store.trace'
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import sys
+import time
+import shutil
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from inelegant.finder import TestFinder
+from inelegant.fs import temp_dir, temp_file
+
+from confeitaria.static.page import StaticPage
+from confeitaria.static.store.cache import CacheStore
+from confeitaria.static.store.file import FileStore
+from confeitaria.static.store.manifest import Manifest
+from confeitaria.static.store.watch import Watcher, is_watch_available, \
+    encode_name, decode_name
+
+from confeitaria_static_tests.page import get_response
+
+
+@unittest.skipUnless(is_watch_available(), 'inotify is not available')
+class TestWatcher(unittest.TestCase):
+
+    def test_create_modify_delete(self):
+        """
+        The watcher should report files created, modified and deleted.
+        """
+        changed = []
+
+        with temp_dir() as d, Watcher(d, listeners=[changed.append]):
+            path = os.path.join(d, 'a.html')
+
+            with open(path, 'w') as f:
+                f.write('a')
+
+            self.assertTrue(wait_for(lambda: 'a.html' in changed))
+            del changed[:]
+
+            with open(path, 'a') as f:
+                f.write('b')
+
+            self.assertTrue(wait_for(lambda: 'a.html' in changed))
+            del changed[:]
+
+            os.remove(path)
+
+            self.assertTrue(wait_for(lambda: 'a.html' in changed))
+
+    def test_text_directory(self):
+        """
+        The watcher should watch directories given as non-ASCII text, even in
+        Python 2.
+        """
+        changed = []
+
+        with temp_dir() as d:
+            if isinstance(d, bytes):
+                d = decode_name(d)
+
+            d = os.path.join(d, u'diret\xf3rio')
+            os.mkdir(encode_name(d))
+
+            with Watcher(d, listeners=[changed.append]):
+                with open(encode_name(os.path.join(d, u'a.html')), 'w') as f:
+                    f.write('a')
+
+                self.assertTrue(wait_for(lambda: u'a.html' in changed))
+
+    def test_move(self):
+        """
+        The watcher should report both paths of a moved file.
+        """
+        changed = []
+
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.html') as f, \
+                Watcher(d, listeners=[changed.append]):
+            os.rename(f, os.path.join(d, 'b.html'))
+
+            self.assertTrue(
+                wait_for(lambda: {'a.html', 'b.html'} <= set(changed)))
+
+            os.rename(os.path.join(d, 'b.html'), f)
+
+    def test_new_subdirectory(self):
+        """
+        The watcher should watch directories created after it was started.
+        """
+        changed = []
+
+        with temp_dir() as d, Watcher(d, listeners=[changed.append]):
+            os.makedirs(os.path.join(d, 'a', 'b'))
+
+            self.assertTrue(wait_for(lambda: 'a' in changed))
+            time.sleep(0.05)
+
+            with open(os.path.join(d, 'a', 'b', 'c.html'), 'w') as f:
+                f.write('c')
+
+            self.assertTrue(wait_for(lambda: 'a/b/c.html' in changed))
+
+            shutil.rmtree(os.path.join(d, 'a'))
+
+    def test_failing_listener(self):
+        """
+        If a listener fails, the other ones should still be called, and the
+        error should be printed.
+        """
+        changed = []
+        stderr = sys.stderr
+        sys.stderr = StringIO()
+
+        def fail(path):
+            raise Exception('listener failed')
+
+        try:
+            with temp_dir() as d, \
+                    Watcher(d, listeners=[fail, changed.append]):
+                with temp_file(where=d, name='a.html'):
+                    self.assertTrue(wait_for(lambda: 'a.html' in changed))
+
+            self.assertIn('listener failed', sys.stderr.getvalue())
+        finally:
+            sys.stderr = stderr
+
+    def test_stop(self):
+        """
+        A stopped watcher should not report anything.
+        """
+        changed = []
+
+        with temp_dir() as d:
+            Watcher(d, listeners=[changed.append]).start().stop()
+
+            with temp_file(where=d, name='a.html'):
+                time.sleep(0.1)
+
+            self.assertEquals([], changed)
+
+
+@unittest.skipUnless(is_watch_available(), 'inotify is not available')
+class TestInvalidation(unittest.TestCase):
+
+    def test_file_store_negative_cache(self):
+        """
+        A file created while its path is remembered as missing should be
+        found once the watcher reports it.
+        """
+        with temp_dir() as d:
+            store = FileStore(d, negative_ttl=60)
+
+            with Watcher(d, listeners=[store.invalidate]):
+                with self.assertRaises(ValueError):
+                    store.read('a.html')
+
+                with temp_file(where=d, name='a.html', content='a'):
+                    self.assertTrue(wait_for(lambda: read(store, 'a.html')))
+
+    def test_file_store_manifest(self):
+        """
+        A file created after the manifest was built should be found once the
+        watcher reports it.
+        """
+        with temp_dir() as d, temp_dir(where=d, name='sub') as sub:
+            store = FileStore(d, manifest=Manifest(d).update())
+
+            with Watcher(d, listeners=[store.invalidate]):
+                with temp_file(where=sub, name='index.html', content='i'):
+                    self.assertTrue(wait_for(lambda: read(store, 'sub')))
+
+    def test_cache_store(self):
+        """
+        A cache store which does not validate its documents should read them
+        again once the watcher reports they changed.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.html', content='a') as f:
+            store = CacheStore(FileStore(d), validate=False)
+            store.read('a.html')
+
+            with Watcher(d, listeners=[store.invalidate]):
+                with open(f, 'w') as o:
+                    o.write('changed')
+
+                self.assertTrue(
+                    wait_for(lambda: store.read('a.html') == 'changed'))
+
+    def test_page(self):
+        """
+        A page watching its directory should serve changed documents, even if
+        they are cached.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.html', content='a') as f:
+            page = StaticPage(d, cache=True, watch=True)
+
+            try:
+                self.assertEquals('a', get_response(page, 'a.html').message)
+
+                with open(f, 'w') as o:
+                    o.write('changed')
+
+                self.assertTrue(wait_for(
+                    lambda: get_response(page, 'a.html').message ==
+                    'changed'))
+            finally:
+                page.watcher.stop()
+
+
+def read(store, path):
+    """
+    Reads the document from the store, returning ``None`` if it is not found.
+    """
+    try:
+        return store.read(path)
+    except ValueError:
+        return None
+
+
+def wait_for(condition, timeout=2):
+    """
+    Waits until ``condition()`` is true, returning ``False`` if it does not
+    happen before the timeout.
+    """
+    deadline = time.time() + timeout
+
+    while time.time() < deadline:
+        if condition():
+            return True
+
+        time.sleep(0.01)
+
+    return False
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.store.watch'
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import threading
+import unittest
+
+from inelegant.finder import TestFinder
+from inelegant.fs import temp_dir, temp_file
+
+from confeitaria.static.page import StaticPage
+from confeitaria.static.store.aggregate import AggregateStore
+from confeitaria.static.store.fake import FakeStore
+from confeitaria.static.store.file import FileStore
+from confeitaria.static.warmup import read_log_file, warm_up
+
+
+class TestWarmUp(unittest.TestCase):
+
+    def test_limit(self):
+        """
+        Only the ``limit`` most frequent paths should be read.
+        """
+        store = RecordingStore({'a': b'a', 'b': b'b', 'c': b'c'})
+        report = warm_up(store, ['c', 'b', 'a', 'b', 'a', 'b'], limit=2)
+
+        self.assertEquals(2, report['documents'])
+        self.assertEquals(['a', 'b'], sorted(store.reads))
+
+    def test_max_size(self):
+        """
+        Documents which do not fit in the remaining size should be skipped,
+        but smaller, less frequent documents should still be read.
+        """
+        store = RecordingStore({'a': b'aaa', 'b': b'bbbb', 'c': b'c'})
+        report = warm_up(store, ['a', 'a', 'a', 'b', 'b', 'c'], max_size=4)
+
+        self.assertEquals(['a', 'c'], sorted(store.reads))
+        self.assertEquals(4, report['bytes'])
+
+    def test_aggregate_store(self):
+        """
+        Paths should be resolved as the store resolves them when serving.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='index.html', content='file'):
+            store = AggregateStore(
+                FileStore(d), FakeStore({'x.js': b'fake'}))
+            report = warm_up(store, ['/', 'x.js', 'nofile.js'])
+
+        self.assertEquals(2, report['documents'])
+        self.assertEquals(8, report['bytes'])
+        self.assertEquals(1, report['failed'])
+
+    def test_parallel(self):
+        """
+        Documents should be read by many threads.
+        """
+        store = RecordingStore(
+            dict((str(i), b'x') for i in range(32)))
+        report = warm_up(store, [str(i) for i in range(32)], jobs=4)
+
+        self.assertEquals(32, report['documents'])
+        self.assertTrue(len(store.threads) > 1)
+        self.assertTrue(report['seconds'] >= 0)
+
+
+class TestReadLogFile(unittest.TestCase):
+
+    def test_read_log_file(self):
+        """
+        ``read_log_file()`` should return the paths in the log, with the
+        prefix removed.
+        """
+        log = '\n'.join([
+            '::1 - - [10/Oct/2020:13:55:36 +0000] "GET /static/a.css '
+            'HTTP/1.1" 200 10 "-" "Mozilla/5.0"',
+            '::1 - - [10/Oct/2020:13:55:36 +0000] "HEAD /static/ '
+            'HTTP/1.1" 304 -',
+            '::1 - - [10/Oct/2020:13:55:36 +0000] "GET /other/b.css '
+            'HTTP/1.1" 200 10',
+        ])
+
+        with temp_dir() as d, \
+                temp_file(where=d, name='access.log', content=log) as f:
+            self.assertEquals(
+                ['a.css', ''], read_log_file(f, prefix='/static'))
+
+
+class TestStaticPageWarmUp(unittest.TestCase):
+
+    def test_warm_up_from_log(self):
+        """
+        The page should warm up its cache from an access log.
+        """
+        log = '::1 - - [10/Oct/2020:13:55:36 +0000] "GET /a.css ' \
+            'HTTP/1.1" 200 10\n'
+
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.css', content='a {}'), \
+                temp_file(where=d, name='access.log', content=log):
+            page = StaticPage(directory=d, cache=True)
+            report = page.warm_up(log=os.path.join(d, 'access.log'))
+
+            self.assertEquals(1, report['documents'])
+            self.assertEquals(4, page.store.primary.cache.size)
+
+
+class RecordingStore(FakeStore):
+    """
+    A fake store that records which paths were read, and by which threads.
+    """
+
+    def __init__(self, documents):
+        FakeStore.__init__(self, documents)
+        self.reads = []
+        self.threads = set()
+        self.lock = threading.Lock()
+        self.barrier = threading.Event()
+
+    def read(self, path):
+        with self.lock:
+            self.reads.append(path)
+            self.threads.add(threading.current_thread().ident)
+
+            if len(self.threads) > 1:
+                self.barrier.set()
+
+        self.barrier.wait(0.01)
+
+        return FakeStore.read(self, path)
+
+
+load_tests = TestFinder(__name__, 'confeitaria.static.warmup').load_tests
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+#
+# Copyright 2015 Adam Victor Brandizzi
+#
+# This file is part of Confeitaria Static.
+#
+# Confeitaria Static is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Confeitaria Static is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Confeitaria Static.  If not, see <http://www.gnu.org/licenses/>.
+import unittest
+import wsgiref.util
+
+from inelegant.finder import TestFinder
+from inelegant.fs import temp_dir, temp_file
+
+from confeitaria.static.page import StaticPage
+from confeitaria.static.store.archive import ArchiveStore
+from confeitaria.static.store.fake import FakeStore
+from confeitaria.static.wsgi import StaticApplication
+
+from confeitaria_static_tests.store.archive import available_archive
+
+
+class TestStaticApplication(unittest.TestCase):
+
+    def test_serve_page(self):
+        """
+        ``StaticApplication`` should serve the content from the page.
+        """
+        app = StaticApplication(StaticPage(store=FakeStore({'a.html': 'A'})))
+        response = StartResponse()
+
+        self.assertEquals(['A'], app({'PATH_INFO': '/a.html'}, response))
+        self.assertEquals('200 OK', response.status)
+
+    def test_not_found(self):
+        """
+        ``StaticApplication`` should respond with 404 if the page cannot find
+        the document.
+        """
+        app = StaticApplication(StaticPage(store=FakeStore({})))
+        response = StartResponse()
+
+        app({'PATH_INFO': '/a.html'}, response)
+
+        self.assertEquals('404 Not Found', response.status)
+
+    def test_give_headers_to_page(self):
+        """
+        ``StaticApplication`` should give the request headers to the page.
+        """
+        app = StaticApplication(StaticPage(store=FakeStore({'a.html': 'A'})))
+        response = StartResponse()
+
+        app({'PATH_INFO': '/a.html'}, response)
+        environ = {
+            'PATH_INFO': '/a.html',
+            'HTTP_IF_NONE_MATCH': response.headers['ETag']
+        }
+
+        self.assertEquals([''], app(environ, response))
+        self.assertEquals('304 Not Modified', response.status)
+
+    def test_stream_file(self):
+        """
+        ``StaticApplication`` should send the chunks of a streamed file, and
+        close it afterwards.
+        """
+        content = 'example' * 1000
+
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.html', content=content):
+            page = StaticPage(directory=d, stream=True, chunk_size=1000)
+            app = StaticApplication(page)
+            response = StartResponse()
+
+            body = app({'PATH_INFO': '/a.html'}, response)
+            chunks = list(body)
+            body.close()
+
+            self.assertEquals(content, ''.join(chunks))
+            self.assertEquals(7, len(chunks))
+            self.assertEquals(
+                str(len(content)), response.headers['Content-Length'])
+            self.assertTrue(body.file.closed)
+
+    def test_stream_archive(self):
+        """
+        ``StaticApplication`` should give the server bytes, even if the store
+        streams views of a mapped file.
+        """
+        with available_archive({'a.html': 'example'}) as archive:
+            store = ArchiveStore(archive)
+            page = StaticPage(store=store, stream=True, chunk_size=4)
+            app = StaticApplication(page)
+
+            body = app({'PATH_INFO': '/a.html'}, StartResponse())
+            chunks = list(body)
+            body.close()
+
+            self.assertEquals([b'exam', b'ple'], chunks)
+            self.assertTrue(all(isinstance(c, bytes) for c in chunks))
+
+            store.close()
+
+    def test_use_file_wrapper(self):
+        """
+        ``StaticApplication`` should give whole streamed files to the
+        ``wsgi.file_wrapper`` of the server.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.bin', content='\x00\r\n\xff'):
+            page = StaticPage(directory=d, stream=True)
+            app = StaticApplication(page)
+            environ = {'PATH_INFO': '/a.bin', 'wsgi.file_wrapper': FileWrapper}
+
+            wrapper = app(environ, StartResponse())
+
+            try:
+                self.assertIsInstance(wrapper, FileWrapper)
+                self.assertEquals('\x00\r\n\xff', ''.join(wrapper))
+            finally:
+                wrapper.close()
+
+    def test_do_not_use_file_wrapper_for_ranges(self):
+        """
+        ``StaticApplication`` should not give the ``wsgi.file_wrapper`` files
+        which should not be sent up to the end.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.txt', content='0123456789'):
+            page = StaticPage(directory=d, stream=True)
+            app = StaticApplication(page)
+            environ = {
+                'PATH_INFO': '/a.txt', 'HTTP_RANGE': 'bytes=0-3',
+                'wsgi.file_wrapper': FileWrapper
+            }
+
+            body = app(environ, StartResponse())
+
+            try:
+                self.assertNotIsInstance(body, FileWrapper)
+                self.assertEquals('0123', ''.join(body))
+            finally:
+                body.close()
+
+    def test_head(self):
+        """
+        ``StaticApplication`` should answer ``HEAD`` requests with the headers
+        of a ``GET`` request, but without content.
+        """
+        app = StaticApplication(StaticPage(store=FakeStore({'a.html': 'A'})))
+        get_response = StartResponse()
+        head_response = StartResponse()
+
+        app({'PATH_INFO': '/a.html'}, get_response)
+        body = app(
+            {'PATH_INFO': '/a.html', 'REQUEST_METHOD': 'HEAD'}, head_response)
+
+        self.assertEquals([''], body)
+        self.assertEquals('200 OK', head_response.status)
+        self.assertEquals(get_response.headers, head_response.headers)
+
+    def test_head_stream_file(self):
+        """
+        ``StaticApplication`` should close the files streamed to ``HEAD``
+        requests, since they are not sent.
+        """
+        with temp_dir() as d, \
+                temp_file(where=d, name='a.html', content='example'):
+            page = StaticPage(directory=d, stream=True)
+            app = StaticApplication(page)
+            response = StartResponse()
+
+            body = app(
+                {'PATH_INFO': '/a.html', 'REQUEST_METHOD': 'HEAD'}, response)
+
+            self.assertEquals([''], body)
+            self.assertEquals('7', response.headers['Content-Length'])
+
+    def test_method_not_allowed(self):
+        """
+        ``StaticApplication`` should only serve ``GET`` and ``HEAD``
+        requests.
+        """
+        app = StaticApplication(StaticPage(store=FakeStore({'a.html': 'A'})))
+        response = StartResponse()
+
+        app({'PATH_INFO': '/a.html', 'REQUEST_METHOD': 'POST'}, response)
+
+        self.assertEquals('405 Method Not Allowed', response.status)
+
+
+class StartResponse(object):
+    """
+    A WSGI ``start_response()`` callable that records the status and headers
+    it receives.
+    """
+
+    def __call__(self, status, headers):
+        self.status = status
+        self.headers = dict(headers)
+
+
+class FileWrapper(wsgiref.util.FileWrapper):
+    """
+    A ``wsgi.file_wrapper`` implementation which can be checked for.
+    """
+
+
+load_tests = TestFinder(
+    __name__,
+    'confeitaria.static.wsgi'
+).load_tests
+
+if __name__ == '__main__':
+    unittest.main()